@@ -1,16 +1,62 @@
+import json
 import os
 from datetime import datetime
 
 import boto3
-import requests
+from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from channels.transport import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, get_session
+from profiling import profiled
+
 logger = Logger()
 tracer = Tracer()
 
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(os.environ.get("ALERTS_TABLE_NAME", "alerts"))
+stepfunctions = boto3.client("stepfunctions")
+# Only the parallel ACK mode stops calls, so the client is created on first use
+_connect_client = None
+
+
+def resume_escalation(alert_id: str, task_token: str, acked_by: str, acked_at: str) -> bool:
+    """End the escalation's wait for this alert by returning its task token."""
+    try:
+        stepfunctions.send_task_success(
+            taskToken=task_token,
+            output=json.dumps({"is_acked": True, "status": "acked", "acked_by": acked_by, "acked_at": acked_at}),
+        )
+        logger.info("Escalation wait completed", alert_id=alert_id)
+        return True
+    except ClientError as e:
+        # TaskTimedOut / TaskDoesNotExist: the wait already ended and the escalation moved on
+        logger.warning(
+            "Failed to complete escalation wait",
+            alert_id=alert_id,
+            error_code=e.response.get("Error", {}).get("Code"),
+        )
+        return False
+
+
+def stop_calls(alert_id: str, contact_ids: set, answered_contact_id: str | None) -> int:
+    """Hang up the escalation's other calls that are still ringing (parallel paging)."""
+    global _connect_client
+    remaining = contact_ids - {answered_contact_id}
+    if remaining and _connect_client is None:
+        _connect_client = boto3.client("connect")
+
+    stopped = 0
+    for contact_id in remaining:
+        try:
+            _connect_client.stop_contact(ContactId=contact_id, InstanceId=os.environ["AWS_CONNECT_INSTANCE_ID"])
+            stopped += 1
+        except Exception as e:
+            # ContactNotFoundException: the call already ended
+            logger.warning("Failed to stop call", alert_id=alert_id, contact_id=contact_id, error=str(e))
+    if stopped:
+        logger.info("Stopped remaining calls", alert_id=alert_id, stopped=stopped)
+    return stopped
 
 
 def send_slack_ack_notification(alert_id: str, alert_title: str, acked_by: str) -> bool:
@@ -41,7 +87,9 @@ def send_slack_ack_notification(alert_id: str, alert_title: str, acked_by: str)
     }
 
     try:
-        response = requests.post(webhook_url, json=message, timeout=10)
+        response = get_session(pool_size=1).post(
+            webhook_url, json=message, timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+        )
         response.raise_for_status()
         logger.info("Slack ACK notification sent")
         return True
@@ -52,6 +100,7 @@ def send_slack_ack_notification(alert_id: str, alert_title: str, acked_by: str)
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@profiled
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """
     Handles ACK from AWS Connect Contact Flow.
@@ -78,24 +127,34 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
         return {"status": "error", "message": "alert_id is required"}
 
     try:
+        acked_at = datetime.utcnow().isoformat()
         response = table.update_item(
             Key={"PK": f"ALERT#{alert_id}", "SK": "METADATA"},
-            UpdateExpression="SET #status = :status, acked_by = :acked_by, acked_at = :acked_at",
+            UpdateExpression=(
+                "SET #status = :status, acked_by = :acked_by, acked_at = :acked_at REMOVE task_tokens, contact_ids"
+            ),
             ExpressionAttributeNames={"#status": "status"},
             ExpressionAttributeValues={
                 ":status": "acked",
                 ":acked_by": acked_by,
-                ":acked_at": datetime.utcnow().isoformat(),
+                ":acked_at": acked_at,
             },
             ConditionExpression="attribute_exists(PK)",
-            ReturnValues="ALL_NEW",
+            ReturnValues="ALL_OLD",
         )
 
         logger.info("Alert acknowledged", alert_id=alert_id, acked_by=acked_by)
 
-        # Get alert title from updated item
-        updated_item = response.get("Attributes", {})
-        alert_title = updated_item.get("alert_title", "Unknown Alert")
+        # Get alert title and the escalation's task token from the item as it was before the ACK
+        previous_item = response.get("Attributes", {})
+        alert_title = previous_item.get("alert_title", "Unknown Alert")
+
+        # Callback and parallel state machines: stop escalating now rather than at the next poll
+        for task_token in previous_item.get("task_tokens", set()):
+            resume_escalation(alert_id, task_token, acked_by, acked_at)
+
+        if previous_item.get("contact_ids"):
+            stop_calls(alert_id, set(previous_item["contact_ids"]), contact_data.get("ContactId"))
 
         # Send Slack notification
         send_slack_ack_notification(alert_id, alert_title, acked_by)
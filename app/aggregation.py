@@ -0,0 +1,94 @@
+from typing import Any
+
+from aws_lambda_powertools import Logger
+
+from channels.base import Alert
+
+
+logger = Logger(child=True)
+
+# SendMessageBatch accepts at most 10 entries
+SQS_BATCH_SIZE = 10
+
+
+class AlertAggregator:
+    """Groups alerts that share the values of the ``group_by`` labels into one digest each."""
+
+    def __init__(self, group_by: list[str], max_group_size: int = 100):
+        self._group_by = list(group_by or [])
+        self._max_group_size = max_group_size
+
+    def key(self, alert: Alert) -> tuple[str, ...]:
+        return tuple(alert.labels.get(name, "") for name in self._group_by)
+
+    def group(self, alerts: list[Alert]) -> list[list[Alert]]:
+        groups: dict[tuple[str, ...], list[Alert]] = {}
+        for alert in alerts:
+            groups.setdefault(self.key(alert), []).append(alert)
+
+        # Very large groups are split so a digest stays within the channels' message size limits
+        size = self._max_group_size
+        return [group[i : i + size] for group in groups.values() for i in range(0, len(group), size)]
+
+
+class InProcessDigestBuffer:
+    """Aggregates every alert of the current invocation (one SNS or SQS batch)."""
+
+    deferred = False
+
+    def __init__(self, aggregator: AlertAggregator):
+        self._aggregator = aggregator
+        self._alerts: list[Alert] = []
+
+    def add(self, alerts: list[Alert]) -> None:
+        self._alerts.extend(alerts)
+
+    def drain(self) -> list[list[Alert]]:
+        """Return the digests to deliver now and empty the buffer."""
+        alerts, self._alerts = self._alerts, []
+        groups = self._aggregator.group(alerts)
+        if len(groups) < len(alerts):
+            logger.info("Aggregated alerts into digests", extra={"alert_count": len(alerts), "digests": len(groups)})
+        return groups
+
+
+class SQSDigestBuffer:
+    """Spans invocations by parking alerts on the digest queue.
+
+    The digest consumer's batching window is the aggregation window: it receives everything
+    queued during the window at once and delivers one digest per group.
+    """
+
+    deferred = True
+
+    def __init__(self, sqs_client: Any, queue_url: str):
+        self._sqs = sqs_client
+        self._queue_url = queue_url
+        self._alerts: list[Alert] = []
+
+    def add(self, alerts: list[Alert]) -> None:
+        self._alerts.extend(alerts)
+
+    def drain(self) -> list[list[Alert]]:
+        """Queue the buffered alerts; those the queue rejects or fails to take are returned to deliver now, one each."""
+        alerts, self._alerts = self._alerts, []
+        rejected = []
+        for start in range(0, len(alerts), SQS_BATCH_SIZE):
+            batch = alerts[start : start + SQS_BATCH_SIZE]
+            try:
+                response = self._sqs.send_message_batch(
+                    QueueUrl=self._queue_url,
+                    Entries=[{"Id": str(i), "MessageBody": alert.model_dump_json()} for i, alert in enumerate(batch)],
+                )
+            except Exception as e:
+                logger.error("Failed to queue alerts for digest", extra={"alert_count": len(batch), "error": str(e)})
+                rejected.extend(batch)
+                continue
+            for failure in response.get("Failed", []):
+                logger.error("Failed to queue alert for digest", extra={"error": failure.get("Message")})
+                rejected.append(batch[int(failure["Id"])])
+
+        logger.info("Queued alerts for digest", extra={"alert_count": len(alerts) - len(rejected)})
+        if rejected:
+            logger.warning("Delivering alerts the digest queue rejected", extra={"alert_count": len(rejected)})
+        return [[alert] for alert in rejected]
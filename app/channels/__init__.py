@@ -1,7 +1,23 @@
-from .aws_connect import AWSConnectChannel
+import importlib
+from typing import Any
+
 from .base import Alert, BaseChannel
-from .slack import SlackChannel
-from .telegram import TelegramChannel
+from .lazy import LazyChannel, deferred
+
+
+# Channel modules pull in their HTTP or AWS client libraries, so they are imported on first access
+_LAZY_ATTRIBUTES = {
+    "TelegramChannel": ".telegram",
+    "SlackChannel": ".slack",
+    "AWSConnectChannel": ".aws_connect",
+    "get_session": ".transport",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
@@ -10,4 +26,7 @@ __all__ = [
     "TelegramChannel",
     "SlackChannel",
     "AWSConnectChannel",
+    "LazyChannel",
+    "deferred",
+    "get_session",
 ]
@@ -1,14 +1,29 @@
+import threading
+from typing import Any
+
 import boto3
 from aws_lambda_powertools import Logger
 from botocore.exceptions import ClientError
 
 from .base import Alert, BaseChannel
+from .rendering import RenderCache, alert_context, compile_templates
 
 
 logger = Logger(child=True)
 
 
 class AWSConnectChannel(BaseChannel):
+    # Spoken by the contact flow; sections are joined with spaces
+    TEMPLATES = {
+        "voice": [
+            "Alert {status_text}.",
+            "Severity: {level}.",
+            "Title: {title}.",
+            "Message: {message}.",
+            "Instance: {label.instance}.",
+        ],
+    }
+
     def __init__(
         self,
         enabled: bool,
@@ -16,13 +31,20 @@ class AWSConnectChannel(BaseChannel):
         contact_flow_id: str,
         source_phone_number: str,
         destination_phone_number: str,
+        templates: dict[str, str | list[str]] | None = None,
+        render_cache: RenderCache | None = None,
     ):
         self._enabled = enabled
         self._instance_id = instance_id
         self._contact_flow_id = contact_flow_id
         self._source_phone_number = source_phone_number
         self._destination_phone_number = destination_phone_number
-        self._connect_client = boto3.client("connect") if enabled else None
+        self._templates = compile_templates(self.TEMPLATES, templates, separator=" ")
+        self._render_cache = render_cache if render_cache is not None else RenderCache()
+        self._cache_scope = f"{self.name}:{destination_phone_number}"
+        # Created on the first call: loading the Connect service model is a noticeable cold-start cost
+        self._connect_client: Any = None
+        self._client_lock = threading.Lock()
 
     @property
     def name(self) -> str:
@@ -37,15 +59,23 @@ class AWSConnectChannel(BaseChannel):
             and bool(self._destination_phone_number)
         )
 
+    @property
+    def client(self) -> Any:
+        if self._connect_client is None:
+            with self._client_lock:
+                if self._connect_client is None:
+                    self._connect_client = boto3.client("connect")
+        return self._connect_client
+
     def send(self, alert: Alert) -> bool:
-        if not self._connect_client:
-            logger.error("AWS Connect client not initialized")
+        if not self._enabled:
+            logger.error("AWS Connect channel is disabled")
             return False
 
-        attributes = self._build_attributes(alert)
+        attributes = self._render_cache.get_or_render(self._cache_scope, alert, self._build_attributes)
 
         try:
-            response = self._connect_client.start_outbound_voice_contact(
+            response = self.client.start_outbound_voice_contact(
                 DestinationPhoneNumber=self._destination_phone_number,
                 ContactFlowId=self._contact_flow_id,
                 InstanceId=self._instance_id,
@@ -86,18 +116,7 @@ class AWSConnectChannel(BaseChannel):
         return attributes
 
     def _build_voice_message(self, alert: Alert) -> str:
-        status_text = "firing" if alert.status == "firing" else "resolved"
-
-        parts = [
-            f"Alert {status_text}.",
-            f"Severity: {alert.level}.",
-            f"Title: {alert.title}.",
-        ]
-
-        if alert.message:
-            clean_message = alert.message.replace("\n", " ").strip()
-            parts.append(f"Message: {clean_message}.")
-        if alert.labels.get("instance"):
-            parts.append(f"Instance: {alert.labels['instance']}.")
-
-        return " ".join(parts)
+        context = alert_context(alert)
+        context["status_text"] = "firing" if alert.status == "firing" else "resolved"
+        context["message"] = alert.message.replace("\n", " ").strip()
+        return self._templates["voice"].render(context)
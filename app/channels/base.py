@@ -1,7 +1,39 @@
+import asyncio
 from abc import ABC, abstractmethod
 from datetime import datetime
+from functools import lru_cache
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
+
+from .rendering import Template, alert_context
+
+
+# Lower value wins when several alerts with different severities are summarized together.
+LEVEL_PRIORITY = {"error": 0, "warning": 1, "info": 2}
+
+TEXT_TEMPLATE = Template(
+    [
+        "{status_emoji} {level_emoji} {title}",
+        "Status: {status_upper}",
+        "Severity: {level_upper}",
+        "Message: {message}",
+        "Value: {value_string}",
+        "Labels: {labels}",
+        "Dashboard: {dashboard_url}",
+    ]
+)
+
+# Grafana's zero time, sent as endsAt for alerts that are still firing
+ZERO_TIME = "0001-01-01T00:00:00Z"
+
+
+@lru_cache(maxsize=1024)
+def parse_timestamp(value: str) -> datetime | None:
+    """Parse a Grafana RFC 3339 timestamp; alerts of one group usually share a handful of them."""
+    try:
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
 
 
 class Alert(BaseModel):
@@ -20,74 +52,131 @@ class Alert(BaseModel):
 
     @classmethod
     def from_grafana_payload(cls, payload: dict) -> "Alert":
+        return cls.from_grafana_group(payload)[0]
+
+    @classmethod
+    def from_grafana_group(cls, payload: dict) -> list["Alert"]:
         alerts = payload.get("alerts", [])
 
-        if alerts:
-            alert_data = alerts[0]
-            labels = alert_data.get("labels", {})
-            annotations = alert_data.get("annotations", {})
-
-            severity = labels.get("severity", "warning").lower()
-            if severity not in ("error", "warning", "info"):
-                severity = "warning"
-
-            starts_at = None
-            ends_at = None
-            if alert_data.get("startsAt"):
-                try:
-                    starts_at = datetime.fromisoformat(alert_data["startsAt"].replace("Z", "+00:00"))
-                except (ValueError, TypeError):
-                    pass
-            if alert_data.get("endsAt") and alert_data["endsAt"] != "0001-01-01T00:00:00Z":
-                try:
-                    ends_at = datetime.fromisoformat(alert_data["endsAt"].replace("Z", "+00:00"))
-                except (ValueError, TypeError):
-                    pass
-
-            return cls(
-                title=payload.get("title", labels.get("alertname", "Unknown Alert")),
-                message=payload.get("message", annotations.get("summary", "")),
-                level=severity,
-                status=payload.get("status", alert_data.get("status", "firing")),
-                labels=labels,
-                annotations=annotations,
-                dashboard_url=alert_data.get("dashboardURL", ""),
-                panel_url=alert_data.get("panelURL", ""),
-                value_string=alert_data.get("valueString", ""),
-                fingerprint=alert_data.get("fingerprint", ""),
-                starts_at=starts_at,
-                ends_at=ends_at,
-            )
+        if not alerts:
+            return [
+                cls(
+                    title=payload.get("title", payload.get("ruleName", "Unknown Alert")),
+                    message=payload.get("message", payload.get("ruleUrl", "")),
+                    level=payload.get("severity", "warning").lower(),
+                    status=payload.get("state", "alerting"),
+                    labels=payload.get("tags", {}),
+                )
+            ]
+
+        # A single-alert group keeps the group title and message; in a larger group each
+        # alert is described by its own alertname and summary.
+        grouped = len(alerts) > 1
+        # One validation call for the whole group is cheaper than constructing alert by alert
+        return _ALERT_GROUP.validate_python(
+            [cls._grafana_fields(payload, alert_data, grouped) for alert_data in alerts]
+        )
+
+    @staticmethod
+    def _grafana_fields(payload: dict, alert_data: dict, grouped: bool) -> dict:
+        get = alert_data.get
+        labels = get("labels") or {}
+        annotations = get("annotations") or {}
+
+        severity = labels.get("severity", "warning").lower()
+        if severity not in LEVEL_PRIORITY:
+            severity = "warning"
+
+        starts_at = get("startsAt")
+        ends_at = get("endsAt")
+
+        if grouped:
+            title = labels.get("alertname") or payload.get("title", "Unknown Alert")
+            message = annotations.get("summary") or payload.get("message", "")
+            status = get("status") or payload.get("status", "firing")
         else:
-            return cls(
-                title=payload.get("title", payload.get("ruleName", "Unknown Alert")),
-                message=payload.get("message", payload.get("ruleUrl", "")),
-                level=payload.get("severity", "warning").lower(),
-                status=payload.get("state", "alerting"),
-                labels=payload.get("tags", {}),
-            )
+            title = payload.get("title", labels.get("alertname", "Unknown Alert"))
+            message = payload.get("message", annotations.get("summary", ""))
+            status = payload.get("status", get("status", "firing"))
+
+        return {
+            "title": title,
+            "message": message,
+            "level": severity,
+            "status": status,
+            "labels": labels,
+            "annotations": annotations,
+            "dashboard_url": get("dashboardURL", ""),
+            "panel_url": get("panelURL", ""),
+            "value_string": get("valueString", ""),
+            "fingerprint": get("fingerprint", ""),
+            "starts_at": parse_timestamp(starts_at) if starts_at else None,
+            "ends_at": parse_timestamp(ends_at) if ends_at and ends_at != ZERO_TIME else None,
+        }
+
+    @classmethod
+    def summarize(cls, alerts: list["Alert"], max_lines: int = 20) -> "Alert":
+        """Collapse a group of alerts into one alert describing the whole group."""
+        if not alerts:
+            return cls(title="[RESOLVED:0] No alerts", status="resolved", level="info")
+        if len(alerts) == 1:
+            return alerts[0]
+
+        level = min((a.level for a in alerts), key=lambda lvl: LEVEL_PRIORITY.get(lvl, len(LEVEL_PRIORITY)))
+        firing = [a for a in alerts if a.status == "firing"]
+        status = "firing" if firing else alerts[0].status
+
+        common_labels = dict(alerts[0].labels)
+        for alert in alerts[1:]:
+            common_labels = {k: v for k, v in common_labels.items() if alert.labels.get(k) == v}
+
+        titles = list(dict.fromkeys(a.title for a in alerts))
+        name = common_labels.get("alertname") or (titles[0] if len(titles) == 1 else ", ".join(titles[:3]))
+
+        lines = []
+        for alert in alerts[:max_lines]:
+            distinct = ", ".join(f"{k}={v}" for k, v in alert.labels.items() if k not in common_labels)
+            line = f"[{alert.status.upper()}] {alert.title}"
+            if distinct:
+                line += f" ({distinct})"
+            if alert.value_string:
+                line += f": {alert.value_string}"
+            lines.append(line)
+        if len(alerts) > max_lines:
+            lines.append(f"... and {len(alerts) - max_lines} more")
+
+        starts = [a.starts_at for a in alerts if a.starts_at]
+        dashboards = {a.dashboard_url for a in alerts}
+
+        return cls(
+            title=f"[{status.upper()}:{len(firing) or len(alerts)}] {name}",
+            message="\n".join(lines),
+            level=level,
+            status=status,
+            labels=common_labels,
+            dashboard_url=dashboards.pop() if len(dashboards) == 1 else "",
+            starts_at=min(starts) if starts else None,
+        )
 
     def format_for_text(self) -> str:
-        status_emoji = "🔴" if self.status == "firing" else "✅"
-        level_emoji = {"error": "🚨", "warning": "⚠️", "info": "ℹ️"}.get(self.level, "📢")
+        context = alert_context(self)
+        context["status_emoji"] = "🔴" if self.status == "firing" else "✅"
+        context["level_emoji"] = {"error": "🚨", "warning": "⚠️", "info": "ℹ️"}.get(self.level, "📢")
+        context["labels"] = ", ".join(f"{k}={v}" for k, v in self.labels.items())
+        return TEXT_TEMPLATE.render(context)
 
-        lines = [
-            f"{status_emoji} {level_emoji} {self.title}",
-            f"Status: {self.status.upper()}",
-            f"Severity: {self.level.upper()}",
-        ]
 
-        if self.message:
-            lines.append(f"Message: {self.message}")
-        if self.value_string:
-            lines.append(f"Value: {self.value_string}")
-        if self.labels:
-            labels_str = ", ".join(f"{k}={v}" for k, v in self.labels.items())
-            lines.append(f"Labels: {labels_str}")
-        if self.dashboard_url:
-            lines.append(f"Dashboard: {self.dashboard_url}")
+_ALERT_GROUP = TypeAdapter(list[Alert])
 
-        return "\n".join(lines)
+
+class DeliveryError(Exception):
+    """Raised by a channel when it knows whether a failed send is worth retrying."""
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: float | None = None, timed_out: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.timed_out = timed_out
 
 
 class BaseChannel(ABC):
@@ -96,6 +185,16 @@ class BaseChannel(ABC):
     def name(self) -> str:
         pass
 
+    @property
+    def destination(self) -> str:
+        """Identifies where messages go (chat, webhook, ...) for per-destination rate limits."""
+        return ""
+
+    @property
+    def attempt_timeout(self) -> float | None:
+        """Longest one send can take (its request timeouts), when the channel knows it."""
+        return None
+
     @abstractmethod
     def send(self, alert: Alert) -> bool:
         pass
@@ -103,3 +202,17 @@ class BaseChannel(ABC):
     @abstractmethod
     def is_enabled(self) -> bool:
         pass
+
+    def send_batch(self, alerts: list[Alert]) -> bool:
+        """Deliver a group of alerts as a single message."""
+        return self.send(Alert.summarize(alerts))
+
+    async def send_async(self, alert: Alert) -> bool:
+        """Deliver an alert without blocking the event loop.
+
+        Runs ``send`` on the loop's executor; Slack and Telegram override it with non-blocking HTTP.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.send, alert)
+
+    async def send_batch_async(self, alerts: list[Alert]) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, self.send_batch, alerts)
@@ -0,0 +1,74 @@
+import importlib
+import threading
+from typing import Any, Callable
+
+from .base import Alert, BaseChannel, DeliveryError
+
+
+def deferred(module: str, name: str) -> Callable[..., Any]:
+    """Callable that imports ``module`` and calls its ``name`` only when first invoked."""
+
+    def create(*args: Any, **kwargs: Any) -> Any:
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+
+    create.__qualname__ = f"deferred({module}.{name})"
+    return create
+
+
+class LazyChannel(BaseChannel):
+    """Stands in for a channel until an alert is first routed to it.
+
+    The channel's module (and the HTTP or AWS client library it needs) is imported and the
+    channel built on first send, so disabled or unrouted channels cost nothing at cold start.
+    Whether it is enabled comes from its config flag alone; a channel enabled without its
+    credentials is caught on first send and rejects it without retries.
+    """
+
+    def __init__(self, name: str, enabled: bool, factory: Callable[[], BaseChannel]):
+        self._name = name
+        self._enabled = enabled
+        self._factory = factory
+        self._channel: BaseChannel | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def channel(self) -> BaseChannel:
+        if self._channel is None:
+            with self._lock:
+                if self._channel is None:
+                    self._channel = self._factory()
+        return self._channel
+
+    @property
+    def destination(self) -> str:
+        return self.channel.destination
+
+    @property
+    def attempt_timeout(self) -> float | None:
+        return self.channel.attempt_timeout
+
+    def is_enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def _configured(self) -> BaseChannel:
+        channel = self.channel
+        if not channel.is_enabled():
+            raise DeliveryError(f"Channel {self._name} is enabled but not configured", retryable=False)
+        return channel
+
+    def send(self, alert: Alert) -> bool:
+        return self._configured.send(alert)
+
+    def send_batch(self, alerts: list[Alert]) -> bool:
+        return self._configured.send_batch(alerts)
+
+    async def send_async(self, alert: Alert) -> bool:
+        return await self._configured.send_async(alert)
+
+    async def send_batch_async(self, alerts: list[Alert]) -> bool:
+        return await self._configured.send_batch_async(alerts)
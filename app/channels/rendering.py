@@ -0,0 +1,153 @@
+import string
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from typing import TYPE_CHECKING, Any, TypeVar
+
+
+if TYPE_CHECKING:
+    from .base import Alert
+
+
+T = TypeVar("T")
+
+STARTED_FORMAT = "%Y-%m-%d %H:%M:%S UTC"
+
+MARKDOWN_SPECIAL_CHARS = "_*[]()~`>#+-=|{}.!"
+_MARKDOWN_ESCAPES = str.maketrans({char: f"\\{char}" for char in MARKDOWN_SPECIAL_CHARS})
+
+_FORMATTER = string.Formatter()
+
+
+def escape_markdown(text: str) -> str:
+    """Backslash-escape every Telegram Markdown special character in a single pass."""
+    return text.translate(_MARKDOWN_ESCAPES)
+
+
+def alert_context(alert: "Alert") -> dict[str, Any]:
+    """Render context fields shared by every channel; channels add their own on top."""
+    return {
+        "title": alert.title,
+        "message": alert.message,
+        "level": alert.level,
+        "level_upper": alert.level.upper(),
+        "status": alert.status,
+        "status_upper": alert.status.upper(),
+        "value_string": alert.value_string,
+        "dashboard_url": alert.dashboard_url,
+        "panel_url": alert.panel_url,
+        "fingerprint": alert.fingerprint,
+        "starts_at": alert.starts_at.strftime(STARTED_FORMAT) if alert.starts_at else "",
+        "label": alert.labels,
+        "annotation": alert.annotations,
+    }
+
+
+class Template:
+    """A message template parsed once into format strings and the fields they read.
+
+    ``source`` is a string or a list of sections, rendered and joined with ``separator``. A
+    section that references fields is left out when all of them render empty, so optional parts
+    (message, value, labels, ...) need no conditionals. Fields use ``str.format`` syntax and
+    name a context key, or ``label.<name>``/``annotation.<name>`` for a single label or
+    annotation; missing fields render empty.
+    """
+
+    def __init__(self, source: str | list[str], separator: str = "\n"):
+        self.source = source
+        self.separator = separator
+        sections = [source] if isinstance(source, str) else list(source)
+        self._sections = [self._compile(section) for section in sections]
+
+    @staticmethod
+    def _compile(section: str) -> tuple[str, list[tuple[str, str | None]]]:
+        """Turn a section into a positional format string and the fields it reads, in order."""
+        literals: list[str] = []
+        fmt: list[str] = []
+        fields: list[tuple[str, str | None]] = []
+        for literal, field, spec, conversion in _FORMATTER.parse(section):
+            literals.append(literal)
+            fmt.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if conversion or not field:
+                raise ValueError(f"Unsupported template field {{{field}!{conversion}}} in {section!r}")
+            name, _, key = field.partition(".")
+            fmt.append(f"{{{len(fields)}:{spec}}}" if spec else f"{{{len(fields)}}}")
+            fields.append((name, key or None))
+        # A section without fields is kept as its literal text
+        return "".join(fmt if fields else literals), fields
+
+    def render(self, context: Mapping[str, Any]) -> str:
+        rendered = []
+        for fmt, fields in self._sections:
+            if not fields:
+                rendered.append(fmt)
+                continue
+            values = [
+                context.get(name, "") if key is None else context.get(name, {}).get(key, "") for name, key in fields
+            ]
+            if any(values):
+                rendered.append(fmt.format(*values))
+        return self.separator.join(rendered)
+
+
+def compile_templates(
+    defaults: Mapping[str, str | list[str]],
+    overrides: Mapping[str, str | list[str]] | None = None,
+    separator: str = "\n",
+) -> dict[str, Template]:
+    """Compile a channel's templates, replacing defaults with the configured overrides."""
+    unknown = set(overrides or {}) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown templates: {', '.join(sorted(unknown))}")
+    sources = {**defaults, **(overrides or {})}
+    return {name: Template(source, separator) for name, source in sources.items()}
+
+
+class RenderCache:
+    """Bounded LRU of rendered messages keyed by (fingerprint, status, channel).
+
+    Retries and repeated sends of an alert reuse its rendered output, including the encoded
+    request body. Grafana repeats firing alerts with fresh values under the same fingerprint,
+    so an entry is only reused for an alert equal to the one it was rendered from. Digests are
+    keyed by the fingerprints and statuses of all their alerts.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[Any, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, channel: str, alert: "Alert", render: Callable[["Alert"], T]) -> T:
+        if not alert.fingerprint or self._max_entries <= 0:
+            return render(alert)
+        return self._get_or_render((alert.fingerprint, alert.status, channel), alert, lambda: render(alert))
+
+    def get_or_render_batch(self, channel: str, alerts: list["Alert"], render: Callable[[list["Alert"]], T]) -> T:
+        if self._max_entries <= 0 or not all(alert.fingerprint for alert in alerts):
+            return render(alerts)
+        key = (tuple((alert.fingerprint, alert.status) for alert in alerts), channel)
+        return self._get_or_render(key, tuple(alerts), lambda: render(alerts))
+
+    def _get_or_render(self, key: tuple, source: Any, render: Callable[[], T]) -> T:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is source or entry[0] == source):
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        rendered = render()
+        with self._lock:
+            self._entries[key] = (source, rendered)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
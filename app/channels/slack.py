@@ -1,79 +1,165 @@
-from typing import Any
+import hashlib
+import json
+from typing import TYPE_CHECKING, Any
 
 import requests
 from aws_lambda_powertools import Logger
 
-from .base import Alert, BaseChannel
+from .base import Alert, BaseChannel, DeliveryError
+from .rendering import RenderCache, alert_context, compile_templates
+from .transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    JSON_HEADERS,
+    get_session,
+    post_async,
+    retry_after_seconds,
+)
+
+
+if TYPE_CHECKING:
+    import httpx
 
 
 logger = Logger(child=True)
 
+LEVEL_EMOJI = {"error": ":rotating_light:", "warning": ":warning:", "info": ":information_source:"}
+LEVEL_COLOR = {"error": "#dc3545", "warning": "#ffc107", "info": "#17a2b8"}
+
 
 class SlackChannel(BaseChannel):
-    def __init__(self, enabled: bool, webhook_url: str):
+    # Texts of the message blocks; a block whose template renders empty is left out
+    TEMPLATES = {
+        "header": "{status_emoji} {level_emoji} {title}",
+        "status": "*Status:*\n`{status_upper}`",
+        "severity": "*Severity:*\n`{level_upper}`",
+        "message": "*Message:*\n{message}",
+        "value": "*Value:* `{value_string}`",
+        "labels": "*Labels:*\n{labels}",
+        "started": "Started: {starts_at}",
+    }
+
+    def __init__(
+        self,
+        enabled: bool,
+        webhook_url: str,
+        session: requests.Session | None = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        templates: dict[str, str | list[str]] | None = None,
+        render_cache: RenderCache | None = None,
+        async_client: "httpx.AsyncClient | None" = None,
+    ):
         self._enabled = enabled
         self._webhook_url = webhook_url
+        self._session = session or get_session()
+        self._async_client = async_client
+        self._timeout = (connect_timeout, read_timeout)
+        self._templates = compile_templates(self.TEMPLATES, templates)
+        self._render_cache = render_cache if render_cache is not None else RenderCache()
+        self._cache_scope = f"{self.name}:{self.destination}"
 
     @property
     def name(self) -> str:
         return "slack"
 
+    @property
+    def destination(self) -> str:
+        # The webhook URL is a secret, so only a digest of it is used as a key
+        return hashlib.sha256(self._webhook_url.encode()).hexdigest()[:16]
+
+    @property
+    def attempt_timeout(self) -> float:
+        return sum(self._timeout)
+
     def is_enabled(self) -> bool:
         return self._enabled and bool(self._webhook_url)
 
     def send(self, alert: Alert) -> bool:
-        payload = self._build_payload(alert)
+        return self._post(self._render_cache.get_or_render(self._cache_scope, alert, self._render))
+
+    def send_batch(self, alerts: list[Alert]) -> bool:
+        if len(alerts) == 1:
+            return self.send(alerts[0])
+        return self._post(self._render_cache.get_or_render_batch(self._cache_scope, alerts, self._render_digest))
+
+    async def send_async(self, alert: Alert) -> bool:
+        return await self._post_async(self._render_cache.get_or_render(self._cache_scope, alert, self._render))
+
+    async def send_batch_async(self, alerts: list[Alert]) -> bool:
+        if len(alerts) == 1:
+            return await self.send_async(alerts[0])
+        return await self._post_async(
+            self._render_cache.get_or_render_batch(self._cache_scope, alerts, self._render_digest)
+        )
+
+    def _render(self, alert: Alert) -> bytes:
+        return self._encode(self._build_payload(alert))
+
+    def _render_digest(self, alerts: list[Alert]) -> bytes:
+        return self._encode(self._build_digest_payload(alerts))
 
+    @staticmethod
+    def _encode(payload: dict[str, Any]) -> bytes:
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+    def _post(self, body: bytes) -> bool:
         try:
-            response = requests.post(
-                self._webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=10,
+            return self._check_response(
+                self._session.post(self._webhook_url, data=body, headers=JSON_HEADERS, timeout=self._timeout)
             )
-            response.raise_for_status()
-
-            if response.text == "ok":
-                logger.info("Slack message sent successfully")
-                return True
-            else:
-                logger.error("Slack API returned unexpected response", extra={"response": response.text})
-                return False
         except requests.RequestException as e:
-            logger.error("Failed to send Slack message", extra={"error": str(e)})
+            return self._request_failed(e)
+
+    async def _post_async(self, body: bytes) -> bool:
+        try:
+            return self._check_response(await post_async(self._webhook_url, body, self._timeout, self._async_client))
+        except requests.RequestException as e:
+            return self._request_failed(e)
+
+    def _check_response(self, response: requests.Response) -> bool:
+        if response.status_code == 429:
+            raise DeliveryError("Slack rate limited", retry_after=retry_after_seconds(response))
+        response.raise_for_status()
+
+        if response.text == "ok":
+            logger.info("Slack message sent successfully")
+            return True
+        logger.error("Slack API returned unexpected response", extra={"response": response.text})
+        return False
+
+    def _request_failed(self, e: requests.RequestException) -> bool:
+        if isinstance(e, requests.HTTPError):
+            # 4xx (invalid_payload, no_service, channel_not_found, ...) will not succeed on retry
+            status_code = e.response.status_code if e.response is not None else None
+            logger.error("Slack webhook rejected message", extra={"status_code": status_code, "error": str(e)})
+            if status_code is not None and 400 <= status_code < 500:
+                raise DeliveryError(f"Slack webhook returned {status_code}", retryable=False) from e
             return False
+        if isinstance(e, requests.Timeout):
+            logger.error("Slack request timed out", extra={"error": str(e)})
+            raise DeliveryError("Slack request timed out", timed_out=True) from e
+        logger.error("Failed to send Slack message", extra={"error": str(e)})
+        return False
 
     def _build_payload(self, alert: Alert) -> dict[str, Any]:
-        status_emoji = ":red_circle:" if alert.status == "firing" else ":white_check_mark:"
-        level_emoji = {
-            "error": ":rotating_light:",
-            "warning": ":warning:",
-            "info": ":information_source:",
-        }.get(alert.level, ":bell:")
-
-        color = {"error": "#dc3545", "warning": "#ffc107", "info": "#17a2b8"}.get(alert.level, "#6c757d")
+        context = alert_context(alert)
+        context["status_emoji"] = ":red_circle:" if alert.status == "firing" else ":white_check_mark:"
+        context["level_emoji"] = LEVEL_EMOJI.get(alert.level, ":bell:")
+        context["labels"] = "\n".join(f"• `{k}`: {v}" for k, v in list(alert.labels.items())[:10])
+        text = {name: template.render(context) for name, template in self._templates.items()}
 
         blocks: list[dict[str, Any]] = [
-            {
-                "type": "header",
-                "text": {"type": "plain_text", "text": f"{status_emoji} {level_emoji} {alert.title}", "emoji": True},
-            },
+            {"type": "header", "text": {"type": "plain_text", "text": text["header"], "emoji": True}},
             {
                 "type": "section",
-                "fields": [
-                    {"type": "mrkdwn", "text": f"*Status:*\n`{alert.status.upper()}`"},
-                    {"type": "mrkdwn", "text": f"*Severity:*\n`{alert.level.upper()}`"},
-                ],
+                "fields": [{"type": "mrkdwn", "text": text[name]} for name in ("status", "severity") if text[name]],
             },
         ]
 
-        if alert.message:
-            blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": f"*Message:*\n{alert.message}"}})
-        if alert.value_string:
-            blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": f"*Value:* `{alert.value_string}`"}})
-        if alert.labels:
-            labels_text = "\n".join(f"• `{k}`: {v}" for k, v in list(alert.labels.items())[:10])
-            blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": f"*Labels:*\n{labels_text}"}})
+        for name in ("message", "value", "labels"):
+            if text[name]:
+                blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": text[name]}})
         if alert.dashboard_url:
             blocks.append(
                 {
@@ -88,12 +174,64 @@ class SlackChannel(BaseChannel):
                     ],
                 }
             )
-        if alert.starts_at:
+        if text["started"]:
+            blocks.append({"type": "context", "elements": [{"type": "mrkdwn", "text": text["started"]}]})
+
+        blocks.append({"type": "divider"})
+
+        return {"attachments": [{"color": LEVEL_COLOR.get(alert.level, "#6c757d"), "blocks": blocks}]}
+
+    def _build_digest_payload(self, alerts: list[Alert], max_lines: int = 20) -> dict[str, Any]:
+        digest = Alert.summarize(alerts)
+        firing = sum(1 for a in alerts if a.status == "firing")
+        level_emoji = LEVEL_EMOJI.get(digest.level, ":bell:")
+        color = LEVEL_COLOR.get(digest.level, "#6c757d")
+
+        lines = []
+        for alert in alerts[:max_lines]:
+            status_emoji = ":red_circle:" if alert.status == "firing" else ":white_check_mark:"
+            distinct = ", ".join(f"{k}={v}" for k, v in alert.labels.items() if k not in digest.labels)
+            line = f"{status_emoji} *{alert.title}*"
+            if distinct:
+                line += f" `{distinct}`"
+            if alert.value_string:
+                line += f" {alert.value_string}"
+            lines.append(line)
+
+        blocks: list[dict[str, Any]] = [
+            {
+                "type": "header",
+                "text": {"type": "plain_text", "text": f"{level_emoji} {digest.title}", "emoji": True},
+            },
+            {
+                "type": "section",
+                "fields": [
+                    {"type": "mrkdwn", "text": f"*Firing:*\n`{firing}`"},
+                    {"type": "mrkdwn", "text": f"*Resolved:*\n`{len(alerts) - firing}`"},
+                ],
+            },
+            # A section text is limited to 3000 characters
+            {"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(lines)[:3000]}},
+        ]
+
+        if len(alerts) > max_lines:
+            blocks.append(
+                {"type": "context", "elements": [{"type": "mrkdwn", "text": f"... and {len(alerts) - max_lines} more"}]}
+            )
+        if digest.labels:
+            labels_text = "\n".join(f"• `{k}`: {v}" for k, v in list(digest.labels.items())[:10])
+            blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": f"*Common labels:*\n{labels_text}"}})
+        if digest.dashboard_url:
             blocks.append(
                 {
-                    "type": "context",
+                    "type": "actions",
                     "elements": [
-                        {"type": "mrkdwn", "text": f"Started: {alert.starts_at.strftime('%Y-%m-%d %H:%M:%S UTC')}"}
+                        {
+                            "type": "button",
+                            "text": {"type": "plain_text", "text": "View Dashboard", "emoji": True},
+                            "url": digest.dashboard_url,
+                            "style": "primary",
+                        }
                     ],
                 }
             )
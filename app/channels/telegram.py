@@ -1,81 +1,211 @@
+import json
+from typing import TYPE_CHECKING
+
 import requests
 from aws_lambda_powertools import Logger
 
-from .base import Alert, BaseChannel
+from .base import Alert, BaseChannel, DeliveryError
+from .rendering import RenderCache, alert_context, compile_templates, escape_markdown
+from .transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    JSON_HEADERS,
+    get_session,
+    post_async,
+    retry_after_seconds,
+)
+
+
+if TYPE_CHECKING:
+    import httpx
 
 
 logger = Logger(child=True)
 
+LEVEL_EMOJI = {"error": "🚨", "warning": "⚠️", "info": "ℹ️"}
+
 
 class TelegramChannel(BaseChannel):
     TELEGRAM_API_BASE = "https://api.telegram.org/bot"
-
-    def __init__(self, enabled: bool, bot_token: str, chat_id: str):
+    # Bad request (e.g. chat not found), unauthorized bot token, bot blocked or kicked from the chat
+    FATAL_ERROR_CODES = (400, 401, 403)
+    # One line per section; title, message and label values arrive Markdown-escaped
+    TEMPLATES = {
+        "message": [
+            "{status_emoji} {level_emoji} *{title}*",
+            "",
+            "*Status:* `{status_upper}`",
+            "*Severity:* `{level_upper}`",
+            "*Message:* {message}",
+            "*Value:* `{value_string}`",
+            "*Labels:*\n{labels}",
+            "\n[View Dashboard]({dashboard_url})",
+            "\n_Started: {starts_at}_",
+        ],
+    }
+
+    def __init__(
+        self,
+        enabled: bool,
+        bot_token: str,
+        chat_id: str,
+        session: requests.Session | None = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        templates: dict[str, str | list[str]] | None = None,
+        render_cache: RenderCache | None = None,
+        async_client: "httpx.AsyncClient | None" = None,
+    ):
         self._enabled = enabled
         self._bot_token = bot_token
         self._chat_id = chat_id
+        self._session = session or get_session()
+        self._async_client = async_client
+        self._timeout = (connect_timeout, read_timeout)
+        self._templates = compile_templates(self.TEMPLATES, templates)
+        self._render_cache = render_cache if render_cache is not None else RenderCache()
+        self._cache_scope = f"{self.name}:{chat_id}"
 
     @property
     def name(self) -> str:
         return "telegram"
 
+    @property
+    def destination(self) -> str:
+        return self._chat_id
+
+    @property
+    def attempt_timeout(self) -> float:
+        return sum(self._timeout)
+
     def is_enabled(self) -> bool:
         return self._enabled and bool(self._bot_token) and bool(self._chat_id)
 
     def send(self, alert: Alert) -> bool:
-        message = self._format_message(alert)
-        url = f"{self.TELEGRAM_API_BASE}{self._bot_token}/sendMessage"
+        return self._post(self._render_cache.get_or_render(self._cache_scope, alert, self._render))
+
+    def send_batch(self, alerts: list[Alert]) -> bool:
+        if len(alerts) == 1:
+            return self.send(alerts[0])
+        return self._post(self._render_cache.get_or_render_batch(self._cache_scope, alerts, self._render_digest))
+
+    async def send_async(self, alert: Alert) -> bool:
+        return await self._post_async(self._render_cache.get_or_render(self._cache_scope, alert, self._render))
+
+    async def send_batch_async(self, alerts: list[Alert]) -> bool:
+        if len(alerts) == 1:
+            return await self.send_async(alerts[0])
+        return await self._post_async(
+            self._render_cache.get_or_render_batch(self._cache_scope, alerts, self._render_digest)
+        )
 
+    def _render(self, alert: Alert) -> bytes:
+        return self._encode(self._format_message(alert))
+
+    def _render_digest(self, alerts: list[Alert]) -> bytes:
+        return self._encode(self._format_digest(alerts))
+
+    def _encode(self, message: str) -> bytes:
         payload = {
             "chat_id": self._chat_id,
             "text": message,
             "parse_mode": "Markdown",
             "disable_web_page_preview": False,
         }
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+    @property
+    def _url(self) -> str:
+        return f"{self.TELEGRAM_API_BASE}{self._bot_token}/sendMessage"
+
+    def _post(self, body: bytes) -> bool:
+        try:
+            return self._check_response(
+                self._session.post(self._url, data=body, headers=JSON_HEADERS, timeout=self._timeout)
+            )
+        except requests.RequestException as e:
+            return self._request_failed(e)
 
+    async def _post_async(self, body: bytes) -> bool:
         try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-
-            result = response.json()
-            if result.get("ok"):
-                logger.info("Telegram message sent successfully", extra={"chat_id": self._chat_id})
-                return True
-            else:
-                logger.error("Telegram API error", extra={"description": result.get("description")})
-                return False
+            return self._check_response(await post_async(self._url, body, self._timeout, self._async_client))
         except requests.RequestException as e:
-            logger.error("Failed to send Telegram message", extra={"error": str(e)})
+            return self._request_failed(e)
+
+    def _check_response(self, response: requests.Response) -> bool:
+        if response.status_code == 429:
+            raise DeliveryError("Telegram rate limited", retry_after=self._retry_after(response))
+        response.raise_for_status()
+
+        result = response.json()
+        if result.get("ok"):
+            logger.info("Telegram message sent successfully", extra={"chat_id": self._chat_id})
+            return True
+
+        description = result.get("description")
+        logger.error("Telegram API error", extra={"description": description, "error_code": result.get("error_code")})
+        if result.get("error_code") in self.FATAL_ERROR_CODES:
+            raise DeliveryError(f"Telegram API error: {description}", retryable=False)
+        return False
+
+    def _request_failed(self, e: requests.RequestException) -> bool:
+        if isinstance(e, requests.HTTPError):
+            status_code = e.response.status_code if e.response is not None else None
+            logger.error("Telegram API rejected message", extra={"status_code": status_code, "error": str(e)})
+            if status_code in self.FATAL_ERROR_CODES:
+                raise DeliveryError(f"Telegram API returned {status_code}", retryable=False) from e
             return False
+        if isinstance(e, requests.Timeout):
+            logger.error("Telegram request timed out", extra={"error": str(e)})
+            raise DeliveryError("Telegram request timed out", timed_out=True) from e
+        logger.error("Failed to send Telegram message", extra={"error": str(e)})
+        return False
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float | None:
+        try:
+            return float(response.json()["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return retry_after_seconds(response)
 
     def _format_message(self, alert: Alert) -> str:
-        status_emoji = "🔴" if alert.status == "firing" else "✅"
-        level_emoji = {"error": "🚨", "warning": "⚠️", "info": "ℹ️"}.get(alert.level, "📢")
+        context = alert_context(alert)
+        context["title"] = escape_markdown(alert.title)
+        context["message"] = escape_markdown(alert.message)
+        context["label"] = {k: escape_markdown(v) for k, v in alert.labels.items()}
+        context["status_emoji"] = "🔴" if alert.status == "firing" else "✅"
+        context["level_emoji"] = LEVEL_EMOJI.get(alert.level, "📢")
+        context["labels"] = "\n".join(f"`{k}`: {v}" for k, v in list(context["label"].items())[:5])
+        return self._templates["message"].render(context)
+
+    def _format_digest(self, alerts: list[Alert], max_lines: int = 20) -> str:
+        digest = Alert.summarize(alerts)
+        firing = sum(1 for a in alerts if a.status == "firing")
+        level_emoji = LEVEL_EMOJI.get(digest.level, "📢")
 
         lines = [
-            f"{status_emoji} {level_emoji} *{self._escape_markdown(alert.title)}*",
+            f"{level_emoji} *{escape_markdown(digest.title)}*",
+            "",
+            f"*Firing:* `{firing}`  *Resolved:* `{len(alerts) - firing}`",
             "",
-            f"*Status:* `{alert.status.upper()}`",
-            f"*Severity:* `{alert.level.upper()}`",
         ]
 
-        if alert.message:
-            lines.append(f"*Message:* {self._escape_markdown(alert.message)}")
-        if alert.value_string:
-            lines.append(f"*Value:* `{alert.value_string}`")
-        if alert.labels:
-            labels_formatted = [f"`{k}`: {self._escape_markdown(v)}" for k, v in list(alert.labels.items())[:5]]
-            lines.append("*Labels:*\n" + "\n".join(labels_formatted))
-        if alert.dashboard_url:
-            lines.append(f"\n[View Dashboard]({alert.dashboard_url})")
-        if alert.starts_at:
-            lines.append(f"\n_Started: {alert.starts_at.strftime('%Y-%m-%d %H:%M:%S UTC')}_")
+        for alert in alerts[:max_lines]:
+            status_emoji = "🔴" if alert.status == "firing" else "✅"
+            distinct = ", ".join(f"{k}={v}" for k, v in alert.labels.items() if k not in digest.labels)
+            line = f"{status_emoji} {escape_markdown(alert.title)}"
+            if distinct:
+                line += f" `{distinct}`"
+            if alert.value_string:
+                line += f" {escape_markdown(alert.value_string)}"
+            lines.append(line)
+        if len(alerts) > max_lines:
+            lines.append(f"... and {len(alerts) - max_lines} more")
+
+        if digest.labels:
+            labels_formatted = [f"`{k}`: {escape_markdown(v)}" for k, v in list(digest.labels.items())[:5]]
+            lines.append("\n*Common labels:*\n" + "\n".join(labels_formatted))
+        if digest.dashboard_url:
+            lines.append(f"\n[View Dashboard]({digest.dashboard_url})")
 
         return "\n".join(lines)
-
-    @staticmethod
-    def _escape_markdown(text: str) -> str:
-        special_chars = ["_", "*", "[", "]", "(", ")", "~", "`", ">", "#", "+", "-", "=", "|", "{", "}", ".", "!"]
-        for char in special_chars:
-            text = text.replace(char, f"\\{char}")
-        return text
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import weakref
+from typing import TYPE_CHECKING
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+if TYPE_CHECKING:
+    import httpx
+
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10.0
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+# httpx clients are bound to the event loop they first run on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    # Retries are owned by the Router, so the adapter never retries on its own.
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Return the keep-alive session shared by every HTTP channel in this execution environment.
+
+    The session lives at module level, so warm invocations reuse its open TLS connections.
+    ``pool_size`` only applies to the call that creates it.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session(pool_size)
+    return _session
+
+
+def retry_after_seconds(response: requests.Response) -> float | None:
+    """Parse a numeric Retry-After header, as sent by Slack and Telegram on HTTP 429."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """Return the keep-alive async HTTP client of the running event loop.
+
+    The AsyncRouter keeps one loop per execution environment, so warm invocations reuse the
+    client's connections. Its connection pool is not tied to the worker pool size.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient()
+    return client
+
+
+async def post_async(
+    url: str,
+    body: bytes,
+    timeout: tuple[float, float],
+    client: "httpx.AsyncClient | None" = None,
+) -> requests.Response:
+    """POST a JSON body without blocking the event loop.
+
+    The response and errors are translated to their ``requests`` counterparts, so channels
+    handle both transports with the same code.
+    """
+    import httpx
+
+    connect_timeout, read_timeout = timeout
+    try:
+        response = await (client or get_async_client()).post(
+            url,
+            content=body,
+            headers=JSON_HEADERS,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+    except httpx.TimeoutException as e:
+        raise requests.Timeout(str(e)) from e
+    except httpx.HTTPError as e:
+        raise requests.ConnectionError(str(e)) from e
+
+    translated = requests.Response()
+    translated.status_code = response.status_code
+    translated.headers.update(response.headers)
+    translated.url = url
+    translated.reason = response.reason_phrase
+    translated.encoding = response.encoding
+    translated._content = response.content
+    return translated
@@ -0,0 +1,187 @@
+import threading
+import time
+from enum import Enum
+from typing import Any
+
+from aws_lambda_powertools import Logger
+
+from metrics import emit_event_metric
+
+
+logger = Logger(child=True)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class DynamoDBBreakerStore:
+    """Shares breaker state between concurrent Lambda instances through the AlertsTable.
+
+    Only transitions are written; reads are throttled to one per ``sync_interval`` per channel.
+    """
+
+    def __init__(self, table: Any, sync_interval: float = 5.0, ttl_seconds: int = 24 * 60 * 60):
+        self._table = table
+        self.sync_interval = sync_interval
+        self._ttl_seconds = ttl_seconds
+
+    def load(self, name: str) -> tuple[CircuitState, float] | None:
+        try:
+            item = self._table.get_item(Key={"PK": f"BREAKER#{name}", "SK": "STATE"}).get("Item")
+        except Exception as e:
+            logger.warning("Failed to load circuit breaker state", extra={"channel": name, "error": str(e)})
+            return None
+        if not item:
+            return None
+        return CircuitState(item["state"]), float(item.get("opened_at", 0))
+
+    def save(self, name: str, state: CircuitState, opened_at: float) -> None:
+        try:
+            self._table.put_item(
+                Item={
+                    "PK": f"BREAKER#{name}",
+                    "SK": "STATE",
+                    "state": state.value,
+                    "opened_at": str(opened_at),
+                    "ttl": int(time.time()) + self._ttl_seconds,
+                }
+            )
+        except Exception as e:
+            logger.warning("Failed to save circuit breaker state", extra={"channel": name, "error": str(e)})
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one channel.
+
+    After ``failure_threshold`` consecutive failed attempts the circuit opens and sends fail
+    fast. Once ``recovery_timeout`` seconds have passed a single probe is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        store: DynamoDBBreakerStore | None = None,
+    ):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._store = store
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._synced_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._sync()
+            return self._current_state()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            self._sync()
+            state = self._current_state()
+            if state == CircuitState.CLOSED:
+                return True
+            if state == CircuitState.HALF_OPEN and not self._probe_in_flight:
+                self._transition(CircuitState.HALF_OPEN)
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != CircuitState.CLOSED:
+                self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == CircuitState.HALF_OPEN or (
+                self._state == CircuitState.CLOSED and self._failures >= self._failure_threshold
+            ):
+                self._opened_at = time.time()
+                self._transition(CircuitState.OPEN)
+
+    def release_probe(self) -> None:
+        """End a half-open probe without a verdict, so the next request probes again."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _current_state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and time.time() - self._opened_at >= self._recovery_timeout:
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def _sync(self) -> None:
+        if self._store is None or time.monotonic() - self._synced_at < self._store.sync_interval:
+            return
+        self._synced_at = time.monotonic()
+
+        shared = self._store.load(self.name)
+        if shared is None:
+            return
+        state, opened_at = shared
+        # Adopt an open circuit reported by another instance; a local half-open probe keeps its own state.
+        if state == CircuitState.OPEN and self._state == CircuitState.CLOSED:
+            self._state, self._opened_at = state, opened_at
+            logger.warning("Circuit opened by another instance", extra={"channel": self.name})
+        elif state == CircuitState.CLOSED and self._state == CircuitState.OPEN:
+            self._state, self._failures = state, 0
+            logger.info("Circuit closed by another instance", extra={"channel": self.name})
+
+    def _transition(self, state: CircuitState) -> None:
+        previous, self._state = self._state, state
+        if previous == state:
+            return
+
+        if state == CircuitState.CLOSED:
+            self._failures = 0
+
+        log = logger.warning if state == CircuitState.OPEN else logger.info
+        log(
+            "Circuit breaker transition",
+            extra={"channel": self.name, "from_state": previous.value, "to_state": state.value},
+        )
+        emit_event_metric("CircuitBreakerTransition", {"channel": self.name, "state": state.value})
+
+        if self._store is not None and state != CircuitState.HALF_OPEN:
+            self._store.save(self.name, state, self._opened_at)
+
+
+class CircuitBreakerRegistry:
+    """Breakers by channel name; lives for the whole execution environment."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        store: DynamoDBBreakerStore | None = None,
+    ):
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._store = store
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=self._failure_threshold,
+                    recovery_timeout=self._recovery_timeout,
+                    store=self._store,
+                )
+            return self._breakers[name]
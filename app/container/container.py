@@ -1,41 +1,244 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from dependency_injector import containers, providers
 
-from channels import AWSConnectChannel, SlackChannel, TelegramChannel
-from router import Router
+from aggregation import AlertAggregator, InProcessDigestBuffer, SQSDigestBuffer
+from channels import LazyChannel, deferred
+from channels.rendering import RenderCache
+from circuit_breaker import CircuitBreakerRegistry, DynamoDBBreakerStore
+from history import AlertHistory
+from idempotency import DeliveryDeduplicator, EscalationClaims
+from metrics import DeliveryMetrics
+from rate_limit import DynamoDBRateCounter, RateLimiter
+from retry import RetryPolicy
+from router import AsyncRouter, Router
+from routing_tree import RoutingTree
 
 
 class Container(containers.DeclarativeContainer):
     config = providers.Configuration(yaml_files=["./config.yaml"])
 
+    # boto3, the channel modules and their clients are imported and built on first use
+    # rather than when the execution environment starts.
+    dynamodb = providers.Singleton(deferred("boto3", "resource"), "dynamodb")
+
+    stepfunctions = providers.Singleton(deferred("boto3", "client"), "stepfunctions")
+
+    alerts_table = providers.Singleton(dynamodb.provided.Table.call(config.alerts_table_name))
+
+    http_session = providers.Singleton(
+        deferred("channels.transport", "get_session"),
+        pool_size=config.delivery.max_workers.as_int(),
+    )
+
+    render_cache = providers.Singleton(RenderCache, max_entries=config.rendering.cache_size.as_int())
+
     telegram_channel = providers.Singleton(
-        TelegramChannel,
+        LazyChannel,
+        name="telegram",
         enabled=config.channels.telegram.enabled.as_(lambda x: str(x).lower() == "true"),
-        bot_token=config.channels.telegram.bot_token,
-        chat_id=config.channels.telegram.chat_id,
+        factory=providers.Singleton(
+            deferred("channels.telegram", "TelegramChannel"),
+            enabled=config.channels.telegram.enabled.as_(lambda x: str(x).lower() == "true"),
+            bot_token=config.channels.telegram.bot_token,
+            chat_id=config.channels.telegram.chat_id,
+            session=http_session,
+            connect_timeout=config.channels.telegram.connect_timeout.as_float(),
+            read_timeout=config.channels.telegram.read_timeout.as_float(),
+            templates=config.channels.telegram.templates,
+            render_cache=render_cache,
+        ).provider,
     )
 
     slack_channel = providers.Singleton(
-        SlackChannel,
+        LazyChannel,
+        name="slack",
         enabled=config.channels.slack.enabled.as_(lambda x: str(x).lower() == "true"),
-        webhook_url=config.channels.slack.webhook_url,
+        factory=providers.Singleton(
+            deferred("channels.slack", "SlackChannel"),
+            enabled=config.channels.slack.enabled.as_(lambda x: str(x).lower() == "true"),
+            webhook_url=config.channels.slack.webhook_url,
+            session=http_session,
+            connect_timeout=config.channels.slack.connect_timeout.as_float(),
+            read_timeout=config.channels.slack.read_timeout.as_float(),
+            templates=config.channels.slack.templates,
+            render_cache=render_cache,
+        ).provider,
     )
 
     aws_connect_channel = providers.Singleton(
-        AWSConnectChannel,
+        LazyChannel,
+        name="aws_connect",
         enabled=config.channels.aws_connect.enabled.as_(lambda x: str(x).lower() == "true"),
-        instance_id=config.channels.aws_connect.instance_id,
-        contact_flow_id=config.channels.aws_connect.contact_flow_id,
-        source_phone_number=config.channels.aws_connect.source_phone_number,
-        destination_phone_number=config.channels.aws_connect.destination_phone_number,
+        factory=providers.Singleton(
+            deferred("channels.aws_connect", "AWSConnectChannel"),
+            enabled=config.channels.aws_connect.enabled.as_(lambda x: str(x).lower() == "true"),
+            instance_id=config.channels.aws_connect.instance_id,
+            contact_flow_id=config.channels.aws_connect.contact_flow_id,
+            source_phone_number=config.channels.aws_connect.source_phone_number,
+            destination_phone_number=config.channels.aws_connect.destination_phone_number,
+            templates=config.channels.aws_connect.templates,
+            render_cache=render_cache,
+        ).provider,
+    )
+
+    channels = providers.List(
+        telegram_channel,
+        slack_channel,
+        aws_connect_channel,
+    )
+
+    executor = providers.Singleton(
+        ThreadPoolExecutor,
+        max_workers=config.delivery.max_workers.as_int(),
+    )
+
+    retry_policy = providers.Singleton(
+        RetryPolicy,
+        max_attempts=config.retry.max_attempts.as_int(),
+        base_delay=config.retry.base_delay.as_float(),
+        max_delay=config.retry.max_delay.as_float(),
+        max_retry_after=config.retry.max_retry_after.as_float(),
+        attempt_budget=config.retry.attempt_budget.as_float(),
+    )
+
+    circuit_breakers = providers.Selector(
+        config.circuit_breaker.enabled.as_(lambda x: str(x).lower()),
+        true=providers.Singleton(
+            CircuitBreakerRegistry,
+            failure_threshold=config.circuit_breaker.failure_threshold.as_int(),
+            recovery_timeout=config.circuit_breaker.recovery_timeout.as_float(),
+            store=providers.Selector(
+                config.circuit_breaker.shared_state.as_(lambda x: str(x).lower()),
+                true=providers.Singleton(DynamoDBBreakerStore, table=alerts_table),
+                false=providers.Object(None),
+            ),
+        ),
+        false=providers.Object(None),
     )
 
-    router = providers.Singleton(
-        Router,
-        channels=providers.List(
-            telegram_channel,
-            slack_channel,
-            aws_connect_channel,
+    rate_limiter = providers.Selector(
+        config.rate_limits.enabled.as_(lambda x: str(x).lower()),
+        true=providers.Singleton(
+            RateLimiter.from_config,
+            config.rate_limits.channels,
+            counter=providers.Selector(
+                config.rate_limits.shared_state.as_(lambda x: str(x).lower()),
+                true=providers.Singleton(DynamoDBRateCounter, table=alerts_table),
+                false=providers.Object(None),
+            ),
+        ),
+        false=providers.Object(None),
+    )
+
+    deduplicator = providers.Selector(
+        config.idempotency.enabled.as_(lambda x: str(x).lower()),
+        true=providers.Singleton(
+            DeliveryDeduplicator,
+            table=providers.Selector(
+                config.idempotency.shared_state.as_(lambda x: str(x).lower()),
+                true=alerts_table,
+                false=providers.Object(None),
+            ),
+            window_seconds=config.idempotency.window_seconds.as_int(),
+            max_entries=config.idempotency.max_cached.as_int(),
+            executor=executor,
+        ),
+        false=providers.Object(None),
+    )
+
+    escalation_claims = providers.Selector(
+        config.escalation.idempotent.as_(lambda x: str(x).lower()),
+        true=providers.Singleton(
+            EscalationClaims,
+            table=alerts_table,
+            lease_seconds=config.escalation.lease_seconds.as_int(),
+        ),
+        false=providers.Object(None),
+    )
+
+    aggregator = providers.Singleton(
+        AlertAggregator,
+        group_by=config.aggregation.group_by,
+        max_group_size=config.aggregation.max_group_size.as_int(),
+    )
+
+    digest_buffer = providers.Selector(
+        config.aggregation.mode,
+        none=providers.Object(None),
+        batch=providers.Singleton(InProcessDigestBuffer, aggregator=aggregator),
+        queue=providers.Singleton(
+            SQSDigestBuffer,
+            sqs_client=providers.Singleton(deferred("boto3", "client"), "sqs"),
+            queue_url=config.aggregation.queue_url,
+        ),
+    )
+
+    alert_history = providers.Selector(
+        config.history.enabled.as_(lambda x: str(x).lower()),
+        true=providers.Singleton(AlertHistory, table=alerts_table, ttl_days=config.history.ttl_days.as_int()),
+        false=providers.Object(None),
+    )
+
+    delivery_metrics = providers.Selector(
+        config.metrics.delivery.as_(lambda x: str(x).lower()),
+        true=providers.Singleton(DeliveryMetrics),
+        false=providers.Object(None),
+    )
+
+    # Told about every finished channel send
+    send_listeners = providers.List(alert_history, delivery_metrics)
+
+    routing_tree = providers.Selector(
+        config.routing_tree.enabled.as_(lambda x: str(x).lower()),
+        true=providers.Singleton(RoutingTree.from_config, config.routing_tree),
+        false=providers.Object(None),
+    )
+
+    router = providers.Selector(
+        config.delivery.engine,
+        thread=providers.Singleton(
+            Router,
+            channels=channels,
+            routing_config=config.routing,
+            default_level=config.default_level,
+            max_workers=config.delivery.max_workers.as_int(),
+            batch_groups=config.delivery.batch_groups.as_(lambda x: str(x).lower() == "true"),
+            retry_policy=retry_policy,
+            breakers=circuit_breakers,
+            fallbacks=config.circuit_breaker.fallbacks,
+            rate_limiter=rate_limiter,
+            routing_tree=routing_tree,
+            listeners=send_listeners,
+        ),
+        pool=providers.Singleton(
+            Router,
+            channels=channels,
+            routing_config=config.routing,
+            default_level=config.default_level,
+            max_workers=config.delivery.max_workers.as_int(),
+            batch_groups=config.delivery.batch_groups.as_(lambda x: str(x).lower() == "true"),
+            executor=executor,
+            retry_policy=retry_policy,
+            breakers=circuit_breakers,
+            fallbacks=config.circuit_breaker.fallbacks,
+            rate_limiter=rate_limiter,
+            routing_tree=routing_tree,
+            listeners=send_listeners,
+        ),
+        asyncio=providers.Singleton(
+            AsyncRouter,
+            channels=channels,
+            routing_config=config.routing,
+            default_level=config.default_level,
+            max_workers=config.delivery.max_workers.as_int(),
+            batch_groups=config.delivery.batch_groups.as_(lambda x: str(x).lower() == "true"),
+            executor=executor,
+            retry_policy=retry_policy,
+            breakers=circuit_breakers,
+            fallbacks=config.circuit_breaker.fallbacks,
+            rate_limiter=rate_limiter,
+            routing_tree=routing_tree,
+            listeners=send_listeners,
         ),
-        routing_config=config.routing,
-        default_level=config.default_level,
     )
@@ -0,0 +1,65 @@
+import json
+
+from aws_lambda_powertools import Logger, Tracer
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from pydantic import ValidationError
+
+from channels.base import Alert
+from container import Container
+from profiling import profiled
+from retry import Deadline
+
+
+logger = Logger()
+tracer = Tracer()
+
+container = Container()
+
+
+@logger.inject_lambda_context
+@tracer.capture_lambda_handler
+@profiled
+def lambda_handler(event: dict, context: LambdaContext) -> dict:
+    """Deliver the alerts queued during one aggregation window as digests.
+
+    The event source's batching window is the aggregation window. Messages of a digest that
+    was not delivered to every channel are reported back as failures so SQS redelivers them.
+    """
+    deadline = Deadline.from_context(context)
+
+    alerts: list[Alert] = []
+    message_ids: dict[int, str] = {}
+    for record in event.get("Records", []):
+        try:
+            alert = Alert.model_validate_json(record["body"])
+        except ValidationError as e:
+            logger.error(
+                "Dropping malformed digest message", extra={"message_id": record.get("messageId"), "error": str(e)}
+            )
+            continue
+        alerts.append(alert)
+        message_ids[id(alert)] = record["messageId"]
+
+    groups = container.aggregator().group(alerts)
+    results = container.router().route_all(groups, deadline) if groups else []
+
+    history = container.alert_history()
+    if history is not None:
+        for group in groups:
+            history.track(group)
+        history.flush(getattr(context, "aws_request_id", ""))
+    delivery_metrics = container.delivery_metrics()
+    if delivery_metrics is not None:
+        delivery_metrics.flush()
+
+    failures = []
+    for group, channel_results in zip(groups, results):
+        digest = Alert.summarize(group)
+        logger.info(
+            "Delivered digest",
+            extra={"title": digest.title, "alert_count": len(group), "channel_results": json.dumps(channel_results)},
+        )
+        if not all(channel_results.values()):
+            failures.extend({"itemIdentifier": message_ids[id(alert)]} for alert in group)
+
+    return {"batchItemFailures": failures}
@@ -1,17 +1,81 @@
+import json
 import os
+from datetime import datetime
 
 import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from profiling import profiled
+
 logger = Logger()
 tracer = Tracer()
 
 connect = boto3.client("connect")
+stepfunctions = boto3.client("stepfunctions")
+dynamodb = boto3.resource("dynamodb")
+table = dynamodb.Table(os.environ.get("ALERTS_TABLE_NAME", "alerts"))
+
+
+def store_task_token(alert_id: str, task_token: str, current_level: int) -> bool:
+    """
+    Attaches the callback token of the waiting state to the alert, so the ACK handler can end the wait.
+
+    Tokens are kept in a set: with parallel paging every call of a step waits on its own token.
+    Returns False when the alert was acknowledged in the meantime.
+    """
+    try:
+        table.update_item(
+            Key={"PK": f"ALERT#{alert_id}", "SK": "METADATA"},
+            UpdateExpression="ADD task_tokens :tokens SET task_token_level = :level, updated_at = :updated_at",
+            ConditionExpression="attribute_exists(PK) AND #status <> :acked",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={
+                ":tokens": {task_token},
+                ":level": current_level,
+                ":acked": "acked",
+                ":updated_at": datetime.utcnow().isoformat(),
+            },
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+        return True
+    except table.meta.client.exceptions.ConditionalCheckFailedException as e:
+        item = e.response.get("Item")
+        if item and item.get("status", {}).get("S") == "acked":
+            return False
+        logger.warning("Alert not found, the call cannot be acknowledged", alert_id=alert_id)
+        return True
+
+
+def record_contact(alert_id: str, contact_id: str) -> None:
+    """
+    Registers a placed call with the alert so the ACK handler can hang it up on the first ACK.
+
+    If the alert was acknowledged while the call was being placed, the call is stopped here.
+    """
+    try:
+        table.update_item(
+            Key={"PK": f"ALERT#{alert_id}", "SK": "METADATA"},
+            UpdateExpression="ADD contact_ids :contact_ids",
+            ConditionExpression="attribute_exists(PK) AND #status <> :acked",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={":contact_ids": {contact_id}, ":acked": "acked"},
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException as e:
+        item = e.response.get("Item")
+        if not item or item.get("status", {}).get("S") != "acked":
+            return
+        logger.info("Alert acknowledged while calling, stopping the call", alert_id=alert_id, contact_id=contact_id)
+        try:
+            connect.stop_contact(ContactId=contact_id, InstanceId=os.environ["AWS_CONNECT_INSTANCE_ID"])
+        except Exception:
+            logger.warning("Failed to stop call", contact_id=contact_id)
 
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@profiled
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """
     Makes AWS Connect outbound call to on-call person.
@@ -21,6 +85,11 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
       - alert_title: Alert title
       - phone_number: Destination phone number
       - current_level: Current escalation level
+      - task_token: Callback token of the waiting state (callback state machine only)
+
+    With a task token, the state machine waits until the ACK handler returns the token, the
+    heartbeat times out, or the call fails (reported as CallFailed). The call is recorded with
+    the alert, so an ACK on a parallel call ends the others.
 
     Output:
       - contact_id: AWS Connect contact ID
@@ -32,6 +101,16 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
     alert_title = event.get("alert_title", "Alert")
     phone_number = event["phone_number"]
     current_level = event.get("current_level", 1)
+    task_token = event.get("task_token")
+
+    if task_token and not store_task_token(alert_id, task_token, current_level):
+        logger.info("Alert already acknowledged, skipping call", alert_id=alert_id)
+        stepfunctions.send_task_success(taskToken=task_token, output=json.dumps({"is_acked": True, "status": "acked"}))
+        return {
+            "contact_id": None,
+            "call_status": "skipped",
+            "phone_number": phone_number,
+        }
 
     instance_id = os.environ["AWS_CONNECT_INSTANCE_ID"]
     contact_flow_id = os.environ["AWS_CONNECT_CONTACT_FLOW_ID"]
@@ -52,6 +131,8 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
 
         contact_id = response["ContactId"]
         logger.info("Call initiated", contact_id=contact_id, phone_number=phone_number)
+        if task_token:
+            record_contact(alert_id, contact_id)
 
         return {
             "contact_id": contact_id,
@@ -61,6 +142,9 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
 
     except Exception as e:
         logger.exception("Failed to initiate call")
+        if task_token:
+            # Escalate right away instead of waiting out the heartbeat for a call that never rang
+            stepfunctions.send_task_failure(taskToken=task_token, error="CallFailed", cause=str(e)[:256])
         return {
             "contact_id": None,
             "call_status": "failed",
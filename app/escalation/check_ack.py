@@ -5,6 +5,8 @@ import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from profiling import profiled
+
 logger = Logger()
 tracer = Tracer()
 
@@ -14,6 +16,7 @@ table = dynamodb.Table(os.environ.get("ALERTS_TABLE_NAME", "alerts"))
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@profiled
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """
     Checks if alert has been acknowledged.
@@ -5,6 +5,8 @@ import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from profiling import profiled
+
 logger = Logger()
 tracer = Tracer()
 
@@ -14,6 +16,7 @@ table = dynamodb.Table(os.environ.get("ALERTS_TABLE_NAME", "alerts"))
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@profiled
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """
     Escalates alert to next level.
@@ -40,7 +43,9 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
     if should_continue:
         table.update_item(
             Key={"PK": f"ALERT#{alert_id}", "SK": "METADATA"},
-            UpdateExpression="SET current_level = :level, updated_at = :updated_at",
+            # The previous step's calls are over; their tokens and contacts must not be resumed
+            # or stopped by a later ACK
+            UpdateExpression="SET current_level = :level, updated_at = :updated_at REMOVE task_tokens, contact_ids",
             ExpressionAttributeValues={
                 ":level": new_level,
                 ":updated_at": datetime.utcnow().isoformat(),
@@ -48,6 +53,22 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
         )
         logger.info("Alert escalated", alert_id=alert_id, new_level=new_level)
     else:
+        # Lets the next firing of this alert escalate without waiting out the broadcaster's lease;
+        # the last step's tokens and contacts are dropped like on any other step
+        try:
+            table.update_item(
+                Key={"PK": f"ALERT#{alert_id}", "SK": "METADATA"},
+                UpdateExpression="SET #status = :status, updated_at = :updated_at REMOVE task_tokens, contact_ids",
+                ConditionExpression="#status = :pending",
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={
+                    ":status": "exhausted",
+                    ":pending": "pending",
+                    ":updated_at": datetime.utcnow().isoformat(),
+                },
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            logger.info("Alert acknowledged before exhaustion", alert_id=alert_id)
         logger.warning("Max escalation level reached", alert_id=alert_id, max_level=max_level)
 
     return {
@@ -7,6 +7,8 @@ import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from profiling import profiled
+
 logger = Logger()
 tracer = Tracer()
 
@@ -16,9 +18,31 @@ table = dynamodb.Table(os.environ.get("ALERTS_TABLE_NAME", "alerts"))
 # TTL: 24 hours
 TTL_SECONDS = 24 * 60 * 60
 
+# Escalation steps for parallel paging: ";" separates steps, "," joins levels that are paged
+# together and "all" pages every roster member, e.g. "1,2;all"
+DEFAULT_POLICY = os.environ.get("ESCALATION_POLICY", "1;2;3")
+
+
+def parse_policy(policy: str) -> list[list]:
+    """Parses an escalation policy into steps of levels ("all" is kept as is)."""
+    steps = []
+    for step in policy.split(";"):
+        group = []
+        for entry in step.split(","):
+            entry = entry.strip().lower()
+            if entry == "all":
+                group.append(entry)
+            elif entry.isdigit() and int(entry) > 0:
+                group.append(int(entry))
+            else:
+                raise ValueError(f"Invalid escalation policy entry: {entry!r}")
+        steps.append(group)
+    return steps
+
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@profiled
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """
     Starts escalation by creating alert record in DynamoDB.
@@ -28,11 +52,13 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
       - alert_description: Alert description
       - severity: Alert severity
       - fingerprint: Alert fingerprint (used as alert_id)
+      - policy: Escalation policy, overrides ESCALATION_POLICY (optional)
 
     Output:
       - alert_id: Created alert ID
       - status: Alert status (pending)
       - current_level: Current escalation level (1)
+      - policy, step_count: Parsed escalation policy and its number of steps
     """
     logger.info("Starting escalation", event=event)
 
@@ -40,27 +66,39 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
     now = datetime.utcnow().isoformat()
     ttl = int(time.time()) + TTL_SECONDS
 
-    item = {
-        "PK": f"ALERT#{alert_id}",
-        "SK": "METADATA",
-        "alert_id": alert_id,
-        "status": "pending",
-        "current_level": 1,
-        "alert_title": event.get("alert_title", "Unknown Alert"),
-        "alert_description": event.get("alert_description", ""),
-        "severity": event.get("severity", "critical"),
-        "created_at": now,
-        "updated_at": now,
-        "ttl": ttl,
-    }
+    alert_title = event.get("alert_title", "Unknown Alert")
+    alert_description = event.get("alert_description", "")
+    policy = parse_policy(event.get("policy") or DEFAULT_POLICY)
 
-    table.put_item(Item=item)
+    # An update rather than a put: the broadcaster's escalation claim (start time, lease, execution
+    # ARN) lives on the same item and may be written while this runs
+    table.update_item(
+        Key={"PK": f"ALERT#{alert_id}", "SK": "METADATA"},
+        UpdateExpression=(
+            "SET alert_id = :alert_id, #status = :status, current_level = :level, alert_title = :title, "
+            "alert_description = :description, severity = :severity, "
+            "created_at = if_not_exists(created_at, :now), updated_at = :now, #ttl = :ttl"
+        ),
+        ExpressionAttributeNames={"#status": "status", "#ttl": "ttl"},
+        ExpressionAttributeValues={
+            ":alert_id": alert_id,
+            ":status": "pending",
+            ":level": 1,
+            ":title": alert_title,
+            ":description": alert_description,
+            ":severity": event.get("severity", "critical"),
+            ":now": now,
+            ":ttl": ttl,
+        },
+    )
     logger.info("Alert record created", alert_id=alert_id)
 
     return {
         "alert_id": alert_id,
         "status": "pending",
         "current_level": 1,
-        "alert_title": item["alert_title"],
-        "alert_description": item["alert_description"],
+        "alert_title": alert_title,
+        "alert_description": alert_description,
+        "policy": policy,
+        "step_count": len(policy),
     }
@@ -1,19 +1,27 @@
 import json
 import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
 from channels.base import Alert
 from container import Container
+from profiling import profiled
+from retry import Deadline
+from serialization import BoundedJSON, JSONDecodeError, loads
+
+
+if TYPE_CHECKING:
+    from history import AlertHistory
+    from metrics import DeliveryMetrics
 
 
 logger = Logger()
 tracer = Tracer()
 
 container = Container()
-sfn_client = boto3.client("stepfunctions")
 
 
 def should_escalate(alert: Alert) -> bool:
@@ -34,90 +42,201 @@ def start_escalation(alert: Alert) -> dict | None:
 
     input_data = {
         "alert_title": alert.title,
-        "alert_description": alert.description,
+        "alert_description": alert.message,
         "severity": alert.level,
         "fingerprint": alert.fingerprint,
     }
 
+    claims = container.escalation_claims()
+    if claims is not None:
+        claim = claims.claim(alert)
+        if not claim.acquired:
+            logger.info("Escalation already active", fingerprint=alert.fingerprint, execution_arn=claim.execution_arn)
+            return {"execution_arn": claim.execution_arn, "reused": True}
+
     try:
-        response = sfn_client.start_execution(
+        response = container.stepfunctions().start_execution(
             stateMachineArn=state_machine_arn,
             name=f"alert-{alert.fingerprint[:50]}-{int(__import__('time').time())}",
             input=json.dumps(input_data),
         )
-        logger.info("Escalation started", execution_arn=response["executionArn"])
-        return {"execution_arn": response["executionArn"]}
     except Exception as e:
         logger.exception("Failed to start escalation")
+        if claims is not None:
+            claims.release(alert)
         return {"error": str(e)}
 
+    logger.info("Escalation started", execution_arn=response["executionArn"])
+    if claims is not None:
+        claims.record_execution(alert, response["executionArn"])
+    return {"execution_arn": response["executionArn"]}
+
+
+def parse_message(message: str) -> dict:
+    try:
+        return loads(message)
+    except JSONDecodeError as e:
+        logger.error("Failed to parse message as JSON", extra={"error": str(e)})
+        return {"message": message, "title": "Alert"}
+
 
 def parse_sns_event(event: dict) -> list[dict]:
-    payloads = []
+    return [
+        parse_message(record.get("Sns", {}).get("Message", "{}"))
+        for record in event.get("Records", [])
+        if record.get("EventSource") == "aws:sns"
+    ]
+
+
+@dataclass
+class ProcessedPayloads:
+    results: list[dict]
+    duplicates: int
+    # Indexes of the payloads with an alert in a group that was not delivered to every channel
+    failed: set[int] = field(default_factory=set)
+    # The alerts of those groups
+    undelivered: list[Alert] = field(default_factory=list)
+
+
+def process_payloads(payloads: list[dict], deadline: Deadline, history: "AlertHistory | None") -> ProcessedPayloads:
+    """Deduplicate, escalate and route the alerts of Grafana notification payloads.
+
+    If processing fails, the delivery claims it took are released, so a redelivered or repeated
+    notification sends the alerts again instead of dropping them as duplicates.
+    """
+    claimed: list[Alert] = []
+    try:
+        return _process_payloads(payloads, deadline, history, claimed)
+    except Exception:
+        deduplicator = container.deduplicator()
+        if deduplicator is not None and claimed:
+            deduplicator.release(claimed)
+        raise
 
-    for record in event.get("Records", []):
-        if record.get("EventSource") != "aws:sns":
-            continue
 
-        sns_message = record.get("Sns", {}).get("Message", "{}")
+def _process_payloads(
+    payloads: list[dict], deadline: Deadline, history: "AlertHistory | None", claimed: list[Alert]
+) -> ProcessedPayloads:
+    router = container.router()
+    deduplicator = container.deduplicator()
+    digest_buffer = container.digest_buffer()
+
+    groups = []
+    origins: dict[int, int] = {}
+    duplicates = 0
+    for index, payload in enumerate(payloads):
+        logger.info("Processing payload", extra={"payload": BoundedJSON(payload, 500)})
+
+        alerts = Alert.from_grafana_group(payload)
+        if deduplicator is not None:
+            fresh = deduplicator.filter(alerts)
+            claimed.extend(fresh)
+            duplicates += len(alerts) - len(fresh)
+            if history is not None and len(fresh) < len(alerts):
+                kept = {id(alert) for alert in fresh}
+                history.track([alert for alert in alerts if id(alert) not in kept], "duplicate")
+            alerts = fresh
+        if alerts:
+            groups.append(alerts)
+            origins.update((id(alert), index) for alert in alerts)
+
+    # Escalation starts are submitted before routing so they run alongside the channel sends;
+    # they never wait for an aggregation window.
+    escalation_futures = {}
+    for alerts in groups:
+        for alert in alerts:
+            if should_escalate(alert):
+                logger.info("Triggering escalation", alert_title=alert.title, level=alert.level)
+                escalation_futures[id(alert)] = router.submit(start_escalation, alert)
+
+    routed_groups = groups
+    queued_groups = []
+    if digest_buffer is not None:
+        for alerts in groups:
+            digest_buffer.add(alerts)
+        routed_groups = digest_buffer.drain()
+        if digest_buffer.deferred:
+            # A deferred buffer returns only the alerts it failed to queue, to be delivered now
+            routed = {id(alert) for alerts in routed_groups for alert in alerts}
+            queued_groups = [
+                queued for alerts in groups if (queued := [alert for alert in alerts if id(alert) not in routed])
+            ]
+
+    if history is not None:
+        for alerts in routed_groups:
+            history.track(alerts)
+        for alerts in queued_groups:
+            history.track(alerts, "queued")
+
+    processed = ProcessedPayloads(results=[], duplicates=duplicates)
+
+    group_results = list(zip(routed_groups, router.route_all(routed_groups, deadline)))
+    group_results += [(alerts, None) for alerts in queued_groups]
+    for alerts, results in group_results:
+        group = Alert.summarize(alerts)
+        logger.info(
+            "Routed alerts" if results is not None else "Queued alerts for digest",
+            extra={"title": group.title, "level": group.level, "status": group.status, "alert_count": len(alerts)},
+        )
+
+        result = {
+            "alert_title": group.title,
+            "level": group.level,
+            "status": group.status,
+            "alert_count": len(alerts),
+            "channel_results": results or {},
+            "escalations": [
+                escalation_futures[id(alert)].result() for alert in alerts if id(alert) in escalation_futures
+            ],
+        }
+        # Single-alert responses carried one "escalation" result; kept for existing consumers
+        result["escalation"] = result["escalations"][0] if result["escalations"] else None
+        if results is None:
+            result["queued"] = True
+        processed.results.append(result)
+
+        if results and not all(results.values()):
+            processed.failed.update(origins[id(alert)] for alert in alerts if id(alert) in origins)
+            processed.undelivered.extend(alerts)
 
-        try:
-            payload = json.loads(sns_message)
-            payloads.append(payload)
-        except json.JSONDecodeError as e:
-            logger.error("Failed to parse SNS message as JSON", extra={"error": str(e)})
-            payloads.append({"message": sns_message, "title": "Alert"})
+    return processed
 
-    return payloads
+
+def flush(history: "AlertHistory | None", delivery_metrics: "DeliveryMetrics | None", context: LambdaContext) -> None:
+    # The sends are done by now; these writes only delay the invocation's return
+    if history is not None:
+        history.flush(getattr(context, "aws_request_id", ""))
+    if delivery_metrics is not None:
+        delivery_metrics.flush()
 
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@profiled
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
-    logger.info("Received event", extra={"event": json.dumps(event)[:1000]})
+    logger.info("Received event", extra={"event": BoundedJSON(event, 1000)})
 
+    history = delivery_metrics = None
     try:
-        router = container.router()
+        deadline = Deadline.from_context(context)
+        history = container.alert_history()
+        delivery_metrics = container.delivery_metrics()
         payloads = parse_sns_event(event)
 
         if not payloads:
             logger.warning("No valid payloads found in event")
             return {"statusCode": 200, "body": json.dumps({"message": "No payloads to process"})}
 
-        all_results = []
-
-        for payload in payloads:
-            logger.info("Processing payload", extra={"payload": json.dumps(payload)[:500]})
-
-            alert = Alert.from_grafana_payload(payload)
-            logger.info("Parsed alert", extra={"title": alert.title, "level": alert.level, "status": alert.status})
-
-            results = router.route(alert)
-
-            # Check if escalation should be triggered
-            escalation_result = None
-            if should_escalate(alert):
-                logger.info("Triggering escalation", alert_title=alert.title, level=alert.level)
-                escalation_result = start_escalation(alert)
-
-            all_results.append(
-                {
-                    "alert_title": alert.title,
-                    "level": alert.level,
-                    "status": alert.status,
-                    "channel_results": results,
-                    "escalation": escalation_result,
-                }
-            )
-
-        all_successful = all(all(r["channel_results"].values()) for r in all_results if r["channel_results"])
+        processed = process_payloads(payloads, deadline, history)
+        all_successful = not processed.failed
 
         return {
             "statusCode": 200 if all_successful else 207,
             "body": json.dumps(
                 {
                     "message": "Processed" if all_successful else "Partially processed",
-                    "results": all_results,
+                    "results": processed.results,
+                    "duplicates_dropped": processed.duplicates,
                 }
             ),
         }
@@ -125,3 +244,51 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
     except Exception as e:
         logger.exception("Error processing event")
         return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+    finally:
+        flush(history, delivery_metrics, context)
+
+
+@logger.inject_lambda_context
+@tracer.capture_lambda_handler
+@profiled
+def sqs_handler(event: dict, context: LambdaContext) -> dict:
+    """Process a batch of notifications from the ingest queue (raw SNS deliveries).
+
+    Records with an alert that was not delivered to every channel are reported back as
+    failures, so SQS redelivers only those. The delivery claims of the undelivered alerts are
+    released and their history records marked ``retrying``; on redelivery the record's
+    delivered alerts are dropped as duplicates and the rest are sent again.
+    """
+    records = event.get("Records", [])
+    logger.info("Received batch", extra={"records": len(records)})
+
+    history = delivery_metrics = None
+    try:
+        deadline = Deadline.from_context(context)
+        history = container.alert_history()
+        delivery_metrics = container.delivery_metrics()
+
+        processed = process_payloads([parse_message(record["body"]) for record in records], deadline, history)
+
+        deduplicator = container.deduplicator()
+        if deduplicator is not None and processed.undelivered:
+            deduplicator.release(processed.undelivered)
+        if history is not None and processed.undelivered:
+            history.mark_retrying(processed.undelivered)
+        failed = sorted(processed.failed)
+        logger.info(
+            "Processed batch",
+            extra={"records": len(records), "failed": len(failed), "duplicates_dropped": processed.duplicates},
+        )
+
+    except Exception:
+        logger.exception("Error processing batch")
+        failed = range(len(records))
+        if history is not None:
+            history.mark_retrying()
+
+    finally:
+        flush(history, delivery_metrics, context)
+
+    return {"batchItemFailures": [{"itemIdentifier": records[index]["messageId"]} for index in failed]}
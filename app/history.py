@@ -0,0 +1,165 @@
+import heapq
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
+
+from aws_lambda_powertools import Logger
+
+from channels.base import Alert
+from router import SendOutcome
+
+
+logger = Logger(child=True)
+
+HISTORY_INDEX = "DayBucketIndex"
+# Each day's records are spread over this many GSI partitions
+DAY_BUCKET_SHARDS = 8
+# UTC with microseconds, so timestamps sort and compare as strings
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+class AlertHistory:
+    """Records every received alert with the outcome of each channel send in the alerts table.
+
+    Nothing is written while sends are in flight: the router reports each finished send through
+    ``on_send`` and the records are buffered until ``flush``, which writes them with
+    BatchWriteItem once the invocation's sends are done.
+
+    A record is keyed ``HISTORY#<fingerprint>`` / ``<received_at>#<request id>#<n>``; the
+    ``DayBucketIndex`` GSI (``day_bucket`` = ``<UTC date>#<shard>``, ``received_at``) serves
+    time-range queries. The shard follows from the sort key, so a busy day's writes spread over
+    ``DAY_BUCKET_SHARDS`` partitions instead of one.
+    """
+
+    def __init__(self, table: Any, ttl_days: int = 30):
+        self._table = table
+        self._ttl_seconds = ttl_days * 24 * 60 * 60
+        self._alerts: list[tuple[Alert, str | None]] = []
+        self._outcomes: list[SendOutcome] = []
+        self._lock = threading.Lock()
+
+    def track(self, alerts: list[Alert], disposition: str | None = None) -> None:
+        """Add received alerts to the next flush; without a disposition it follows from their sends."""
+        with self._lock:
+            self._alerts.extend((alert, disposition) for alert in alerts)
+
+    def mark_retrying(self, alerts: list[Alert] | None = None) -> None:
+        """Record tracked alerts (all by default) as ``retrying``.
+
+        Their notification is redelivered, and the redelivery records the outcome.
+        """
+        retrying = None if alerts is None else {id(alert) for alert in alerts}
+        with self._lock:
+            self._alerts = [
+                (alert, "retrying" if retrying is None or id(alert) in retrying else disposition)
+                for alert, disposition in self._alerts
+            ]
+
+    def on_send(self, outcome: SendOutcome) -> None:
+        with self._lock:
+            self._outcomes.append(outcome)
+
+    def flush(self, request_id: str = "") -> int:
+        """Write the buffered records; returns how many were written. Failures are logged, not raised."""
+        with self._lock:
+            alerts, self._alerts = self._alerts, []
+            outcomes, self._outcomes = self._outcomes, []
+        if not alerts:
+            return 0
+
+        channels: dict[int, dict[str, dict]] = {}
+        for outcome in outcomes:
+            payload = outcome.payload if isinstance(outcome.payload, list) else [outcome.payload]
+            for alert in payload:
+                self._merge(channels.setdefault(id(alert), {}), outcome)
+
+        received_at = datetime.now(timezone.utc).strftime(TIME_FORMAT)
+        ttl = int(time.time()) + self._ttl_seconds
+        items = [
+            self._item(alert, disposition, channels.get(id(alert), {}), received_at, f"{request_id}#{n}", ttl)
+            for n, (alert, disposition) in enumerate(alerts)
+        ]
+
+        try:
+            with self._table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+        except Exception as e:
+            logger.warning("Failed to write alert history", extra={"records": len(items), "error": str(e)})
+            return 0
+        return len(items)
+
+    @staticmethod
+    def _merge(channels: dict[str, dict], outcome: SendOutcome) -> None:
+        # A channel can get one alert more than once, e.g. as a fallback for another channel
+        record = {"success": outcome.success, "attempts": outcome.attempts, "latency_ms": round(outcome.latency * 1000)}
+        if outcome.error:
+            record["error"] = outcome.error[:500]
+
+        previous = channels.get(outcome.channel)
+        if previous is not None:
+            record["success"] = record["success"] and previous["success"]
+            record["attempts"] += previous["attempts"]
+            record["latency_ms"] = max(record["latency_ms"], previous["latency_ms"])
+            if "error" in previous and "error" not in record:
+                record["error"] = previous["error"]
+        channels[outcome.channel] = record
+
+    @staticmethod
+    def _item(
+        alert: Alert, disposition: str | None, channels: dict[str, dict], received_at: str, suffix: str, ttl: int
+    ) -> dict:
+        if disposition is None:
+            sent = [record["success"] for record in channels.values()]
+            if not sent:
+                disposition = "unrouted"
+            elif all(sent):
+                disposition = "delivered"
+            else:
+                disposition = "partial" if any(sent) else "failed"
+
+        item = {
+            "PK": f"HISTORY#{alert.fingerprint or uuid.uuid4().hex}",
+            "SK": f"{received_at}#{suffix}",
+            "day_bucket": f"{received_at[:10]}#{zlib.crc32(suffix.encode()) % DAY_BUCKET_SHARDS}",
+            "received_at": received_at,
+            "fingerprint": alert.fingerprint,
+            "title": alert.title,
+            "level": alert.level,
+            "status": alert.status,
+            "labels": alert.labels,
+            "disposition": disposition,
+            "channels": channels,
+            "ttl": ttl,
+        }
+        if alert.starts_at:
+            item["starts_at"] = alert.starts_at.isoformat()
+        return item
+
+    def query_range(self, start: datetime, end: datetime) -> Iterator[dict]:
+        """Records received in [start, end], oldest first; one Query per shard of each UTC day touched."""
+        lower = start.astimezone(timezone.utc).strftime(TIME_FORMAT)
+        upper = end.astimezone(timezone.utc).strftime(TIME_FORMAT)
+        day = start.astimezone(timezone.utc).date()
+        while day <= end.astimezone(timezone.utc).date():
+            # Records written before the buckets were sharded carry the bare date
+            buckets = [f"{day.isoformat()}#{shard}" for shard in range(DAY_BUCKET_SHARDS)] + [day.isoformat()]
+            shards = [self._query_bucket(bucket, lower, upper) for bucket in buckets]
+            yield from heapq.merge(*shards, key=lambda item: item["received_at"])
+            day += timedelta(days=1)
+
+    def _query_bucket(self, bucket: str, lower: str, upper: str) -> Iterator[dict]:
+        kwargs = {
+            "IndexName": HISTORY_INDEX,
+            "KeyConditionExpression": "day_bucket = :day AND received_at BETWEEN :start AND :end",
+            "ExpressionAttributeValues": {":day": bucket, ":start": lower, ":end": upper},
+        }
+        while True:
+            response = self._table.query(**kwargs)
+            yield from response.get("Items", [])
+            if "LastEvaluatedKey" not in response:
+                return
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from aws_lambda_powertools import Logger
+
+from channels.base import Alert
+
+
+logger = Logger(child=True)
+
+
+class DeliveryDeduplicator:
+    """Drops notifications that were already delivered within ``window_seconds``.
+
+    An alert is identified by fingerprint, status and start time, so SNS redeliveries and
+    Grafana repeat notifications are dropped while a re-fired alert still goes out. A bounded
+    in-process LRU answers repeats seen by this instance; the first sighting is claimed with a
+    conditional PutItem so concurrent instances agree on a single delivery.
+    """
+
+    def __init__(
+        self,
+        table: Any = None,
+        window_seconds: int = 300,
+        max_entries: int = 4096,
+        executor: Executor | None = None,
+    ):
+        self._table = table
+        self._window_seconds = window_seconds
+        self._max_entries = max_entries
+        self._executor = executor
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, alerts: list[Alert]) -> list[Alert]:
+        """Return the alerts that have not been delivered yet, claiming them in the process."""
+        if self._executor is not None and self._table is not None and len(alerts) > 1:
+            duplicates = list(self._executor.map(self.is_duplicate, alerts))
+        else:
+            duplicates = [self.is_duplicate(alert) for alert in alerts]
+
+        fresh = [alert for alert, duplicate in zip(alerts, duplicates) if not duplicate]
+        if len(fresh) < len(alerts):
+            logger.info("Dropped duplicate alerts", extra={"duplicates": len(alerts) - len(fresh)})
+        return fresh
+
+    def is_duplicate(self, alert: Alert) -> bool:
+        if not alert.fingerprint:
+            return False
+
+        key = self._key(alert)
+        now = time.time()
+
+        with self._lock:
+            expires_at = self._seen.get(key)
+            if expires_at is not None and expires_at > now:
+                self._seen.move_to_end(key)
+                return True
+
+        duplicate = not self._claim(key, now)
+        self._remember(key, now + self._window_seconds)
+        return duplicate
+
+    @staticmethod
+    def _key(alert: Alert) -> str:
+        started = int(alert.starts_at.timestamp()) if alert.starts_at else 0
+        return f"{alert.fingerprint}#{alert.status}#{started}"
+
+    def _claim(self, key: str, now: float) -> bool:
+        if self._table is None:
+            return True
+
+        try:
+            self._table.put_item(
+                Item={
+                    "PK": f"DEDUP#{key}",
+                    "SK": "DELIVERY",
+                    "expires_at": int(now) + self._window_seconds,
+                    "ttl": int(now) + self._window_seconds,
+                },
+                ConditionExpression="attribute_not_exists(PK) OR expires_at < :now",
+                ExpressionAttributeValues={":now": int(now)},
+            )
+            return True
+        except Exception as e:
+            # Matched on the error code so botocore is not imported before the table is first used
+            if getattr(e, "response", {}).get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                return False
+            logger.warning("Failed to claim delivery, sending anyway", extra={"key": key, "error": str(e)})
+            return True
+
+    def release(self, alerts: list[Alert]) -> None:
+        """Forget claimed alerts whose delivery failed, so a redelivered notification sends them again."""
+        for alert in alerts:
+            if not alert.fingerprint:
+                continue
+            key = self._key(alert)
+            with self._lock:
+                self._seen.pop(key, None)
+            if self._table is None:
+                continue
+            try:
+                self._table.delete_item(Key={"PK": f"DEDUP#{key}", "SK": "DELIVERY"})
+            except Exception as e:
+                logger.warning("Failed to release delivery claim", extra={"key": key, "error": str(e)})
+
+    def _remember(self, key: str, expires_at: float) -> None:
+        with self._lock:
+            self._seen[key] = expires_at
+            self._seen.move_to_end(key)
+            while len(self._seen) > self._max_entries:
+                self._seen.popitem(last=False)
+
+
+@dataclass(frozen=True)
+class EscalationClaim:
+    acquired: bool
+    # The active escalation's execution, when the claim was not acquired and it is recorded
+    execution_arn: str | None = None
+
+
+class EscalationClaims:
+    """Allows one active escalation per alert fingerprint.
+
+    The broadcaster claims the alert's ``ALERT#<fingerprint>`` record with a conditional write
+    before starting an execution. The claim is taken when there is no record, or when the record
+    belongs to an earlier firing (a different start time) whose escalation is over: acknowledged,
+    exhausted, or past ``lease_seconds``. Otherwise the escalation is still active and repeat
+    notifications reuse its execution instead of paging again.
+    """
+
+    def __init__(self, table: Any, lease_seconds: int = 900, ttl_seconds: int = 24 * 60 * 60):
+        self._table = table
+        self._lease_seconds = lease_seconds
+        self._ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(alert: Alert) -> dict:
+        return {"PK": f"ALERT#{alert.fingerprint}", "SK": "METADATA"}
+
+    def claim(self, alert: Alert) -> EscalationClaim:
+        if not alert.fingerprint:
+            return EscalationClaim(acquired=True)
+
+        now = int(time.time())
+        timestamp = datetime.now(timezone.utc).isoformat()
+        try:
+            self._table.update_item(
+                Key=self._key(alert),
+                UpdateExpression=(
+                    "SET alert_id = :alert_id, #status = :pending, current_level = :level, alert_title = :title, "
+                    "severity = :severity, alert_starts_at = :starts_at, escalation_expires_at = :expires_at, "
+                    "created_at = :timestamp, updated_at = :timestamp, #ttl = :ttl "
+                    "REMOVE execution_arn, acked_by, acked_at, task_tokens, task_token_level, contact_ids"
+                ),
+                ConditionExpression=(
+                    "attribute_not_exists(PK) OR (alert_starts_at <> :starts_at "
+                    "AND (#status <> :pending OR escalation_expires_at < :now))"
+                ),
+                ExpressionAttributeNames={"#status": "status", "#ttl": "ttl"},
+                ExpressionAttributeValues={
+                    ":alert_id": alert.fingerprint,
+                    ":pending": "pending",
+                    ":level": 1,
+                    ":title": alert.title,
+                    ":severity": alert.level,
+                    ":starts_at": alert.starts_at.isoformat() if alert.starts_at else "",
+                    ":expires_at": now + self._lease_seconds,
+                    ":timestamp": timestamp,
+                    ":ttl": now + self._ttl_seconds,
+                    ":now": now,
+                },
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+            return EscalationClaim(acquired=True)
+        except Exception as e:
+            response = getattr(e, "response", {})
+            if response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                # Low-level attribute format; the ARN is missing while the other start is in flight
+                execution_arn = response.get("Item", {}).get("execution_arn", {}).get("S")
+                return EscalationClaim(acquired=False, execution_arn=execution_arn)
+            logger.warning(
+                "Failed to claim escalation, starting anyway",
+                extra={"fingerprint": alert.fingerprint, "error": str(e)},
+            )
+            return EscalationClaim(acquired=True)
+
+    def record_execution(self, alert: Alert, execution_arn: str) -> None:
+        if not alert.fingerprint:
+            return
+        try:
+            self._table.update_item(
+                Key=self._key(alert),
+                UpdateExpression="SET execution_arn = :arn",
+                ExpressionAttributeValues={":arn": execution_arn},
+            )
+        except Exception as e:
+            logger.warning(
+                "Failed to record escalation execution", extra={"fingerprint": alert.fingerprint, "error": str(e)}
+            )
+
+    def release(self, alert: Alert) -> None:
+        """Give up a claim whose execution failed to start, so the next notification can retry."""
+        if not alert.fingerprint:
+            return
+        try:
+            self._table.delete_item(
+                Key=self._key(alert),
+                ConditionExpression="#status = :pending AND attribute_not_exists(execution_arn)",
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={":pending": "pending"},
+            )
+        except Exception as e:
+            logger.warning(
+                "Failed to release escalation claim", extra={"fingerprint": alert.fingerprint, "error": str(e)}
+            )
@@ -0,0 +1,82 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import EphemeralMetrics, MetricUnit, single_metric
+
+from channels.base import LEVEL_PRIORITY
+
+
+if TYPE_CHECKING:
+    from router import SendOutcome
+
+
+logger = Logger(child=True)
+
+METRICS_NAMESPACE = os.environ.get("POWERTOOLS_METRICS_NAMESPACE", "AlertBroadcaster")
+
+
+def emit_event_metric(name: str, dimensions: dict[str, str], value: float = 1) -> None:
+    """Emit a rare event (e.g. a state transition) as its own EMF document with dimensions."""
+    try:
+        with single_metric(name=name, unit=MetricUnit.Count, value=value, namespace=METRICS_NAMESPACE) as metric:
+            for key, dimension in dimensions.items():
+                metric.add_dimension(name=key, value=dimension)
+    except Exception as e:
+        logger.warning("Failed to emit metric", extra={"metric": name, "error": str(e)})
+
+
+@dataclass
+class _DeliveryStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    timeouts: int = 0
+
+
+class DeliveryMetrics:
+    """Per channel and alert level delivery metrics, aggregated in memory until ``flush``.
+
+    Registered as a router send listener. An EMF document holds a single value per dimension,
+    so ``flush`` writes one document per (channel, level) seen in the invocation, each carrying
+    every send's latency (CloudWatch derives the percentiles) and the summed counters.
+    """
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE):
+        self._namespace = namespace
+        self._stats: dict[tuple[str, str], _DeliveryStats] = {}
+        self._lock = threading.Lock()
+
+    def on_send(self, outcome: "SendOutcome") -> None:
+        payload = outcome.payload if isinstance(outcome.payload, list) else [outcome.payload]
+        # A batched send is counted under the most severe level it carried
+        level = min((alert.level for alert in payload), key=lambda x: LEVEL_PRIORITY.get(x, len(LEVEL_PRIORITY)))
+        with self._lock:
+            stats = self._stats.setdefault((outcome.channel, level), _DeliveryStats())
+            stats.latencies_ms.append(round(outcome.latency * 1000, 1))
+            stats.attempts += outcome.attempts
+            stats.successes += outcome.success
+            stats.failures += not outcome.success
+            stats.timeouts += outcome.timeouts
+
+    def flush(self) -> None:
+        with self._lock:
+            stats_by_key, self._stats = self._stats, {}
+
+        for (channel, level), stats in stats_by_key.items():
+            try:
+                document = EphemeralMetrics(namespace=self._namespace)
+                document.add_dimension(name="channel", value=channel)
+                document.add_dimension(name="level", value=level)
+                for latency in stats.latencies_ms:
+                    document.add_metric(name="DeliveryLatency", unit=MetricUnit.Milliseconds, value=latency)
+                document.add_metric(name="DeliveryAttempts", unit=MetricUnit.Count, value=stats.attempts)
+                document.add_metric(name="DeliverySuccess", unit=MetricUnit.Count, value=stats.successes)
+                document.add_metric(name="DeliveryFailure", unit=MetricUnit.Count, value=stats.failures)
+                document.add_metric(name="DeliveryTimeout", unit=MetricUnit.Count, value=stats.timeouts)
+                document.flush_metrics()
+            except Exception as e:
+                logger.warning("Failed to emit delivery metrics", extra={"channel": channel, "error": str(e)})
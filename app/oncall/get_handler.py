@@ -1,7 +1,8 @@
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
-from oncall.service import get_current_oncall
+from oncall.service import get_current_oncall, get_ring_group
+from profiling import profiled
 
 logger = Logger()
 tracer = Tracer()
@@ -9,18 +10,27 @@ tracer = Tracer()
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@profiled
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """
     Get current on-call person for escalation level.
 
     Input:
       - level: Escalation level (1, 2, 3)
+      - policy, step: Escalation policy and 1-based step (parallel paging); replaces level
 
     Output:
       - phone: Phone number
       - name: Person name
       - found: Whether on-call was found
+      - contacts: Everyone to page for the step (parallel paging only)
     """
+    if "policy" in event:
+        step = event.get("step", 1)
+        contacts = get_ring_group(event["policy"][step - 1])
+        logger.info("Getting ring group", step=step, contacts=len(contacts))
+        return {"contacts": contacts, "found": bool(contacts)}
+
     level = event.get("level", 1)
     logger.info("Getting on-call", level=level)
 
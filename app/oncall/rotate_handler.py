@@ -2,6 +2,7 @@ from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
 from oncall.service import rotate_oncall
+from profiling import profiled
 
 logger = Logger()
 tracer = Tracer()
@@ -9,6 +10,7 @@ tracer = Tracer()
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@profiled
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """Weekly rotation handler. Triggered by EventBridge."""
     logger.info("Starting weekly rotation")
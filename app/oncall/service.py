@@ -1,4 +1,8 @@
+import bisect
 import os
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
@@ -12,70 +16,240 @@ table = dynamodb.Table(os.environ.get("ALERTS_TABLE_NAME", "alerts"))
 
 KST = timezone(timedelta(hours=9))
 
+# How long a warm container serves lookups from memory before re-reading the schedule; the only
+# invalidation, so rotations, reseeds and new overrides reach warm containers within it
+CACHE_TTL_SECONDS = float(os.environ.get("ONCALL_CACHE_TTL_SECONDS", "60"))
+# Weeks of rotation the rotate function writes ahead
+SCHEDULE_WEEKS = int(os.environ.get("ONCALL_SCHEDULE_WEEKS", "8"))
 
-def get_current_oncall(level: int = 1) -> Optional[dict]:
-    now = datetime.now(KST)
-    today = now.strftime("%Y-%m-%d")
+# Interval bounds are stored as UTC strings in this format, so they sort and compare as strings
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+END_OF_TIME = "9999-12-31T23:59:59Z"
 
-    override = _get_override(today, level)
-    if override:
-        logger.info("Using override", date=today, level=level)
-        return override
+# Overrides and the materialized rotation share one partition:
+#   SK = OVERRIDE#<ends_at>#LEVEL#<level>#<starts_at>   an override interval [starts_at, ends_at)
+#   SK = ROTATION                                      the schedule written by rotate_oncall
+# "ROTATION" sorts after every "OVERRIDE#..." key, so one range Query on SK >= OVERRIDE#<now>
+# returns the overrides that have not ended yet together with the rotation.
+SCHEDULE_PK = "ONCALL#schedule"
+ROTATION_SK = "ROTATION"
+ROTATION_KEY = {"PK": "ONCALL#rotation", "SK": "CURRENT"}
 
-    roster = _get_rotation_roster(level)
-    if roster:
-        logger.info("Using rotation", level=level)
-        return roster
+
+def format_time(at: datetime) -> str:
+    return at.astimezone(timezone.utc).strftime(TIME_FORMAT)
+
+
+def override_item(level: int, starts_at: datetime, ends_at: datetime, name: str, phone: str) -> dict:
+    start, end = format_time(starts_at), format_time(ends_at)
+    return {
+        "PK": SCHEDULE_PK,
+        "SK": f"OVERRIDE#{end}#LEVEL#{level}#{start}",
+        "level": level,
+        "starts_at": start,
+        "ends_at": end,
+        "name": name,
+        "phone": phone,
+        "active": True,
+    }
+
+
+@dataclass
+class _Schedule:
+    """Resolved on-call schedule: rotation weeks over an ordered roster, plus override intervals."""
+
+    members: list[dict]
+    # (starts_at, ends_at, rotation index), sorted by starts_at
+    weeks: list[tuple[str, str, int]]
+    overrides: list[dict] = field(default_factory=list)
+    fetched_at: float = 0.0
+
+    def lookup(self, level: int, at: str) -> tuple[Optional[dict], str]:
+        for override in self.overrides:
+            if override["level"] == level and override["starts_at"] <= at < override["ends_at"]:
+                return {"phone": override["phone"], "name": override.get("name", "Unknown")}, "override"
+
+        if not self.members or not self.weeks:
+            return None, "none"
+        # Past the materialized horizon the last week stays in effect, like an unrotated pointer
+        week = max(bisect.bisect_right(self.weeks, at, key=lambda w: w[0]) - 1, 0)
+        member = self.members[(self.weeks[week][2] + level - 1) % len(self.members)]
+        return {"phone": member["phone"], "name": member.get("name", "Unknown")}, "rotation"
+
+
+_cache: Optional[_Schedule] = None
+# Bumped on every invalidation, so a refresh that started before one is not cached
+_cache_generation = 0
+_cache_lock = threading.Lock()
+
+
+def invalidate_cache() -> None:
+    """Drop this process's cached schedule, e.g. after writing the schedule in-process."""
+    global _cache, _cache_generation
+    with _cache_lock:
+        _cache = None
+        _cache_generation += 1
+
+
+def get_current_oncall(level: int = 1, at: Optional[datetime] = None) -> Optional[dict]:
+    """Who is on call for ``level`` at ``at`` (default now): one cached read, then an in-memory lookup."""
+    when = format_time(at or datetime.now(timezone.utc))
+
+    schedule = _get_schedule()
+    oncall, source = schedule.lookup(level, when) if schedule else (None, "none")
+    if oncall:
+        logger.info(f"Using {source}", at=when, level=level)
+        return oncall
 
     logger.warning("No on-call found", level=level)
     return None
 
 
-def _get_override(date: str, level: int) -> Optional[dict]:
+def get_ring_group(group: list, at: Optional[datetime] = None) -> list[dict]:
+    """
+    On-call contacts to page together for one escalation step.
+
+    ``group`` holds escalation levels and/or "all" (every roster member); a phone number is
+    only called once.
+    """
+    when = format_time(at or datetime.now(timezone.utc))
+    schedule = _get_schedule()
+    if schedule is None:
+        return []
+
+    contacts: dict[str, dict] = {}
+    for entry in group:
+        if entry == "all":
+            for member in schedule.members:
+                contacts.setdefault(member["phone"], {"phone": member["phone"], "name": member.get("name", "Unknown")})
+            continue
+        oncall, _ = schedule.lookup(int(entry), when)
+        if oncall:
+            contacts.setdefault(oncall["phone"], {**oncall, "level": int(entry)})
+
+    logger.info("Resolved ring group", group=group, contacts=len(contacts))
+    return list(contacts.values())
+
+
+def _get_schedule() -> Optional[_Schedule]:
+    """
+    Returns the cached schedule, refreshing it once the TTL has passed.
+
+    A refresh is one range Query for the rotation and the overrides that have not ended. If
+    a refresh fails, the previous schedule keeps being served. The Query runs outside the lock,
+    so lookups are never held up by another thread's refresh.
+    """
+    global _cache
+    with _cache_lock:
+        cached, generation = _cache, _cache_generation
+    if cached and time.monotonic() - cached.fetched_at < CACHE_TTL_SECONDS:
+        return cached
+
     try:
-        response = table.get_item(
-            Key={"PK": "ONCALL#override", "SK": f"DATE#{date}#LEVEL#{level}"}
-        )
-        item = response.get("Item")
-        if item and item.get("active", True):
-            return {"phone": item["phone"], "name": item.get("name", "Unknown")}
+        schedule = _load_schedule(format_time(datetime.now(timezone.utc)))
     except Exception:
-        logger.exception("Failed to get override")
-    return None
+        logger.exception("Failed to refresh on-call schedule")
+        return cached
 
+    with _cache_lock:
+        if _cache_generation == generation:
+            _cache = schedule
+    return schedule
 
-def _get_rotation_roster(level: int) -> Optional[dict]:
-    try:
-        rotation_response = table.get_item(
-            Key={"PK": "ONCALL#rotation", "SK": "CURRENT"}
-        )
-        rotation = rotation_response.get("Item", {})
-        current_index = rotation.get("current_index", 0)
 
-        roster_response = table.query(
-            KeyConditionExpression="PK = :pk AND begins_with(SK, :sk)",
-            ExpressionAttributeValues={":pk": "ONCALL#roster", ":sk": "MEMBER#"},
+def _query_all(**kwargs) -> list[dict]:
+    items = []
+    while True:
+        response = table.query(**kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _load_schedule(now: str) -> _Schedule:
+    items = _query_all(
+        KeyConditionExpression="PK = :pk AND SK >= :sk",
+        ExpressionAttributeValues={":pk": SCHEDULE_PK, ":sk": f"OVERRIDE#{now}"},
+    )
+    rotation = next((item for item in items if item["SK"] == ROTATION_SK), None)
+    overrides = sorted(
+        (
+            {**item, "level": int(item["level"])}
+            for item in items
+            if item["SK"] != ROTATION_SK and item.get("active", True)
+        ),
+        key=lambda x: x["starts_at"],
+    )
+
+    if rotation:
+        weeks = [(week["starts_at"], week["ends_at"], int(week["index"])) for week in rotation["weeks"]]
+        return _Schedule(
+            members=rotation["members"],
+            weeks=weeks,
+            overrides=overrides,
+            fetched_at=time.monotonic(),
         )
-        members = sorted(roster_response.get("Items", []), key=lambda x: x.get("order", 0))
 
-        if not members:
-            return None
+    # Not materialized yet (before the first rotation after deploy or a reseed): the rotation
+    # pointer applies from now on
+    pointer = table.get_item(Key=ROTATION_KEY).get("Item", {})
+    return _Schedule(
+        members=_query_roster(),
+        weeks=[("", END_OF_TIME, int(pointer.get("current_index", 0)))],
+        overrides=overrides,
+        fetched_at=time.monotonic(),
+    )
 
-        member_index = (current_index + level - 1) % len(members)
-        current_member = members[member_index]
 
-        return {"phone": current_member["phone"], "name": current_member.get("name", "Unknown")}
+def _query_roster() -> list[dict]:
+    members = _query_all(
+        KeyConditionExpression="PK = :pk AND begins_with(SK, :sk)",
+        ExpressionAttributeValues={":pk": "ONCALL#roster", ":sk": "MEMBER#"},
+    )
+    return sorted(members, key=lambda x: x.get("order", 0))
+
+
+def _next_monday(at: datetime) -> datetime:
+    midnight = at.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + timedelta(days=7 - midnight.weekday())
 
-    except Exception:
-        logger.exception("Failed to get rotation roster")
-    return None
+
+def materialize_schedule(current_index: int, version: int, now: Optional[datetime] = None) -> dict:
+    """
+    Writes the next SCHEDULE_WEEKS weeks of rotation as a single item.
+
+    Week 0 runs from ``now`` to the next Monday 00:00 UTC (the rotation schedule); each
+    following week advances the rotation index by one.
+    """
+    now = now or datetime.now(timezone.utc)
+    members = [{"name": m.get("name", "Unknown"), "phone": m["phone"]} for m in _query_roster()]
+
+    weeks = []
+    starts_at, ends_at = now, _next_monday(now)
+    for offset in range(SCHEDULE_WEEKS):
+        index = (current_index + offset) % len(members) if members else 0
+        weeks.append({"starts_at": format_time(starts_at), "ends_at": format_time(ends_at), "index": index})
+        starts_at, ends_at = ends_at, ends_at + timedelta(days=7)
+
+    item = {
+        "PK": SCHEDULE_PK,
+        "SK": ROTATION_SK,
+        "members": members,
+        "weeks": weeks,
+        "version": version,
+        "generated_at": format_time(now),
+    }
+    table.put_item(Item=item)
+    return item
 
 
 def rotate_oncall() -> dict:
     try:
-        response = table.get_item(Key={"PK": "ONCALL#rotation", "SK": "CURRENT"})
+        response = table.get_item(Key=ROTATION_KEY)
         rotation = response.get("Item", {})
-        current_index = rotation.get("current_index", 0)
+        current_index = int(rotation.get("current_index", 0))
+        version = int(rotation.get("version", 0)) + 1
 
         roster_response = table.query(
             KeyConditionExpression="PK = :pk AND begins_with(SK, :sk)",
@@ -88,15 +262,22 @@ def rotate_oncall() -> dict:
 
         table.put_item(
             Item={
-                "PK": "ONCALL#rotation",
-                "SK": "CURRENT",
+                **ROTATION_KEY,
                 "current_index": new_index,
+                "version": version,
                 "rotated_at": datetime.now(KST).isoformat(),
             }
         )
+        schedule = materialize_schedule(new_index, version)
 
-        logger.info("Rotation updated", old_index=current_index, new_index=new_index)
-        return {"old_index": current_index, "new_index": new_index}
+        logger.info(
+            "Rotation updated",
+            old_index=current_index,
+            new_index=new_index,
+            version=version,
+            scheduled_until=schedule["weeks"][-1]["ends_at"] if schedule["weeks"] else None,
+        )
+        return {"old_index": current_index, "new_index": new_index, "version": version}
 
     except Exception as e:
         logger.exception("Failed to rotate")
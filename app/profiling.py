@@ -0,0 +1,181 @@
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from aws_lambda_powertools import Logger
+
+
+logger = Logger(child=True)
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+# Fraction of invocations that are profiled
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0.01"))
+# cprofile: deterministic, the invoking thread only, written as a pstats file
+# sampling: stacks of every thread (worker pool sends included) every PROFILING_INTERVAL seconds,
+#           written as collapsed stacks ("frame;frame;frame count", the flame graph input format)
+PROFILING_MODE = os.environ.get("PROFILING_MODE", "cprofile")
+PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL", "0.005"))
+# A directory, or s3://bucket/prefix
+PROFILING_OUTPUT = os.environ.get("PROFILING_OUTPUT", "/tmp/profiles")
+# Functions and allocation sites listed in the summary log line
+PROFILING_TOP = 10
+
+_s3_client = None
+
+
+def profiled(handler: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    """Profile a sampled fraction of the handler's invocations when PROFILING_ENABLED is set.
+
+    Place it below the Powertools decorators so the summary is logged with the invocation's
+    context. A profiled invocation also records its tracemalloc peak; the profile is written to
+    PROFILING_OUTPUT and summarized in one log line.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event: Any, context: Any) -> Any:
+        if not PROFILING_ENABLED or random.random() >= PROFILING_SAMPLE_RATE:
+            return handler(event, context)
+        return _profile(handler, event, context)
+
+    return wrapper
+
+
+def _profile(handler: Callable[[Any, Any], Any], event: Any, context: Any) -> Any:
+    owns_tracemalloc = not tracemalloc.is_tracing()
+    if owns_tracemalloc:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    profiler = cProfile.Profile() if PROFILING_MODE == "cprofile" else _StackSampler(PROFILING_INTERVAL)
+    try:
+        profiler.enable()
+    except Exception as e:
+        # e.g. another profiler already holds the interpreter's profiling hook
+        logger.warning("Failed to start profiler, running unprofiled", extra={"error": str(e)})
+        if owns_tracemalloc:
+            tracemalloc.stop()
+        return handler(event, context)
+
+    started = time.perf_counter()
+    try:
+        try:
+            return handler(event, context)
+        finally:
+            profiler.disable()
+    finally:
+        duration = time.perf_counter() - started
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            allocations = tracemalloc.take_snapshot().statistics("lineno")[:PROFILING_TOP]
+            if owns_tracemalloc:
+                tracemalloc.stop()
+
+            name = getattr(context, "function_name", None) or handler.__module__
+            if isinstance(profiler, cProfile.Profile):
+                artifact, summary = _pstats(profiler), _top_functions(profiler)
+                suffix = "pstats"
+            else:
+                artifact, summary = profiler.collapsed().encode(), profiler.top_frames(PROFILING_TOP)
+                suffix = "collapsed"
+            location = _write_artifact(name, getattr(context, "aws_request_id", "local"), suffix, artifact)
+
+            logger.info(
+                "Profiled invocation",
+                extra={
+                    "profile": location,
+                    "duration_ms": round(duration * 1000, 1),
+                    "tracemalloc_peak_kb": round(peak / 1024, 1),
+                    "top_functions": summary,
+                    "top_allocations": [f"{stat.traceback[0]} {stat.size // 1024} KiB" for stat in allocations],
+                },
+            )
+        except Exception as e:
+            logger.warning("Failed to write profile", extra={"error": str(e)})
+
+
+def _pstats(profiler: cProfile.Profile) -> bytes:
+    # Same format as Stats.dump_stats, which only writes to a path
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def _top_functions(profiler: cProfile.Profile) -> list[str]:
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE)
+    top = []
+    for function in stats.fcn_list[:PROFILING_TOP]:
+        _, calls, _, cumulative, _ = stats.stats[function]
+        filename, line, name = function
+        top.append(f"{Path(filename).name}:{line}({name}) {calls} calls {cumulative * 1000:.1f} ms")
+    return top
+
+
+def _write_artifact(name: str, request_id: str, suffix: str, data: bytes) -> str:
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    filename = f"{name}/{timestamp}-{request_id}.{suffix}"
+
+    if PROFILING_OUTPUT.startswith("s3://"):
+        global _s3_client
+        if _s3_client is None:
+            import boto3
+
+            _s3_client = boto3.client("s3")
+        bucket, _, prefix = PROFILING_OUTPUT[len("s3://") :].partition("/")
+        key = f"{prefix.rstrip('/')}/{filename}" if prefix else filename
+        _s3_client.put_object(Bucket=bucket, Key=key, Body=data)
+        return f"s3://{bucket}/{key}"
+
+    path = Path(PROFILING_OUTPUT) / filename
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+class _StackSampler:
+    """Samples the stacks of every other thread from a background thread."""
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def enable(self) -> None:
+        self._thread.start()
+
+    def disable(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self._thread.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{Path(frame.f_code.co_filename).stem}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def top_frames(self, limit: int) -> list[str]:
+        """Innermost frames by sample count."""
+        leaves: Counter[str] = Counter()
+        for stack, count in self._stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [f"{frame} {count} samples" for frame, count in leaves.most_common(limit)]
@@ -0,0 +1,125 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from aws_lambda_powertools import Logger
+
+
+logger = Logger(child=True)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Sustained ``rate`` messages per second with bursts of up to ``burst``."""
+
+    rate: float
+    burst: float = 1.0
+
+
+class TokenBucket:
+    """Token bucket whose balance may go negative, so concurrent callers queue in FIFO order."""
+
+    def __init__(self, limit: RateLimit):
+        self._rate = limit.rate
+        self._burst = limit.burst
+        self._tokens = limit.burst
+        self._updated_at = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+        return max(0.0, (1 - self._tokens) / self._rate)
+
+    def take(self) -> None:
+        self._tokens -= 1
+
+
+class DynamoDBRateCounter:
+    """Fixed one-second windows counted in the AlertsTable, shared by every Lambda instance."""
+
+    def __init__(self, table: Any):
+        self._table = table
+
+    def try_acquire(self, key: str, limit: float) -> bool:
+        second = int(time.time())
+        try:
+            response = self._table.update_item(
+                Key={"PK": f"RATE#{key}", "SK": f"SEC#{second}"},
+                UpdateExpression="ADD hits :one SET #ttl = :ttl",
+                ExpressionAttributeNames={"#ttl": "ttl"},
+                ExpressionAttributeValues={":one": 1, ":ttl": second + 60},
+                ReturnValues="UPDATED_NEW",
+            )
+        except Exception as e:
+            logger.warning("Failed to update shared rate counter", extra={"key": key, "error": str(e)})
+            return True
+        return int(response["Attributes"]["hits"]) <= limit
+
+
+class RateLimiter:
+    """Per-channel and per-destination send budgets.
+
+    ``limits`` maps a channel name to its ``per_channel`` (e.g. a Telegram bot) and
+    ``per_destination`` (e.g. one Telegram chat or Slack webhook) limits. ``reserve`` books a
+    slot in every bucket that applies and returns how long the caller must wait for it.
+    """
+
+    def __init__(self, limits: dict[str, dict[str, RateLimit]], counter: DynamoDBRateCounter | None = None):
+        self._limits = limits
+        self._counter = counter
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict, counter: DynamoDBRateCounter | None = None) -> "RateLimiter":
+        limits = {
+            channel: {scope: RateLimit(**limit) for scope, limit in (scopes or {}).items()}
+            for channel, scopes in (config or {}).items()
+        }
+        return cls(limits, counter)
+
+    def reserve(self, channel: str, destination: str, max_wait: float | None = None) -> float | None:
+        """Book the next send slot; returns the wait in seconds, or None if it exceeds ``max_wait``."""
+        buckets = [self._bucket(key, limit) for key, limit in self._scoped_limits(channel, destination)]
+        if not buckets:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            wait = max(bucket.wait_time(now) for bucket in buckets)
+            if max_wait is not None and wait > max_wait:
+                return None
+            for bucket in buckets:
+                bucket.take()
+        return wait
+
+    def acquire_shared(self, channel: str, destination: str, max_wait: float) -> bool:
+        """Wait for a slot in the shared per-second budget; False if none frees up within ``max_wait``."""
+        if self._counter is None:
+            return True
+
+        waited = 0.0
+        for key, limit in self._scoped_limits(channel, destination):
+            while not self._counter.try_acquire(key, limit.rate):
+                pause = 1 - (time.time() % 1)
+                if waited + pause > max_wait:
+                    return False
+                time.sleep(pause)
+                waited += pause
+        return True
+
+    def _scoped_limits(self, channel: str, destination: str) -> list[tuple[str, RateLimit]]:
+        limits = self._limits.get(channel, {})
+        scoped = []
+        if "per_channel" in limits:
+            scoped.append((channel, limits["per_channel"]))
+        if "per_destination" in limits:
+            scoped.append((f"{channel}:{destination}", limits["per_destination"]))
+        return scoped
+
+    def _bucket(self, key: str, limit: RateLimit) -> TokenBucket:
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(limit)
+            return self._buckets[key]
@@ -0,0 +1,69 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+
+
+class Deadline:
+    """Point in time by which the invocation must have finished its sends."""
+
+    def __init__(self, seconds: float | None):
+        self._expires_at = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def from_context(cls, context: Any, reserve_ms: int = 1000) -> "Deadline":
+        """Build a deadline from the Lambda context, keeping ``reserve_ms`` to build the response."""
+        try:
+            remaining_ms = int(context.get_remaining_time_in_millis())
+        except (AttributeError, TypeError, ValueError):
+            return cls(None)
+        return cls(max(remaining_ms - reserve_ms, 0) / 1000)
+
+    def remaining(self) -> float:
+        if self._expires_at is None:
+            return float("inf")
+        return max(self._expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by attempts and the invocation deadline.
+
+    ``attempt_budget`` is the time one more attempt may take; a retry is only scheduled when the
+    deadline leaves room for it. Channels that know their request timeouts pass those instead.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 5.0
+    max_retry_after: float = 10.0
+    attempt_budget: float = 5.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def next_delay(
+        self,
+        attempt: int,
+        retry_after: float | None = None,
+        deadline: Deadline | None = None,
+        attempt_budget: float | None = None,
+    ) -> float | None:
+        """Seconds to wait before attempt ``attempt + 1``, or None when the send should give up."""
+        if attempt >= self.max_attempts:
+            return None
+
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = retry_after
+        else:
+            delay = self.backoff(attempt)
+
+        budget = self.attempt_budget if attempt_budget is None else attempt_budget
+        if deadline is not None and deadline.remaining() < delay + budget:
+            return None
+        return delay
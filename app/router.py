@@ -1,14 +1,46 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Protocol
 
 from aws_lambda_powertools import Logger
 
-from channels.base import Alert, BaseChannel
+from channels.base import LEVEL_PRIORITY, Alert, BaseChannel, DeliveryError
+from circuit_breaker import CircuitBreakerRegistry, CircuitState
+from rate_limit import RateLimiter
+from retry import Deadline, RetryPolicy
+from routing_tree import RoutingTree
 
 
 logger = Logger(child=True)
 
 
+@dataclass(frozen=True)
+class SendOutcome:
+    """Result of one channel send, retries included."""
+
+    channel: str
+    payload: Alert | list[Alert]
+    success: bool
+    attempts: int
+    # Seconds from the first rate-limit wait to the last attempt's end
+    latency: float
+    error: str | None = None
+    # Attempts that failed by timing out
+    timeouts: int = 0
+
+
+class SendListener(Protocol):
+    def on_send(self, outcome: SendOutcome) -> None: ...
+
+
+def _is_timeout(error: Exception) -> bool:
+    return isinstance(error, TimeoutError) or (isinstance(error, DeliveryError) and error.timed_out)
+
+
 class Router:
     def __init__(
         self,
@@ -16,11 +48,84 @@ class Router:
         routing_config: Any,
         default_level: str = "warning",
         max_workers: int = 5,
+        batch_groups: bool = True,
+        executor: Executor | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breakers: CircuitBreakerRegistry | None = None,
+        fallbacks: dict[str, str] | None = None,
+        rate_limiter: RateLimiter | None = None,
+        routing_tree: RoutingTree | None = None,
+        listeners: list[SendListener | None] | None = None,
     ):
         self._channels = {ch.name: ch for ch in channels}
         self._routing_config = routing_config
         self._default_level = default_level
         self._max_workers = max_workers
+        self._batch_groups = batch_groups
+        self._executor = executor
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._breakers = breakers
+        self._fallbacks = fallbacks or {}
+        self._rate_limiter = rate_limiter
+        self._routing_tree = routing_tree
+        self._listeners = [listener for listener in listeners or () if listener is not None]
+        self._receiver_table: MappingProxyType[str, tuple[BaseChannel, ...]] = MappingProxyType({})
+        self._routing_lock = threading.Lock()
+        self._routing_table: MappingProxyType[str, tuple[BaseChannel, ...]] | None = None
+        self._fallback_table: MappingProxyType[str, BaseChannel] = MappingProxyType({})
+
+    def recompile_routing(self, routing_config: Any = None) -> None:
+        """Compile the routing config (optionally replacing it) into a frozen level -> channels table.
+
+        Call after the routing config or a channel's enabled state changes. The new table is
+        swapped in atomically, so routing in progress keeps using the previous one. The first
+        lookup compiles the table, so constructing a router builds no channels.
+        """
+        self._compile_routing(routing_config)
+
+    def _compile_routing(self, routing_config: Any = None) -> MappingProxyType[str, tuple[BaseChannel, ...]]:
+        with self._routing_lock:
+            if routing_config is not None:
+                self._routing_config = routing_config
+
+            levels = [*LEVEL_PRIORITY, self._default_level]
+            if isinstance(self._routing_config, dict):
+                levels.extend(self._routing_config)
+            table = {level: self._compile_level(level) for level in dict.fromkeys(levels)}
+
+            fallbacks = {}
+            for name, fallback_name in self._fallbacks.items():
+                fallback = self._channels.get(fallback_name)
+                if fallback is not None and fallback.is_enabled():
+                    fallbacks[name] = fallback
+
+            receivers = {}
+            if self._routing_tree is not None:
+                for receiver, names in self._routing_tree.receivers.items():
+                    channels = (self._channels.get(name) for name in names)
+                    receivers[receiver] = tuple(ch for ch in channels if ch and ch.is_enabled())
+
+            self._routing_table = MappingProxyType(table)
+            self._fallback_table = MappingProxyType(fallbacks)
+            self._receiver_table = MappingProxyType(receivers)
+            return self._routing_table
+
+    def _compiled_routing(self) -> MappingProxyType[str, tuple[BaseChannel, ...]]:
+        table = self._routing_table
+        # The compiled table is returned rather than re-read, as invalidate_routing may drop it meanwhile
+        return table if table is not None else self._compile_routing()
+
+    def invalidate_routing(self) -> None:
+        """Drop the compiled table; the next lookup recompiles it."""
+        self._routing_table = None
+
+    def _compile_level(self, level: str) -> tuple[BaseChannel, ...]:
+        channels = []
+        for name in self._get_routing_for_level(level):
+            channel = self._channels.get(name)
+            if channel and channel.is_enabled():
+                channels.append(channel)
+        return tuple(channels)
 
     def _get_routing_for_level(self, level: str) -> list[str]:
         if isinstance(self._routing_config, dict):
@@ -42,23 +147,79 @@ class Router:
 
         return []
 
-    def get_target_channels(self, level: str) -> list[BaseChannel]:
-        channel_names = self._get_routing_for_level(level)
-        channels = []
+    def get_target_channels(self, level: str) -> tuple[BaseChannel, ...]:
+        channels = self._compiled_routing().get(level)
+        if channels is None:
+            # A level outside the config (e.g. a custom severity) is compiled on first sight
+            with self._routing_lock:
+                channels = self._compile_level(level)
+                if self._routing_table is not None:
+                    self._routing_table = MappingProxyType({**self._routing_table, level: channels})
+        return channels
 
-        for name in channel_names:
-            channel = self._channels.get(name)
-            if channel and channel.is_enabled():
-                channels.append(channel)
+    def get_channels_for_alert(self, alert: Alert) -> tuple[BaseChannel, ...]:
+        """Channels for an alert: by label matchers when a routing tree is set, else by level."""
+        if self._routing_tree is None:
+            return self.get_target_channels(alert.level)
 
-        return channels
+        self._compiled_routing()
+        receivers = self._routing_tree.match(alert.labels)
+        if len(receivers) == 1:
+            return self._receiver_table.get(receivers[0], ())
+        channels = {ch.name: ch for receiver in receivers for ch in self._receiver_table.get(receiver, ())}
+        return tuple(channels.values())
+
+    def route(self, alert: Alert | list[Alert], deadline: Deadline | None = None) -> dict[str, bool]:
+        jobs = self._plan_jobs(alert)
+        if not jobs:
+            return {}
+
+        return self._collect_results(self._run_jobs(jobs, deadline))
 
-    def route(self, alert: Alert) -> dict[str, bool]:
-        target_channels = self.get_target_channels(alert.level)
+    def route_all(self, groups: list[list[Alert]], deadline: Deadline | None = None) -> list[dict[str, bool]]:
+        if self._executor is None:
+            return [self.route(alerts, deadline) for alerts in groups]
+
+        # Every (payload, channel) send goes to the shared pool at once, so the batch
+        # takes as long as its slowest send rather than the sum of its payloads.
+        planned = [
+            [
+                (ch.name, self._submit_send(self._executor, ch, payload, deadline))
+                for ch, payload in self._plan_jobs(alerts)
+            ]
+            for alerts in groups
+        ]
+        return [
+            self._collect_results([(name, self._future_result(name, future)) for name, future in jobs]) if jobs else {}
+            for jobs in planned
+        ]
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Run ``fn`` on the shared worker pool, or inline when the router has none."""
+        if self._executor is not None:
+            return self._executor.submit(fn, *args)
+
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _plan_jobs(self, alert: Alert | list[Alert]) -> list[tuple[BaseChannel, Alert | list[Alert]]]:
+        return self._add_fallback_jobs(self._plan_target_jobs(alert))
+
+    def _plan_target_jobs(self, alert: Alert | list[Alert]) -> list[tuple[BaseChannel, Alert | list[Alert]]]:
+        if isinstance(alert, list):
+            if len(alert) != 1:
+                return self._plan_group_jobs(alert)
+            alert = alert[0]
+
+        target_channels = self.get_channels_for_alert(alert)
 
         if not target_channels:
             logger.warning("No channels configured for level", extra={"level": alert.level})
-            return {}
+            return []
 
         logger.info(
             "Routing alert",
@@ -69,7 +230,66 @@ class Router:
             },
         )
 
-        results = self._send_parallel(alert, target_channels)
+        return [(ch, alert) for ch in target_channels]
+
+    def _plan_group_jobs(self, alerts: list[Alert]) -> list[tuple[BaseChannel, Alert | list[Alert]]]:
+        # Alerts of one Grafana group may carry different severities, so each channel
+        # receives only the alerts whose level routes to it.
+        channel_alerts: dict[str, list[Alert]] = {}
+        for alert in alerts:
+            for channel in self.get_channels_for_alert(alert):
+                channel_alerts.setdefault(channel.name, []).append(alert)
+
+        if not channel_alerts:
+            logger.warning(
+                "No channels configured for alert group", extra={"levels": sorted({a.level for a in alerts})}
+            )
+            return []
+
+        logger.info(
+            "Routing alert group",
+            extra={
+                "alert_count": len(alerts),
+                "batched": self._batch_groups,
+                "channels": {name: len(group) for name, group in channel_alerts.items()},
+            },
+        )
+
+        if self._batch_groups:
+            return [
+                (self._channels[name], group if len(group) > 1 else group[0]) for name, group in channel_alerts.items()
+            ]
+        return [(self._channels[name], alert) for name, group in channel_alerts.items() for alert in group]
+
+    def _add_fallback_jobs(
+        self, jobs: list[tuple[BaseChannel, Alert | list[Alert]]]
+    ) -> list[tuple[BaseChannel, Alert | list[Alert]]]:
+        if self._breakers is None:
+            return jobs
+        self._compiled_routing()
+        if not self._fallback_table:
+            return jobs
+
+        targeted = {ch.name for ch, _ in jobs}
+        diverted: dict[str, BaseChannel] = {}
+        for name in targeted:
+            fallback = self._fallback_table.get(name)
+            if (
+                fallback is not None
+                and fallback.name not in targeted
+                and self._breakers.get(name).state == CircuitState.OPEN
+            ):
+                logger.warning(
+                    "Circuit open, diverting to fallback channel", extra={"channel": name, "fallback": fallback.name}
+                )
+                diverted[name] = fallback
+
+        return jobs + [(diverted[ch.name], payload) for ch, payload in jobs if ch.name in diverted]
+
+    def _collect_results(self, job_results: list[tuple[str, bool]]) -> dict[str, bool]:
+        results: dict[str, bool] = {}
+        for channel_name, success in job_results:
+            results[channel_name] = results.get(channel_name, True) and success
 
         successful = [ch for ch, success in results.items() if success]
         failed = [ch for ch, success in results.items() if not success]
@@ -81,35 +301,299 @@ class Router:
 
         return results
 
-    def _send_parallel(self, alert: Alert, channels: list[BaseChannel]) -> dict[str, bool]:
-        results: dict[str, bool] = {}
+    def _run_jobs(
+        self, jobs: list[tuple[BaseChannel, Alert | list[Alert]]], deadline: Deadline | None = None
+    ) -> list[tuple[str, bool]]:
+        if self._executor is not None:
+            futures = {self._submit_send(self._executor, ch, payload, deadline): ch.name for ch, payload in jobs}
+            return [(futures[future], self._future_result(futures[future], future)) for future in as_completed(futures)]
 
         with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
-            futures = {executor.submit(self._send_with_retry, ch, alert): ch.name for ch in channels}
+            futures = {self._submit_send(executor, ch, payload, deadline): ch.name for ch, payload in jobs}
+            return [(futures[future], self._future_result(futures[future], future)) for future in as_completed(futures)]
+
+    @staticmethod
+    def _future_result(channel_name: str, future: Future) -> bool:
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error("Exception sending to channel", extra={"channel": channel_name, "error": str(e)})
+            return False
+
+    def _submit_send(
+        self, executor: Executor, channel: BaseChannel, alert: Alert | list[Alert], deadline: Deadline | None = None
+    ) -> Future:
+        """Send ``alert`` to ``channel`` on ``executor``, retries included; the future holds the result."""
+        send = _ScheduledSend(self, executor, channel, alert, deadline)
+        send.start()
+        return send.future
+
+    def _notify(
+        self,
+        channel: BaseChannel,
+        alert: Alert | list[Alert],
+        success: bool,
+        attempts: int,
+        started: float,
+        error: Exception | None = None,
+        timeouts: int = 0,
+    ) -> None:
+        """Report a finished send to the listeners; a failing listener never fails the send."""
+        if not self._listeners:
+            return
+
+        if success:
+            reason = None
+        elif error is not None:
+            reason = str(error)
+        else:
+            reason = "circuit open" if attempts == 0 else "channel returned False"
+        outcome = SendOutcome(channel.name, alert, success, attempts, time.monotonic() - started, reason, timeouts)
+        for listener in self._listeners:
+            try:
+                listener.on_send(outcome)
+            except Exception as e:
+                logger.warning("Send listener failed", extra={"channel": channel.name, "error": str(e)})
+
+    def _reserve_send_slot(self, channel: BaseChannel, deadline: Deadline | None) -> float:
+        """Seconds to wait so the send stays within the channel's and destination's rate limits."""
+        if self._rate_limiter is None:
+            return 0.0
+
+        max_wait = None if deadline is None else max(deadline.remaining() - self._attempt_budget(channel), 0.0)
+        wait = self._rate_limiter.reserve(channel.name, channel.destination, max_wait)
+        if wait is None:
+            # Losing the alert is worse than risking a 429, which the retry policy handles
+            logger.warning("Rate limit wait exceeds deadline, sending now", extra={"channel": channel.name})
+            return 0.0
+        if wait > 0:
+            logger.info("Rate limited, queueing send", extra={"channel": channel.name, "wait": round(wait, 3)})
+        return wait
+
+    def _acquire_shared_slot(self, channel: BaseChannel, deadline: Deadline | None) -> None:
+        if self._rate_limiter is None:
+            return
 
-            for future in as_completed(futures):
-                channel_name = futures[future]
-                try:
-                    results[channel_name] = future.result()
-                except Exception as e:
-                    logger.error("Exception sending to channel", extra={"channel": channel_name, "error": str(e)})
-                    results[channel_name] = False
+        max_wait = 1.0 if deadline is None else max(deadline.remaining() - self._attempt_budget(channel), 0.0)
+        if not self._rate_limiter.acquire_shared(channel.name, channel.destination, max_wait):
+            logger.warning("Shared rate budget exhausted, sending now", extra={"channel": channel.name})
 
+    def _attempt_budget(self, channel: BaseChannel) -> float:
+        """Time one send to ``channel`` may take: its request timeouts, else the policy's budget."""
+        timeout = getattr(channel, "attempt_timeout", None)
+        return timeout if isinstance(timeout, (int, float)) else self._retry_policy.attempt_budget
+
+    def _attempt_allowed(self, channel: BaseChannel) -> bool:
+        if self._breakers is None or self._breakers.get(channel.name).allow_request():
+            return True
+        logger.warning("Circuit open, failing fast", extra={"channel": channel.name})
+        return False
+
+    def _record_attempt(self, channel: BaseChannel, error: Exception | None, sent: bool = False) -> None:
+        if self._breakers is None:
+            return
+        breaker = self._breakers.get(channel.name)
+        if sent:
+            breaker.record_success()
+        elif isinstance(error, DeliveryError) and not error.retryable:
+            # A rejected message says nothing about the channel's health
+            breaker.release_probe()
+        else:
+            breaker.record_failure()
+
+    def _next_delay(
+        self, channel: BaseChannel, attempt: int, error: Exception | None, deadline: Deadline | None
+    ) -> float | None:
+        """Log a failed attempt and return how long to wait before retrying, or None to give up."""
+        retry_after = None
+        if isinstance(error, DeliveryError):
+            if not error.retryable:
+                logger.error(
+                    "Channel failed with non-retryable error",
+                    extra={"channel": channel.name, "attempt": attempt, "error": str(error)},
+                )
+                return None
+            retry_after = error.retry_after
+            logger.warning(
+                "Channel delivery failed",
+                extra={"channel": channel.name, "attempt": attempt, "error": str(error), "retry_after": retry_after},
+            )
+        elif error is not None:
+            logger.warning(
+                "Channel raised exception",
+                extra={"channel": channel.name, "attempt": attempt, "error": str(error)},
+            )
+        else:
+            logger.warning(
+                "Channel returned False",
+                extra={"channel": channel.name, "attempt": attempt, "max_attempts": self._retry_policy.max_attempts},
+            )
+
+        delay = self._retry_policy.next_delay(attempt, retry_after, deadline, self._attempt_budget(channel))
+        if delay is None and attempt < self._retry_policy.max_attempts:
+            logger.warning(
+                "Not retrying channel within deadline",
+                extra={"channel": channel.name, "attempt": attempt, "retry_after": retry_after},
+            )
+        return delay
+
+
+class _ScheduledSend:
+    """One channel send on a worker pool whose rate-limit and backoff waits are timers.
+
+    A waiting send holds no worker, so a throttled channel's backlog cannot hold up the
+    other channels' sends; each attempt is resubmitted to the pool when its wait is over.
+    """
+
+    def __init__(
+        self,
+        router: Router,
+        executor: Executor,
+        channel: BaseChannel,
+        alert: Alert | list[Alert],
+        deadline: Deadline | None,
+    ):
+        self.future: Future = Future()
+        self._router = router
+        self._executor = executor
+        self._channel = channel
+        self._alert = alert
+        self._deadline = deadline
+        self._started = time.monotonic()
+        self._attempt = self._timeouts = 0
+        self._error: Exception | None = None
+
+    def start(self) -> None:
+        self._submit(self._begin_attempt)
+
+    def _begin_attempt(self) -> None:
+        if not self._router._attempt_allowed(self._channel):
+            self._finish(False)
+            return
+        self._attempt += 1
+        self._error = None
+        self._after(self._router._reserve_send_slot(self._channel, self._deadline), self._send)
+
+    def _send(self) -> None:
+        router, channel, alert = self._router, self._channel, self._alert
+        router._acquire_shared_slot(channel, self._deadline)
+        try:
+            if channel.send_batch(alert) if isinstance(alert, list) else channel.send(alert):
+                router._record_attempt(channel, None, sent=True)
+                self._finish(True)
+                return
+        except Exception as e:
+            self._error = e
+            self._timeouts += _is_timeout(e)
+
+        router._record_attempt(channel, self._error)
+        delay = router._next_delay(channel, self._attempt, self._error, self._deadline)
+        if delay is None:
+            self._finish(False)
+            return
+        self._after(delay, self._begin_attempt)
+
+    def _finish(self, success: bool) -> None:
+        self._router._notify(
+            self._channel, self._alert, success, self._attempt, self._started, self._error, self._timeouts
+        )
+        self.future.set_result(success)
+
+    def _after(self, delay: float, step: Callable[[], None]) -> None:
+        if delay <= 0:
+            step()
+            return
+        timer = threading.Timer(delay, self._submit, (step,))
+        timer.daemon = True
+        timer.start()
+
+    def _submit(self, step: Callable[[], None]) -> None:
+        try:
+            self._executor.submit(self._run, step)
+        except Exception as e:
+            self.future.set_exception(e)
+
+    def _run(self, step: Callable[[], None]) -> None:
+        try:
+            step()
+        except Exception as e:
+            if not self.future.done():
+                self.future.set_exception(e)
+
+
+class AsyncRouter(Router):
+    """Router that drives the channel sends of a whole event batch from one event loop.
+
+    The HTTP channels send on the loop itself, so their concurrency is not capped by
+    ``max_workers``; the executor only runs blocking work (AWS Connect's boto3 calls and
+    shared rate limit slots). The loop and executor are created once and reused across warm
+    invocations, so no threads are started per alert.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._executor = self._executor or ThreadPoolExecutor(max_workers=self._max_workers)
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+
+    def route(self, alert: Alert | list[Alert], deadline: Deadline | None = None) -> dict[str, bool]:
+        return self._loop.run_until_complete(self.route_async(alert, deadline))
+
+    def route_all(self, groups: list[list[Alert]], deadline: Deadline | None = None) -> list[dict[str, bool]]:
+        return self._loop.run_until_complete(self.route_all_async(groups, deadline))
+
+    async def route_async(self, alert: Alert | list[Alert], deadline: Deadline | None = None) -> dict[str, bool]:
+        return (await self.route_all_async([alert], deadline))[0]
+
+    async def route_all_async(
+        self, groups: list[Alert | list[Alert]], deadline: Deadline | None = None
+    ) -> list[dict[str, bool]]:
+        planned = [self._plan_jobs(alerts) for alerts in groups]
+        sends = [self._send_with_retry_async(ch, payload, deadline) for jobs in planned for ch, payload in jobs]
+        outcomes = iter(await asyncio.gather(*sends, return_exceptions=True))
+
+        results = []
+        for jobs in planned:
+            job_results = []
+            for channel, _ in jobs:
+                outcome = next(outcomes)
+                if isinstance(outcome, BaseException):
+                    logger.error("Exception sending to channel", extra={"channel": channel.name, "error": str(outcome)})
+                    outcome = False
+                job_results.append((channel.name, outcome))
+            results.append(self._collect_results(job_results) if jobs else {})
         return results
 
-    def _send_with_retry(self, channel: BaseChannel, alert: Alert, max_retries: int = 2) -> bool:
-        for attempt in range(max_retries + 1):
+    async def _send_with_retry_async(
+        self, channel: BaseChannel, alert: Alert | list[Alert], deadline: Deadline | None = None
+    ) -> bool:
+        started = time.monotonic()
+        attempt = timeouts = 0
+        error = None
+        # Breakers and the shared rate limiter may read and write DynamoDB, so they run on the executor
+        loop = asyncio.get_running_loop()
+        breakers = self._breakers is not None
+        while not breakers or await loop.run_in_executor(None, self._attempt_allowed, channel):
+            attempt += 1
+            error = None
+            await asyncio.sleep(self._reserve_send_slot(channel, deadline))
+            if self._rate_limiter is not None:
+                await loop.run_in_executor(None, self._acquire_shared_slot, channel, deadline)
             try:
-                if channel.send(alert):
+                if await (channel.send_batch_async(alert) if isinstance(alert, list) else channel.send_async(alert)):
+                    if breakers:
+                        await loop.run_in_executor(None, self._record_attempt, channel, None, True)
+                    self._notify(channel, alert, True, attempt, started, timeouts=timeouts)
                     return True
-                logger.warning(
-                    "Channel returned False",
-                    extra={"channel": channel.name, "attempt": attempt + 1, "max_retries": max_retries + 1},
-                )
             except Exception as e:
-                logger.warning(
-                    "Channel raised exception",
-                    extra={"channel": channel.name, "attempt": attempt + 1, "error": str(e)},
-                )
+                error = e
+                timeouts += _is_timeout(e)
 
+            if breakers:
+                await loop.run_in_executor(None, self._record_attempt, channel, error)
+            delay = self._next_delay(channel, attempt, error, deadline)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        self._notify(channel, alert, False, attempt, started, error, timeouts)
         return False
@@ -0,0 +1,133 @@
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+
+MATCHER_PATTERN = re.compile(r'^\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*(=~|!~|!=|=)\s*"?(.*?)"?\s*$')
+
+
+class MatchType(str, Enum):
+    EQUAL = "="
+    NOT_EQUAL = "!="
+    REGEX = "=~"
+    NOT_REGEX = "!~"
+
+
+@dataclass(frozen=True)
+class Matcher:
+    """One Alertmanager-style label matcher; a missing label matches as the empty string."""
+
+    name: str
+    type: MatchType
+    value: str
+    regex: re.Pattern | None = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self):
+        if self.type in (MatchType.REGEX, MatchType.NOT_REGEX):
+            # Anchored like Alertmanager's, and compiled once when the tree is built
+            object.__setattr__(self, "regex", re.compile(f"(?:{self.value})"))
+
+    @classmethod
+    def parse(cls, text: str) -> "Matcher":
+        match = MATCHER_PATTERN.match(text)
+        if not match:
+            raise ValueError(f"Invalid matcher: {text!r}")
+        name, operator, value = match.groups()
+        return cls(name=name, type=MatchType(operator), value=value)
+
+    def matches(self, labels: dict[str, str]) -> bool:
+        value = labels.get(self.name, "")
+        if self.type == MatchType.EQUAL:
+            return value == self.value
+        if self.type == MatchType.NOT_EQUAL:
+            return value != self.value
+        matched = self.regex.fullmatch(value) is not None
+        return matched if self.type == MatchType.REGEX else not matched
+
+
+class Route:
+    """A node of the routing tree.
+
+    Children are tried in order and the first match wins unless it sets ``continue``; a
+    matching node whose children all miss routes to its own receiver. Children are indexed
+    by one of their equality matchers, so with thousands of sibling routes only those whose
+    indexed label value equals the alert's (plus the few without an equality matcher) are
+    evaluated.
+    """
+
+    def __init__(
+        self,
+        receiver: str,
+        matchers: list[Matcher] | None = None,
+        routes: list["Route"] | None = None,
+        continue_matching: bool = False,
+    ):
+        self.receiver = receiver
+        self.matchers = tuple(matchers or ())
+        self.routes = list(routes or [])
+        self.continue_matching = continue_matching
+
+        self._index: dict[str, dict[str, list[int]]] = {}
+        self._unindexed: list[int] = []
+        for position, route in enumerate(self.routes):
+            key = next((m for m in route.matchers if m.type == MatchType.EQUAL), None)
+            if key is None:
+                self._unindexed.append(position)
+            else:
+                self._index.setdefault(key.name, {}).setdefault(key.value, []).append(position)
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], parent_receiver: str | None = None) -> "Route":
+        receiver = config.get("receiver") or parent_receiver
+        if not receiver:
+            raise ValueError("The root route must name a receiver")
+        return cls(
+            receiver=receiver,
+            matchers=[Matcher.parse(text) for text in config.get("matchers") or []],
+            routes=[cls.from_config(child, receiver) for child in config.get("routes") or []],
+            continue_matching=bool(config.get("continue", False)),
+        )
+
+    def matches(self, labels: dict[str, str]) -> bool:
+        return all(matcher.matches(labels) for matcher in self.matchers)
+
+    def match(self, labels: dict[str, str]) -> list["Route"]:
+        """The routes an alert that matched this node ends up on."""
+        if not self.routes:
+            return [self]
+
+        matched: list[Route] = []
+        for position in self._candidates(labels):
+            route = self.routes[position]
+            if not route.matches(labels):
+                continue
+            matched.extend(route.match(labels))
+            if not route.continue_matching:
+                break
+        return matched or [self]
+
+    def _candidates(self, labels: dict[str, str]) -> list[int]:
+        candidates = list(self._unindexed)
+        for name, values in self._index.items():
+            candidates.extend(values.get(labels.get(name, ""), ()))
+        if len(candidates) > 1:
+            candidates.sort()
+        return candidates
+
+
+class RoutingTree:
+    """Alertmanager-style label routing: a route tree plus receivers naming the channels."""
+
+    def __init__(self, root: Route, receivers: dict[str, list[str]]):
+        self.root = root
+        self.receivers = {name: tuple(channels or ()) for name, channels in receivers.items()}
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "RoutingTree":
+        return cls(Route.from_config(config.get("route") or {}), config.get("receivers") or {})
+
+    def match(self, labels: dict[str, str]) -> tuple[str, ...]:
+        """Names of the receivers an alert with ``labels`` is routed to, in tree order."""
+        routes = self.root.match(labels) if self.root.matches(labels) else [self.root]
+        return tuple(dict.fromkeys(route.receiver for route in routes))
@@ -0,0 +1,72 @@
+import json
+from collections.abc import Iterator
+from typing import Any
+
+
+try:
+    import orjson
+except ImportError:  # a dependency, but the stdlib fallback keeps environments without it working
+    orjson = None
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except clause covers both backends
+JSONDecodeError = json.JSONDecodeError
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+def loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class BoundedJSON:
+    """Log value that serializes ``obj`` to at most ``limit`` characters, only when emitted.
+
+    The logger calls ``str`` on it while formatting a record, so nothing is serialized for
+    records below the log level. Encoding walks the structure lazily and stops once ``limit``
+    characters are produced; long strings, such as the SNS message embedded in the event, are
+    cut before they are escaped.
+    """
+
+    __slots__ = ("_obj", "_limit")
+
+    def __init__(self, obj: Any, limit: int):
+        self._obj = obj
+        self._limit = limit
+
+    def __str__(self) -> str:
+        chunks = []
+        size = 0
+        for chunk in _iterencode(self._obj, self._limit):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self._limit:
+                break
+        return "".join(chunks)[: self._limit]
+
+    __repr__ = __str__
+
+
+def _iterencode(obj: Any, limit: int) -> Iterator[str]:
+    if isinstance(obj, str):
+        yield _ENCODER.encode(obj[:limit])
+    elif isinstance(obj, dict):
+        yield "{"
+        for position, (key, value) in enumerate(obj.items()):
+            if position:
+                yield ", "
+            yield _ENCODER.encode(str(key)[:limit])
+            yield ": "
+            yield from _iterencode(value, limit)
+        yield "}"
+    elif isinstance(obj, (list, tuple)):
+        yield "["
+        for position, value in enumerate(obj):
+            if position:
+                yield ", "
+            yield from _iterencode(value, limit)
+        yield "]"
+    else:
+        yield _ENCODER.encode(obj)
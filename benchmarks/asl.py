@@ -0,0 +1,720 @@
+"""In-process interpreter for the escalation state machines, on a virtual clock.
+
+Covers the parts of the Amazon States Language the escalation definitions use: Task (plain
+Lambda ARNs, ``lambda:invoke`` and ``lambda:invoke.waitForTaskToken``), Choice, Wait, Pass,
+Succeed and Fail states, inline Map and Parallel states, Parameters/ResultPath/InputPath/
+OutputPath, Catch and Retry, HeartbeatSeconds/TimeoutSeconds. Lambda handlers are called in process; nothing sleeps, Wait
+states and task waits move a virtual clock forward and fire the events scheduled up to then.
+
+The fakes (InMemoryTable, FakeStepFunctions, VirtualConnectClient) implement only the calls and
+expression forms the escalation Lambdas make.
+"""
+
+import copy
+import heapq
+import itertools
+import json
+import re
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Generator
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+
+LAMBDA_INVOKE = "arn:aws:states:::lambda:invoke"
+LAMBDA_INVOKE_WAIT = "arn:aws:states:::lambda:invoke.waitForTaskToken"
+FUNCTION_ARN = "arn:aws:lambda:local:000000000000:function:{}"
+
+
+class VirtualClock:
+    """Simulated time in seconds plus the events scheduled on it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._events: list[tuple[float, int, Callable[[], None]]] = []
+        self._sequence = itertools.count()
+
+    def reset(self) -> None:
+        self.now = 0.0
+        self._events.clear()
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> None:
+        heapq.heappush(self._events, (self.now + delay, next(self._sequence), callback))
+
+    def advance(self, until: float, stop: Callable[[], bool] = lambda: False) -> bool:
+        """Fire events due up to ``until`` in order; returns True if ``stop`` became true first."""
+        while self._events and self._events[0][0] <= until:
+            at, _, callback = heapq.heappop(self._events)
+            self.now = max(self.now, at)
+            callback()
+            if stop():
+                return True
+        self.now = max(self.now, until)
+        return False
+
+
+class StatesError(Exception):
+    def __init__(self, error: str, cause: str = ""):
+        super().__init__(f"{error}: {cause}" if cause else error)
+        self.error = error
+        self.cause = cause
+
+
+@dataclass
+class Execution:
+    status: str = "RUNNING"
+    output: Any = None
+    error: str | None = None
+    cause: str | None = None
+    started_at: float = 0.0
+    stopped_at: float = 0.0
+    # (state name, virtual time entered)
+    history: list[tuple[str, float]] = field(default_factory=list)
+    invocations: Counter = field(default_factory=Counter)
+
+    @property
+    def duration(self) -> float:
+        return self.stopped_at - self.started_at
+
+
+class FakeStepFunctions:
+    """Task-token callbacks (SendTaskSuccess/Failure/Heartbeat) for waitForTaskToken tasks."""
+
+    def __init__(self):
+        self._pending: dict[str, dict[str, Any]] = {}
+
+    def open(self, token: str) -> dict[str, Any]:
+        self._pending[token] = {"done": False, "heartbeats": 0}
+        return self._pending[token]
+
+    def close(self, token: str) -> None:
+        self._pending.pop(token, None)
+
+    def _resolve(self, operation: str, token: str, **result: Any) -> dict:
+        task = self._pending.get(token)
+        if task is None or task["done"]:
+            raise ClientError({"Error": {"Code": "TaskTimedOut", "Message": "Task Timed Out"}}, operation)
+        task.update(result, done=True)
+        return {}
+
+    def send_task_success(self, taskToken: str, output: str) -> dict:
+        return self._resolve("SendTaskSuccess", taskToken, output=json.loads(output))
+
+    def send_task_failure(self, taskToken: str, error: str = "", cause: str = "") -> dict:
+        return self._resolve("SendTaskFailure", taskToken, error=error or "States.TaskFailed", cause=cause)
+
+    def send_task_heartbeat(self, taskToken: str) -> dict:
+        task = self._pending.get(taskToken)
+        if task is None or task["done"]:
+            raise ClientError({"Error": {"Code": "TaskTimedOut", "Message": "Task Timed Out"}}, "SendTaskHeartbeat")
+        task["heartbeats"] += 1
+        return {}
+
+
+class VirtualConnectClient:
+    """Records outbound calls; ``on_call(attributes, phone_number, contact_id)`` reacts to each, e.g. by
+    scheduling an ACK. Stopped contacts are kept in ``stopped``."""
+
+    def __init__(self, clock: VirtualClock, on_call: Callable[[dict, str, str], None] | None = None):
+        self.clock = clock
+        self.on_call = on_call
+        self.calls: list[dict[str, Any]] = []
+        self.stopped: set[str] = set()
+
+    def start_outbound_voice_contact(self, **kwargs) -> dict:
+        contact_id = str(uuid.uuid4())
+        self.calls.append({"at": self.clock.now, "contact_id": contact_id, **kwargs})
+        if self.on_call is not None:
+            self.on_call(kwargs.get("Attributes", {}), kwargs["DestinationPhoneNumber"], contact_id)
+        return {"ContactId": contact_id}
+
+    def stop_contact(self, ContactId: str, InstanceId: str) -> dict:
+        self.stopped.add(ContactId)
+        return {}
+
+
+class ConditionalCheckFailedException(ClientError):
+    def __init__(self, operation: str, item: dict | None = None):
+        response: dict[str, Any] = {"Error": {"Code": "ConditionalCheckFailedException", "Message": "failed"}}
+        if item is not None:
+            response["Item"] = {k: _SERIALIZER.serialize(v) for k, v in item.items()}
+        super().__init__(response, operation)
+
+
+_SERIALIZER = TypeSerializer()
+
+
+class InMemoryTable:
+    """Dict-backed stand-in for a boto3 DynamoDB Table resource with a PK/SK key schema."""
+
+    def __init__(self, name: str = "alerts"):
+        self.name = name
+        self.partitions: dict[str, dict[str, dict[str, Any]]] = {}
+        self.calls: Counter = Counter()
+        exceptions = SimpleNamespace(ConditionalCheckFailedException=ConditionalCheckFailedException)
+        self.meta = SimpleNamespace(client=SimpleNamespace(exceptions=exceptions))
+
+    def _get(self, key: dict[str, Any]) -> dict[str, Any] | None:
+        return self.partitions.get(key["PK"], {}).get(key["SK"])
+
+    def _put(self, item: dict[str, Any]) -> None:
+        self.partitions.setdefault(item["PK"], {})[item["SK"]] = _normalize(item)
+
+    def get_item(self, Key: dict, **kwargs) -> dict:
+        self.calls["GetItem"] += 1
+        item = self._get(Key)
+        return {"Item": copy.deepcopy(item)} if item is not None else {}
+
+    def put_item(self, Item: dict, ConditionExpression: str | None = None, **kwargs) -> dict:
+        self.calls["PutItem"] += 1
+        self._check(ConditionExpression, self._get(Item), kwargs, "PutItem")
+        self._put(copy.deepcopy(Item))
+        return {}
+
+    def delete_item(self, Key: dict, **kwargs) -> dict:
+        self.calls["DeleteItem"] += 1
+        self.partitions.get(Key["PK"], {}).pop(Key["SK"], None)
+        return {}
+
+    def update_item(
+        self,
+        Key: dict,
+        UpdateExpression: str,
+        ConditionExpression: str | None = None,
+        ReturnValues: str = "NONE",
+        **kwargs,
+    ) -> dict:
+        self.calls["UpdateItem"] += 1
+        old = self._get(Key)
+        self._check(ConditionExpression, old, kwargs, "UpdateItem")
+
+        item = copy.deepcopy(old) if old is not None else dict(Key)
+        names = kwargs.get("ExpressionAttributeNames", {})
+        values = kwargs.get("ExpressionAttributeValues", {})
+        for action, clauses in _split_update(UpdateExpression):
+            for clause in clauses:
+                if action == "REMOVE":
+                    item.pop(names.get(clause, clause), None)
+                    continue
+                if action == "ADD":
+                    target, placeholder = clause.split()
+                    name, value = names.get(target, target), values[placeholder]
+                    if name not in item:
+                        item[name] = copy.deepcopy(value)
+                    elif isinstance(value, set):
+                        item[name] = item[name] | value
+                    else:
+                        item[name] = item[name] + Decimal(str(value))
+                    continue
+                target, expression = (part.strip() for part in clause.split("=", 1))
+                item[names.get(target, target)] = self._value(expression, item, names, values)
+        self._put(item)
+
+        if ReturnValues == "ALL_NEW":
+            return {"Attributes": copy.deepcopy(self._get(Key))}
+        if ReturnValues == "ALL_OLD":
+            return {"Attributes": copy.deepcopy(old or {})}
+        return {}
+
+    def query(self, KeyConditionExpression: str, ExpressionAttributeValues: dict, **kwargs) -> dict:
+        self.calls["Query"] += 1
+        names = kwargs.get("ExpressionAttributeNames", {})
+        match = re.search(r"(?:^|\s)(#?\w+)\s*=\s*(:\w+)", KeyConditionExpression)
+        if not match or names.get(match[1], match[1]) != "PK":
+            raise NotImplementedError(f"Query needs an equality condition on PK: {KeyConditionExpression}")
+        partition = self.partitions.get(ExpressionAttributeValues[match[2]], {})
+        items = [
+            item
+            for item in partition.values()
+            if self._evaluate(KeyConditionExpression, item, names, ExpressionAttributeValues)
+        ]
+        items.sort(key=lambda item: item["SK"], reverse=not kwargs.get("ScanIndexForward", True))
+        if kwargs.get("Limit"):
+            items = items[: kwargs["Limit"]]
+        if kwargs.get("Select") == "COUNT":
+            return {"Count": len(items)}
+        return {"Items": copy.deepcopy(items), "Count": len(items)}
+
+    def _check(self, condition: str | None, item: dict | None, kwargs: dict, operation: str) -> None:
+        if not condition:
+            return
+        names = kwargs.get("ExpressionAttributeNames", {})
+        values = kwargs.get("ExpressionAttributeValues", {})
+        if not self._evaluate(condition, item or {}, names, values):
+            returned = item if kwargs.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD" else None
+            raise ConditionalCheckFailedException(operation, returned)
+
+    def _value(self, expression: str, item: dict, names: dict, values: dict) -> Any:
+        expression = expression.strip()
+        match = re.fullmatch(r"if_not_exists\(\s*([#\w.]+)\s*,\s*(:\w+)\s*\)", expression)
+        if match:
+            name = names.get(match[1], match[1])
+            return item[name] if name in item else values[match[2]]
+        for operator in ("+", "-"):
+            if operator in expression:
+                left, right = (self._value(part, item, names, values) for part in expression.split(operator, 1))
+                return left + right if operator == "+" else left - right
+        if expression.startswith(":"):
+            return values[expression]
+        return item.get(names.get(expression, expression))
+
+    def _evaluate(self, expression: str, item: dict, names: dict, values: dict) -> bool:
+        """AND/OR of comparisons, BETWEEN, begins_with and attribute_(not_)exists."""
+        for alternative in re.split(r"\s+OR\s+", expression.strip()):
+            if all(self._term(term, item, names, values) for term in _split_and(alternative)):
+                return True
+        return False
+
+    def _term(self, term: str, item: dict, names: dict, values: dict) -> bool:
+        term = term.strip()
+        if term.startswith("(") and term.endswith(")"):
+            return self._evaluate(term[1:-1], item, names, values)
+        if term.startswith("NOT "):
+            return not self._term(term[4:], item, names, values)
+        match = re.fullmatch(r"(attribute_exists|attribute_not_exists)\(\s*([#\w.]+)\s*\)", term)
+        if match:
+            exists = names.get(match[2], match[2]) in item
+            return exists if match[1] == "attribute_exists" else not exists
+        match = re.fullmatch(r"begins_with\(\s*([#\w.]+)\s*,\s*(:\w+)\s*\)", term)
+        if match:
+            value = item.get(names.get(match[1], match[1]))
+            return isinstance(value, str) and value.startswith(values[match[2]])
+        match = re.fullmatch(r"([#\w.]+)\s+BETWEEN\s+(:\w+)\s+AND\s+(:\w+)", term)
+        if match:
+            value = item.get(names.get(match[1], match[1]))
+            return value is not None and values[match[2]] <= value <= values[match[3]]
+        match = re.fullmatch(r"([#:\w.]+)\s*(=|<>|<=|>=|<|>)\s*([#:\w.]+)", term)
+        if not match:
+            raise NotImplementedError(f"Unsupported expression: {term}")
+        left = self._value(match[1], item, names, values)
+        right = self._value(match[3], item, names, values)
+        if match[2] == "=":
+            return left == right
+        if match[2] == "<>":
+            return left != right
+        if left is None or right is None:
+            return False
+        return {"<": left < right, ">": left > right, "<=": left <= right, ">=": left >= right}[match[2]]
+
+
+def _split_update(expression: str) -> list[tuple[str, list[str]]]:
+    parts = re.split(r"\b(SET|REMOVE|ADD)\b", expression)
+    actions = []
+    for action, body in zip(parts[1::2], parts[2::2]):
+        actions.append((action, [clause.strip() for clause in _split_top_level(body, ",") if clause.strip()]))
+    return actions
+
+
+def _split_top_level(text: str, separator: str) -> list[str]:
+    parts, depth, current = [], 0, []
+    for char in text:
+        depth += char == "("
+        depth -= char == ")"
+        if char == separator and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def _split_and(expression: str) -> list[str]:
+    # BETWEEN ... AND ... is one term
+    terms: list[str] = []
+    for piece in re.split(r"\s+AND\s+", expression):
+        if terms and re.search(r"\bBETWEEN\s+\S+$", terms[-1]):
+            terms[-1] += f" AND {piece}"
+        else:
+            terms.append(piece)
+    return terms
+
+
+def _normalize(item: dict) -> dict:
+    """Numbers come back as Decimal, as from boto3."""
+    return {
+        k: Decimal(str(v)) if isinstance(v, (int, float)) and not isinstance(v, bool) else v for k, v in item.items()
+    }
+
+
+# --- JSONPath (the dotted subset with [n] indexes) ---------------------------------------------
+
+
+def _path_parts(path: str) -> list[str | int]:
+    parts: list[str | int] = []
+    for name, index in re.findall(r"\.([^.\[]+)|\[(\d+)\]", path[1:]):
+        parts.append(int(index) if index else name)
+    return parts
+
+
+def get_path(data: Any, path: str, context: dict | None = None) -> Any:
+    if path.startswith("$$"):
+        data, path = context or {}, path[1:]
+    try:
+        for part in _path_parts(path):
+            data = data[part]
+    except (KeyError, IndexError, TypeError):
+        raise StatesError("States.Runtime", f"Invalid path {path}") from None
+    return data
+
+
+def set_path(data: Any, path: str | None, value: Any) -> Any:
+    if path is None:
+        return data
+    if path == "$":
+        return value
+    data = copy.deepcopy(data) if isinstance(data, dict) else {}
+    target = data
+    parts = _path_parts(path)
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+    return data
+
+
+def resolve_parameters(template: Any, data: Any, context: dict) -> Any:
+    if isinstance(template, dict):
+        resolved = {}
+        for key, value in template.items():
+            if key.endswith(".$"):
+                if not value.startswith("$"):
+                    raise NotImplementedError(f"Intrinsic functions are not supported: {value}")
+                resolved[key[:-2]] = get_path(data, value, context)
+            else:
+                resolved[key] = resolve_parameters(value, data, context)
+        return resolved
+    if isinstance(template, list):
+        return [resolve_parameters(value, data, context) for value in template]
+    return template
+
+
+# --- Choice rules ---------------------------------------------------------------------------------
+
+_COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "Equals": lambda a, b: a == b,
+    "LessThan": lambda a, b: a < b,
+    "GreaterThan": lambda a, b: a > b,
+    "LessThanEquals": lambda a, b: a <= b,
+    "GreaterThanEquals": lambda a, b: a >= b,
+}
+_TYPES = {"String": str, "Numeric": (int, float, Decimal), "Boolean": bool, "Timestamp": str}
+
+
+def evaluate_rule(rule: dict, data: Any, context: dict) -> bool:
+    if "And" in rule:
+        return all(evaluate_rule(r, data, context) for r in rule["And"])
+    if "Or" in rule:
+        return any(evaluate_rule(r, data, context) for r in rule["Or"])
+    if "Not" in rule:
+        return not evaluate_rule(rule["Not"], data, context)
+
+    try:
+        value = get_path(data, rule["Variable"], context)
+        present = True
+    except StatesError:
+        value, present = None, False
+    if "IsPresent" in rule:
+        return present == rule["IsPresent"]
+    if "IsNull" in rule:
+        return present and (value is None) == rule["IsNull"]
+
+    for key, expected in rule.items():
+        match = re.fullmatch(r"(String|Numeric|Boolean|Timestamp)(\w+?)(Path)?", key)
+        if not match or match[2] not in _COMPARISONS:
+            continue
+        kind, comparison, is_path = match.groups()
+        if is_path:
+            expected = get_path(data, expected, context)
+        if not present or not isinstance(value, _TYPES[kind]) or (kind == "Numeric" and isinstance(value, bool)):
+            return False
+        return _COMPARISONS[comparison](value, expected)
+    raise NotImplementedError(f"Unsupported choice rule: {rule}")
+
+
+# --- Interpreter ----------------------------------------------------------------------------------
+
+
+class LocalContext:
+    """Minimal LambdaContext for the Powertools decorators on the handlers."""
+
+    def __init__(self, function_name: str, clock: VirtualClock, timeout: float = 30.0):
+        self.function_name = function_name
+        self.memory_limit_in_mb = 256
+        self.invoked_function_arn = FUNCTION_ARN.format(function_name)
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = clock.now + timeout
+        self._clock = clock
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int((self._deadline - self._clock.now) * 1000)
+
+
+@dataclass
+class Wait:
+    """Yielded by a running branch: resume it at ``until`` or as soon as ``ready()`` holds."""
+
+    until: float
+    ready: Callable[[], bool] = lambda: False
+
+
+class StateMachine:
+    """Runs one state machine definition against in-process Lambda handlers.
+
+    ``functions`` maps each DefinitionSubstitutions name (``MakeCallFunctionArn``, ...) to
+    the handler to invoke for it. ``task_latency`` is the virtual time a Lambda task takes.
+
+    States run as generators that yield a Wait whenever they would block, so Map and Parallel
+    branches wait concurrently on the one virtual clock.
+    """
+
+    def __init__(
+        self,
+        definition: str,
+        functions: dict[str, Callable[[dict, Any], Any]],
+        clock: VirtualClock,
+        stepfunctions: FakeStepFunctions | None = None,
+        task_latency: float = 0.0,
+    ):
+        substitutions = {name: FUNCTION_ARN.format(name) for name in functions}
+        self.definition = json.loads(re.sub(r"\$\{(\w+)\}", lambda m: substitutions.get(m[1], m[0]), definition))
+        self.functions = {FUNCTION_ARN.format(name): (name, handler) for name, handler in functions.items()}
+        self.clock = clock
+        self.stepfunctions = stepfunctions or FakeStepFunctions()
+        self.task_latency = task_latency
+
+    def run(self, execution_input: Any) -> Execution:
+        execution = Execution(started_at=self.clock.now)
+        context = {
+            "Execution": {"Id": str(uuid.uuid4()), "Input": execution_input, "StartTime": self.clock.now},
+            "State": {},
+        }
+        branch = self._run_states(self.definition, execution_input, context, execution)
+        try:
+            wait = next(branch)
+            while True:
+                if not wait.ready():
+                    if wait.until == float("inf"):
+                        raise NotImplementedError("Execution is waiting without a deadline")
+                    self.clock.advance(wait.until, stop=wait.ready)
+                wait = branch.send(None)
+        except StopIteration as e:
+            execution.output = e.value
+            execution.status = "SUCCEEDED"
+        except StatesError as e:
+            execution.status = "FAILED"
+            execution.error, execution.cause = e.error, e.cause
+        execution.stopped_at = self.clock.now
+        return execution
+
+    def _run_states(self, machine: dict, data: Any, context: dict, execution: Execution) -> Generator[Wait, None, Any]:
+        name = machine["StartAt"]
+        while True:
+            state = machine["States"][name]
+            execution.history.append((name, self.clock.now))
+            context["State"] = {"Name": name, "EnteredTime": self.clock.now}
+            kind = state["Type"]
+
+            if kind == "Succeed":
+                return self._output(state, self._input(state, data, context))
+            if kind == "Fail":
+                raise StatesError(state.get("Error", "States.Fail"), state.get("Cause", ""))
+
+            effective = self._input(state, data, context)
+            if kind == "Choice":
+                name = next(
+                    (rule["Next"] for rule in state["Choices"] if evaluate_rule(rule, effective, context)),
+                    state.get("Default"),
+                )
+                if name is None:
+                    raise StatesError("States.NoChoiceMatched", f"No choice matched in {context['State']['Name']}")
+                data = self._output(state, effective)
+                continue
+
+            try:
+                if kind == "Pass":
+                    result = (
+                        resolve_parameters(state["Parameters"], effective, context) if "Parameters" in state else None
+                    )
+                    result = state.get("Result", result if result is not None else effective)
+                elif kind == "Wait":
+                    yield from self._sleep(self._wait_seconds(state, effective, context))
+                    result = effective
+                elif kind == "Task":
+                    result = yield from self._task_with_retry(state, effective, context, execution)
+                elif kind == "Map":
+                    result = yield from self._map(state, effective, context, execution)
+                elif kind == "Parallel":
+                    branches = [
+                        self._run_states(branch, effective, self._child_context(context), execution)
+                        for branch in state["Branches"]
+                    ]
+                    result = yield from self._gather(branches)
+                else:
+                    raise NotImplementedError(f"Unsupported state type: {kind}")
+            except StatesError as e:
+                catcher = next((c for c in state.get("Catch", []) if _matches(e.error, c["ErrorEquals"])), None)
+                if catcher is None:
+                    raise
+                data = set_path(data, catcher.get("ResultPath", "$"), {"Error": e.error, "Cause": e.cause})
+                name = catcher["Next"]
+                continue
+
+            if kind != "Wait":
+                if "ResultSelector" in state:
+                    result = resolve_parameters(state["ResultSelector"], result, context)
+                data = set_path(data, state.get("ResultPath", "$"), result)
+            else:
+                data = effective
+            data = self._output(state, data)
+            if state.get("End"):
+                return data
+            name = state["Next"]
+
+    @staticmethod
+    def _input(state: dict, data: Any, context: dict) -> Any:
+        if "InputPath" in state:
+            return get_path(data, state["InputPath"], context) if state["InputPath"] is not None else {}
+        return data
+
+    @staticmethod
+    def _output(state: dict, data: Any) -> Any:
+        if "OutputPath" in state:
+            return get_path(data, state["OutputPath"]) if state["OutputPath"] is not None else {}
+        return data
+
+    @staticmethod
+    def _child_context(context: dict, **extra: Any) -> dict:
+        return {"Execution": context["Execution"], "State": {}, **extra}
+
+    def _sleep(self, seconds: float) -> Generator[Wait, None, None]:
+        if seconds > 0:
+            yield Wait(self.clock.now + seconds)
+
+    def _wait_seconds(self, state: dict, data: Any, context: dict) -> float:
+        if "Seconds" in state:
+            return float(state["Seconds"])
+        if "SecondsPath" in state:
+            return float(get_path(data, state["SecondsPath"], context))
+        raise NotImplementedError("Only Seconds and SecondsPath waits are supported")
+
+    def _map(self, state: dict, data: Any, context: dict, execution: Execution) -> Generator[Wait, None, list]:
+        items = get_path(data, state.get("ItemsPath", "$"), context)
+        if not isinstance(items, list):
+            raise StatesError("States.Runtime", "Map items are not an array")
+        processor = state.get("ItemProcessor") or state["Iterator"]
+        selector = state.get("ItemSelector", state.get("Parameters"))
+        branches = []
+        for index, item in enumerate(items):
+            child = self._child_context(context, Map={"Item": {"Index": index, "Value": item}})
+            value = resolve_parameters(selector, data, child) if selector is not None else item
+            branches.append(self._run_states(processor, value, child, execution))
+        return (yield from self._gather(branches, state.get("MaxConcurrency", 0)))
+
+    def _gather(self, branches: list[Generator], max_concurrency: int = 0) -> Generator[Wait, None, list]:
+        """Run branches side by side; the first failure stops the others, like Map and Parallel."""
+        results: list[Any] = [None] * len(branches)
+        queue = list(enumerate(branches))
+        waiting: dict[int, tuple[Generator, Wait]] = {}
+
+        def step(index: int, branch: Generator) -> None:
+            try:
+                waiting[index] = (branch, next(branch) if index not in waiting else branch.send(None))
+            except StopIteration as e:
+                waiting.pop(index, None)
+                results[index] = e.value
+
+        try:
+            while queue or waiting:
+                while queue and (not max_concurrency or len(waiting) < max_concurrency):
+                    step(*queue.pop(0))
+                if not waiting:
+                    continue
+                waits = [wait for _, wait in waiting.values()]
+                yield Wait(min(wait.until for wait in waits), lambda: any(wait.ready() for wait in waits))
+                for index, (branch, wait) in list(waiting.items()):
+                    if wait.ready() or self.clock.now >= wait.until:
+                        step(index, branch)
+        finally:
+            for branch, _ in waiting.values():
+                branch.close()
+        return results
+
+    def _task_with_retry(
+        self, state: dict, data: Any, context: dict, execution: Execution
+    ) -> Generator[Wait, None, Any]:
+        attempts: Counter = Counter()
+        while True:
+            try:
+                return (yield from self._task(state, data, context, execution))
+            except StatesError as e:
+                retrier = next((r for r in state.get("Retry", []) if _matches(e.error, r["ErrorEquals"])), None)
+                if retrier is None:
+                    raise
+                index = state["Retry"].index(retrier)
+                if attempts[index] >= retrier.get("MaxAttempts", 3):
+                    raise
+                delay = retrier.get("IntervalSeconds", 1) * retrier.get("BackoffRate", 2.0) ** attempts[index]
+                attempts[index] += 1
+                yield from self._sleep(delay)
+
+    def _task(self, state: dict, data: Any, context: dict, execution: Execution) -> Generator[Wait, None, Any]:
+        resource = state["Resource"]
+        if resource == LAMBDA_INVOKE_WAIT:
+            token = str(uuid.uuid4())
+            context["Task"] = {"Token": token}
+            parameters = resolve_parameters(state["Parameters"], data, context)
+            task = self.stepfunctions.open(token)
+            try:
+                yield from self._invoke(parameters["FunctionName"], parameters.get("Payload", data), execution)
+                return (yield from self._wait_for_token(state, task))
+            finally:
+                self.stepfunctions.close(token)
+                context.pop("Task", None)
+
+        parameters = resolve_parameters(state["Parameters"], data, context) if "Parameters" in state else data
+        if resource == LAMBDA_INVOKE:
+            payload = yield from self._invoke(parameters["FunctionName"], parameters.get("Payload", data), execution)
+            return {"Payload": payload, "StatusCode": 200}
+        return (yield from self._invoke(resource, parameters, execution))
+
+    def _invoke(self, arn: str, payload: Any, execution: Execution) -> Generator[Wait, None, Any]:
+        if arn not in self.functions:
+            raise StatesError("States.TaskFailed", f"No local handler for {arn}")
+        name, handler = self.functions[arn]
+        execution.invocations[name] += 1
+        yield from self._sleep(self.task_latency)
+        try:
+            # Round-trip through JSON like the Lambda service does
+            return json.loads(json.dumps(handler(copy.deepcopy(payload), LocalContext(name, self.clock)), default=str))
+        except Exception as e:
+            raise StatesError(type(e).__name__, str(e)) from e
+
+    def _wait_for_token(self, state: dict, task: dict) -> Generator[Wait, None, Any]:
+        timeout = state.get("TimeoutSeconds")
+        heartbeat = state.get("HeartbeatSeconds")
+        if not timeout and not heartbeat:
+            raise NotImplementedError("waitForTaskToken tasks need TimeoutSeconds or HeartbeatSeconds")
+        deadline = self.clock.now + timeout if timeout else float("inf")
+        while True:
+            heartbeats = task["heartbeats"]
+            limit = min(deadline, self.clock.now + heartbeat if heartbeat else float("inf"))
+            yield Wait(limit, lambda: task["done"] or task["heartbeats"] != heartbeats)
+            if task["done"]:
+                if "error" in task:
+                    raise StatesError(task["error"], task.get("cause", ""))
+                return task["output"]
+            if task["heartbeats"] == heartbeats and self.clock.now >= limit:
+                raise StatesError("States.Timeout" if limit == deadline else "States.HeartbeatTimeout")
+
+
+def _matches(error: str, names: list[str]) -> bool:
+    if "States.ALL" in names or error in names:
+        return True
+    if error == "States.HeartbeatTimeout" and "States.Timeout" in names:
+        return True
+    return "States.TaskFailed" in names and not error.startswith("States.") and error != "States.Timeout"
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Microbenchmark of SNS payload decoding, Alert construction and log serialization.
+
+Compares the current decode path (orjson, one validation call per group, cached timestamp
+parsing) against a reference copy of the previous one (json.loads, validated construction
+per alert, replace + fromisoformat per timestamp). The "stage" columns time everything
+the handler does per SNS record before routing: decoding, the two log serializations
+(eager json.dumps()[:n] before, BoundedJSON rendered at INFO now) and construction.
+
+Usage (from the repository root):
+
+    python benchmarks/decode.py --alerts 10 100 1000
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from synthetic import build_group  # noqa: E402
+
+from channels.base import Alert  # noqa: E402
+from serialization import BoundedJSON, loads, orjson  # noqa: E402
+
+
+def previous_from_grafana_group(payload: dict) -> list[Alert]:
+    """The decode path before the fast path, kept here as the reference."""
+    alerts = []
+    grouped = len(payload["alerts"]) > 1
+    for alert_data in payload["alerts"]:
+        labels = alert_data.get("labels", {})
+        annotations = alert_data.get("annotations", {})
+        severity = labels.get("severity", "warning").lower()
+        if severity not in ("error", "warning", "info"):
+            severity = "warning"
+        starts_at = ends_at = None
+        if alert_data.get("startsAt"):
+            starts_at = datetime.fromisoformat(alert_data["startsAt"].replace("Z", "+00:00"))
+        if alert_data.get("endsAt") and alert_data["endsAt"] != "0001-01-01T00:00:00Z":
+            ends_at = datetime.fromisoformat(alert_data["endsAt"].replace("Z", "+00:00"))
+        if grouped:
+            title = labels.get("alertname") or payload.get("title", "Unknown Alert")
+            message = annotations.get("summary") or payload.get("message", "")
+            status = alert_data.get("status") or payload.get("status", "firing")
+        else:
+            title = payload.get("title", labels.get("alertname", "Unknown Alert"))
+            message = payload.get("message", annotations.get("summary", ""))
+            status = payload.get("status", alert_data.get("status", "firing"))
+        alerts.append(
+            Alert(
+                title=title,
+                message=message,
+                level=severity,
+                status=status,
+                labels=labels,
+                annotations=annotations,
+                dashboard_url=alert_data.get("dashboardURL", ""),
+                panel_url=alert_data.get("panelURL", ""),
+                value_string=alert_data.get("valueString", ""),
+                fingerprint=alert_data.get("fingerprint", ""),
+                starts_at=starts_at,
+                ends_at=ends_at,
+            )
+        )
+    return alerts
+
+
+def best_of(fn, number: int) -> float:
+    """Best per-call time in microseconds over five repeats."""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, nargs="+", default=[10, 100, 1000], help="alerts per group")
+    args = parser.parse_args()
+
+    print(f"JSON backend: {'orjson ' + orjson.__version__ if orjson else 'json'}\n")
+    print(
+        f"{'alerts':>8}{'build prev us':>15}{'build now us':>14}{'speedup':>9}"
+        f"{'stage prev us':>15}{'stage now us':>14}{'speedup':>9}"
+    )
+    for count in args.alerts:
+        message = json.dumps(build_group(count, error_fraction=0.1))
+        event = {"Records": [{"EventSource": "aws:sns", "Sns": {"Message": message}}]}
+        payload = json.loads(message)
+        number = max(1, 20000 // count)
+
+        def previous_stage():
+            json.dumps(event)[:1000]
+            decoded = json.loads(message)
+            json.dumps(decoded)[:500]
+            return previous_from_grafana_group(decoded)
+
+        def current_stage():
+            str(BoundedJSON(event, 1000))
+            decoded = loads(message)
+            str(BoundedJSON(decoded, 500))
+            return Alert.from_grafana_group(decoded)
+
+        build_previous = best_of(lambda: previous_from_grafana_group(payload), number)
+        build_current = best_of(lambda: Alert.from_grafana_group(payload), number)
+        stage_previous = best_of(previous_stage, number)
+        stage_current = best_of(current_stage, number)
+
+        print(
+            f"{count:>8}{build_previous:>15.1f}{build_current:>14.1f}{build_previous / build_current:>8.1f}x"
+            f"{stage_previous:>15.1f}{stage_current:>14.1f}{stage_previous / stage_current:>8.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+"""Simulate escalations through the state machine definitions on a virtual clock.
+
+Each escalation runs ``statemachine/escalation.asl.json`` (polling ACK),
+``escalation_callback.asl.json`` (task-token ACK) and/or ``escalation_parallel.asl.json``
+(ring groups per ``--policy`` step) through the local interpreter in asl.py, calling the
+escalation, on-call and ACK handlers in process against an in-memory alerts table. Every placed
+call is answered with probability ``--answer-rate`` after a uniformly drawn delay; the ACK
+handler then runs at that virtual time, as Amazon Connect would invoke it. Calls the ACK handler
+stopped are never answered.
+
+Reported per definition:
+
+    ack        escalations acknowledged / exhausted
+    ttack      time from start to the first ACK (virtual seconds)
+    lag        time the execution kept running after the ACK
+    calls      outbound calls per escalation
+    lambdas    Lambda invocations per escalation (ACK handler excluded)
+    ddb        alerts table requests per escalation (ACK handler included)
+
+Usage (from the repository root):
+
+    python benchmarks/escalation_sim.py --escalations 5000
+    python benchmarks/escalation_sim.py --answer-rate 0.3 --ack-delay 20 120 --mode callback
+    python benchmarks/escalation_sim.py --mode parallel --policy "1,2;all"
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from unittest import mock
+
+from asl import FakeStepFunctions, InMemoryTable, LocalContext, StateMachine, VirtualClock, VirtualConnectClient
+from stages import percentile
+
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "app"
+DEFINITIONS = {
+    "polling": ROOT / "statemachine" / "escalation.asl.json",
+    "callback": ROOT / "statemachine" / "escalation_callback.asl.json",
+    "parallel": ROOT / "statemachine" / "escalation_parallel.asl.json",
+}
+ROSTER = [
+    {"name": "Alice", "phone": "+15550000001"},
+    {"name": "Bob", "phone": "+15550000002"},
+    {"name": "Carol", "phone": "+15550000003"},
+]
+ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "POWERTOOLS_TRACE_DISABLED": "true",
+    "AWS_CONNECT_INSTANCE_ID": "sim-instance",
+    "AWS_CONNECT_CONTACT_FLOW_ID": "sim-flow",
+    "AWS_CONNECT_SOURCE_PHONE": "+15550000000",
+}
+
+
+@dataclass
+class Outcome:
+    acked: bool
+    duration: float
+    time_to_ack: float | None
+    calls: int
+    invocations: int
+    table_calls: int
+
+    @property
+    def lag(self) -> float | None:
+        return None if self.time_to_ack is None else self.duration - self.time_to_ack
+
+
+class EscalationSimulator:
+    """Wires the escalation handlers to in-memory fakes; use as a context manager.
+
+    Handler modules keep their boto3 clients in module globals, which are patched for the
+    lifetime of the context.
+    """
+
+    def __init__(
+        self,
+        definition: str,
+        answer_rate: float = 0.6,
+        ack_delay: tuple[float, float] = (10.0, 90.0),
+        task_latency: float = 0.2,
+        seed: int = 0,
+        policy: str | None = None,
+    ):
+        self.answer_rate = answer_rate
+        self.ack_delay = ack_delay
+        self.rng = random.Random(seed)
+        self.clock = VirtualClock()
+        self.table = InMemoryTable()
+        self.stepfunctions = FakeStepFunctions()
+        self.connect = VirtualConnectClient(self.clock, self._on_call)
+        self._definition = definition
+        self._task_latency = task_latency
+        self._policy = policy
+        self._first_ack: dict[str, float] = {}
+        self._stack = ExitStack()
+
+        self.table.put_item(Item={"PK": "ONCALL#rotation", "SK": "CURRENT", "current_index": 0})
+        for order, member in enumerate(ROSTER, start=1):
+            self.table.put_item(Item={"PK": "ONCALL#roster", "SK": f"MEMBER#{order}", "order": order, **member})
+
+    def __enter__(self) -> "EscalationSimulator":
+        if str(APP_DIR) not in sys.path:
+            sys.path.insert(0, str(APP_DIR))
+        self._stack.enter_context(mock.patch.dict(os.environ, ENVIRONMENT))
+
+        from ack_handler import handler as ack_handler
+        from escalation import call, check_ack, escalate, start
+        from oncall import get_handler, service
+
+        for module in (start, check_ack, escalate, service):
+            self._stack.enter_context(mock.patch.object(module, "table", self.table))
+        service.materialize_schedule(current_index=0, version=1)
+        service.invalidate_cache()
+        for module, name, fake in (
+            (call, "table", self.table),
+            (call, "connect", self.connect),
+            (call, "stepfunctions", self.stepfunctions),
+            (ack_handler, "table", self.table),
+            (ack_handler, "dynamodb", self.table),
+            (ack_handler, "stepfunctions", self.stepfunctions),
+            (ack_handler, "_connect_client", self.connect),
+        ):
+            self._stack.enter_context(mock.patch.object(module, name, fake))
+
+        self._ack_handler = ack_handler.lambda_handler
+        self.machine = StateMachine(
+            self._definition,
+            {
+                "StartEscalationFunctionArn": start.lambda_handler,
+                "GetOnCallFunctionArn": get_handler.lambda_handler,
+                "MakeCallFunctionArn": call.lambda_handler,
+                "CheckAckFunctionArn": check_ack.lambda_handler,
+                "EscalateFunctionArn": escalate.lambda_handler,
+            },
+            self.clock,
+            self.stepfunctions,
+            task_latency=self._task_latency,
+        )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stack.close()
+
+    def _on_call(self, attributes: dict, phone_number: str, contact_id: str) -> None:
+        if self.rng.random() < self.answer_rate:
+            delay = self.rng.uniform(*self.ack_delay)
+            self.clock.schedule(delay, lambda: self._acknowledge(attributes["alert_id"], phone_number, contact_id))
+
+    def _acknowledge(self, alert_id: str, phone_number: str, contact_id: str) -> None:
+        if contact_id in self.connect.stopped:
+            return
+        self._first_ack.setdefault(alert_id, self.clock.now)
+        attributes = {"alert_id": alert_id, "acked_by": phone_number}
+        event = {"Details": {"ContactData": {"ContactId": contact_id, "Attributes": attributes}}}
+        self._ack_handler(event, LocalContext("AckHandler", self.clock))
+
+    def run(self, alert_id: str) -> Outcome:
+        """Run one escalation from virtual time zero; ACKs still pending when it ends are dropped."""
+        self.clock.reset()
+        calls_before = len(self.connect.calls)
+        table_calls_before = self.table.calls.total()
+        execution_input = {"fingerprint": alert_id, "alert_title": f"Simulated alert {alert_id}"}
+        if self._policy:
+            execution_input["policy"] = self._policy
+        execution = self.machine.run(execution_input)
+        if execution.status == "FAILED" and execution.error not in ("EscalationExhausted", "NoOnCallFound"):
+            raise RuntimeError(f"Escalation {alert_id} failed: {execution.error}: {execution.cause}")
+        return Outcome(
+            acked=execution.status == "SUCCEEDED",
+            duration=execution.duration,
+            time_to_ack=self._first_ack.get(alert_id),
+            calls=len(self.connect.calls) - calls_before,
+            invocations=sum(execution.invocations.values()),
+            table_calls=self.table.calls.total() - table_calls_before,
+        )
+
+
+def summarize(name: str, outcomes: list[Outcome], wall: float) -> str:
+    acked = [o for o in outcomes if o.acked]
+    ttack = sorted(o.time_to_ack for o in acked)
+    lag = sorted(o.lag for o in acked)
+    count = len(outcomes)
+    return (
+        f"{name:<10}{len(acked):>7}/{count - len(acked):<7}"
+        f"{percentile(ttack, 50):>8.1f}{percentile(ttack, 95):>8.1f}"
+        f"{percentile(lag, 50):>8.1f}{percentile(lag, 95):>8.1f}"
+        f"{sum(o.calls for o in outcomes) / count:>8.2f}"
+        f"{sum(o.invocations for o in outcomes) / count:>9.2f}"
+        f"{sum(o.table_calls for o in outcomes) / count:>7.2f}"
+        f"{wall:>9.2f}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalations", type=int, default=1000)
+    parser.add_argument("--mode", choices=["all", *DEFINITIONS], default="all")
+    parser.add_argument("--answer-rate", type=float, default=0.6, help="probability that a call is acknowledged")
+    parser.add_argument("--ack-delay", type=float, nargs=2, default=[10.0, 90.0], metavar=("MIN", "MAX"))
+    parser.add_argument("--task-latency", type=float, default=0.2, help="virtual seconds per Lambda task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy", help='escalation policy for the parallel mode, e.g. "1,2;all" (default 1;2;3)')
+    parser.add_argument("--log-level", default="CRITICAL", help="Powertools log level inside the handlers")
+    args = parser.parse_args()
+
+    # Loggers read the level when the handler modules are imported
+    os.environ["POWERTOOLS_LOG_LEVEL"] = args.log_level
+    os.environ.setdefault("AWS_DEFAULT_REGION", ENVIRONMENT["AWS_DEFAULT_REGION"])
+
+    modes = list(DEFINITIONS) if args.mode == "all" else [args.mode]
+    print(
+        f"{'mode':<10}{'ack/exhausted':<15}{'ttack50':>8}{'ttack95':>8}{'lag50':>8}{'lag95':>8}"
+        f"{'calls':>8}{'lambdas':>9}{'ddb':>7}{'wall s':>9}"
+    )
+    for mode in modes:
+        simulator = EscalationSimulator(
+            DEFINITIONS[mode].read_text(),
+            answer_rate=args.answer_rate,
+            ack_delay=tuple(args.ack_delay),
+            task_latency=args.task_latency,
+            seed=args.seed,
+            policy=args.policy,
+        )
+        with simulator:
+            started = time.perf_counter()
+            outcomes = [simulator.run(f"sim-{i}") for i in range(args.escalations)]
+            wall = time.perf_counter() - started
+        print(summarize(mode, outcomes, wall))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
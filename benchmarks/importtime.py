@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""Import-time profile of a Lambda entrypoint, built on ``python -X importtime``.
+
+Imports the handler module in fresh interpreters (what a cold start pays before the first
+invocation), takes the median per module over ``--runs`` and reports the total, the heaviest
+modules and the first-party modules. Results can be saved to and compared against
+``benchmarks/importtime_baseline.json`` to track cold-start regressions.
+
+Usage (from the repository root):
+
+    python benchmarks/importtime.py
+    python benchmarks/importtime.py --module digest_handler --top 30
+    python benchmarks/importtime.py --save
+    python benchmarks/importtime.py --compare   # exit 1 if the total grew past --tolerance
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "app"
+BASELINE_PATH = Path(__file__).resolve().parent / "importtime_baseline.json"
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="handler", help="entrypoint module inside app/")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to sample")
+    parser.add_argument("--top", type=int, default=20, help="heaviest modules to list")
+    parser.add_argument("--tracing", action="store_true", help="keep X-Ray tracing enabled, as deployed")
+    parser.add_argument("--save", action="store_true", help=f"save results to {BASELINE_PATH.name}")
+    parser.add_argument("--compare", action="store_true", help=f"compare against {BASELINE_PATH.name}")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed total regression ratio for --compare")
+    return parser.parse_args()
+
+
+def first_party_modules() -> set[str]:
+    return {path.stem if path.is_file() else path.name for path in APP_DIR.iterdir() if not path.name.startswith("_")}
+
+
+def sample(module: str, tracing: bool) -> dict[str, dict]:
+    """One cold import; returns self and cumulative microseconds per imported module."""
+    env = {**os.environ, "AWS_DEFAULT_REGION": os.environ.get("AWS_DEFAULT_REGION", "us-east-1")}
+    if not tracing:
+        env["POWERTOOLS_TRACE_DISABLED"] = "true"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # A module is listed after everything it imported, so children are attributed to the
+    # next shallower entry that follows them.
+    modules = {}
+    pending: list[list[str]] = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = len(indent) // 2
+        modules[name] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": depth, "parent": None}
+
+        while len(pending) <= depth + 1:
+            pending.append([])
+        for child in pending[depth + 1]:
+            modules[child]["parent"] = name
+        pending[depth + 1] = []
+        pending[depth].append(name)
+    return modules
+
+
+def profile(module: str, runs: int, tracing: bool) -> dict:
+    samples = [sample(module, tracing) for _ in range(runs)]
+    names = set().union(*samples)
+    modules = {}
+    for name in names:
+        present = [s[name] for s in samples if name in s]
+        modules[name] = {
+            "self_ms": round(statistics.median(m["self_us"] for m in present) / 1000, 3),
+            "cumulative_ms": round(statistics.median(m["cumulative_us"] for m in present) / 1000, 3),
+            "depth": present[0]["depth"],
+            "parent": present[0]["parent"],
+        }
+
+    total = statistics.median(sum(m["self_us"] for m in s.values()) for s in samples) / 1000
+    return {"module": module, "runs": runs, "tracing": tracing, "total_ms": round(total, 3), "modules": modules}
+
+
+def print_report(results: dict, top: int) -> None:
+    modules = results["modules"]
+    print(f"import {results['module']}: {results['total_ms']:.1f} ms (median of {results['runs']} runs)")
+
+    print(f"\n{'imported by ' + results['module']:<50}{'cumulative ms':>15}")
+    direct = [m for m in modules.items() if m[1]["parent"] == results["module"]]
+    for name, stats in sorted(direct, key=lambda m: -m[1]["cumulative_ms"])[:top]:
+        print(f"{name:<50}{stats['cumulative_ms']:>15.2f}")
+
+    print(f"\n{'heaviest module (self)':<50}{'self ms':>15}")
+    for name, stats in sorted(modules.items(), key=lambda m: -m[1]["self_ms"])[:top]:
+        print(f"{name:<50}{stats['self_ms']:>15.2f}")
+
+    first_party = first_party_modules()
+    print(f"\n{'first-party module':<50}{'self ms':>15}{'cumulative ms':>15}")
+    for name, stats in sorted(modules.items()):
+        if name.split(".")[0] in first_party:
+            print(f"{name:<50}{stats['self_ms']:>15.2f}{stats['cumulative_ms']:>15.2f}")
+
+
+def baseline_record(results: dict) -> dict:
+    """Keeps first-party modules and those costing at least 1 ms; every module name for diffs."""
+    first_party = first_party_modules()
+    modules = {
+        name: stats
+        for name, stats in results["modules"].items()
+        if stats["cumulative_ms"] >= 1 or name.split(".")[0] in first_party
+    }
+    return {**results, "modules": modules, "imported": sorted(results["modules"])}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """True if the total import time grew by more than ``tolerance``."""
+    change = results["total_ms"] / baseline["total_ms"] - 1
+    print(f"\ntotal {baseline['total_ms']:.1f} -> {results['total_ms']:.1f} ms ({change:+.1%})")
+
+    added = sorted(set(results["modules"]) - set(baseline["imported"]))
+    if added:
+        print(f"newly imported: {', '.join(added[:20])}{' ...' if len(added) > 20 else ''}")
+    return change > tolerance
+
+
+def main() -> int:
+    args = parse_args()
+    results = profile(args.module, args.runs, args.tracing)
+    print_report(results, args.top)
+
+    if args.compare:
+        if not BASELINE_PATH.exists():
+            print(f"no baseline at {BASELINE_PATH}", file=sys.stderr)
+            return 1
+        if compare(results, json.loads(BASELINE_PATH.read_text()), args.tolerance):
+            print(f"import time regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+            return 1
+
+    if args.save:
+        BASELINE_PATH.write_text(json.dumps(baseline_record(results), indent=2, sort_keys=True) + "\n")
+        print(f"saved {BASELINE_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Per-alert routing cost of the label-matcher routing tree as the rule count grows.
+
+Builds a root with N sibling routes, each keyed by an equality matcher on ``service`` plus
+a mix of negation and regex matchers, and a fixed handful of regex-only routes. Compares the
+indexed tree against evaluating every route in order.
+
+Usage (from the repository root):
+
+    python benchmarks/routing_tree.py --rules 10 100 1000 10000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from routing_tree import Route  # noqa: E402
+
+
+def build_root(rules: int, regex_rules: int, rng: random.Random) -> Route:
+    routes = []
+    for i in range(rules):
+        matchers = [f'service="svc-{i}"']
+        if rng.random() < 0.5:
+            matchers.append('env!="staging"')
+        if rng.random() < 0.2:
+            matchers.append(f'instance=~"{rng.choice(["node-.*", "db-[0-9]+", "web|api"])}"')
+        routes.append({"matchers": matchers, "receiver": f"team-{i % 50}"})
+    for i in range(regex_rules):
+        routes.insert(rng.randrange(len(routes) + 1), {"matchers": [f'team=~"ops-{i}.*"'], "receiver": "ops"})
+    return Route.from_config({"receiver": "default", "routes": routes})
+
+
+def linear_match(root: Route, labels: dict[str, str]) -> list[Route]:
+    for route in root.routes:
+        if route.matches(labels):
+            return [route]
+    return [root]
+
+
+def time_per_alert(fn, root: Route, alerts: list[dict[str, str]]) -> float:
+    started = time.perf_counter()
+    for labels in alerts:
+        fn(root, labels)
+    return (time.perf_counter() - started) / len(alerts) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--regex-rules", type=int, default=10, help="routes with only a regex matcher")
+    parser.add_argument("--alerts", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'rules':>8}{'indexed us/alert':>20}{'linear us/alert':>20}{'speedup':>10}")
+    for rules in args.rules:
+        root = build_root(rules, args.regex_rules, rng)
+        alerts = [
+            {
+                "service": f"svc-{rng.randrange(rules * 2)}",
+                "env": rng.choice(["prod", "staging"]),
+                "instance": rng.choice(["node-1", "db-7", "web"]),
+            }
+            for _ in range(args.alerts)
+        ]
+        indexed = time_per_alert(Route.match, root, alerts)
+        linear = time_per_alert(linear_match, root, alerts)
+        print(f"{rules:>8}{indexed:>20.2f}{linear:>20.2f}{linear / indexed:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
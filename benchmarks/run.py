@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+"""End-to-end throughput and latency benchmark for ``handler.lambda_handler``.
+
+Slack and Telegram are served by local stub HTTP servers with configurable latency and
+error rate; Step Functions and DynamoDB are mocked with moto and Amazon Connect is faked in
+process. Each stage is timed by wrapping the functions that implement it:
+
+    parse     parse_sns_event, Alert.from_grafana_group
+    route     Router.route_all (includes render and send)
+    render    channel payload/message formatters
+    send      channel HTTP posts and Connect calls (includes retries)
+    escalate  start_escalation
+    invocation  the whole lambda_handler call
+
+Usage (from the repository root):
+
+    python benchmarks/run.py --records 10 --alerts 20 --iterations 50
+    python benchmarks/run.py --save       # write benchmarks/baseline.json
+    python benchmarks/run.py --compare    # exit 1 if a stage's p95 regressed past --tolerance
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from stages import StageTimer
+from stub_servers import FakeConnectClient, slack_stub, telegram_stub
+from synthetic import build_sns_event
+
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "app"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+REGION = "us-east-1"
+TABLE_NAME = "bench-alerts"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10, help="SNS records per event")
+    parser.add_argument("--alerts", type=int, default=20, help="alerts per Grafana group")
+    parser.add_argument("--iterations", type=int, default=30, help="events to process")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed events processed first")
+    parser.add_argument("--engine", default="pool", choices=["thread", "pool", "asyncio"])
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--slack-latency-ms", type=float, default=50)
+    parser.add_argument("--telegram-latency-ms", type=float, default=80)
+    parser.add_argument("--connect-latency-ms", type=float, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub HTTP requests failing with 503")
+    parser.add_argument("--error-fraction", type=float, default=0.1, help="fraction of alerts with severity=error")
+    parser.add_argument("--batch-groups", choices=["true", "false"], default="true")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the configured rate limits enabled")
+    parser.add_argument("--log-level", default="CRITICAL", help="Powertools log level inside the handler")
+    parser.add_argument("--save", action="store_true", help=f"save results to {BASELINE_PATH.name}")
+    parser.add_argument("--compare", action="store_true", help=f"compare against {BASELINE_PATH.name}")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 regression ratio for --compare")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace, slack_url: str, state_machine_arn: str) -> None:
+    """The container reads config.yaml placeholders from the environment when handler is imported."""
+    os.environ.update(
+        {
+            "AWS_DEFAULT_REGION": REGION,
+            "POWERTOOLS_TRACE_DISABLED": "true",
+            "POWERTOOLS_METRICS_DISABLED": "true",
+            "POWERTOOLS_LOG_LEVEL": args.log_level,
+            "TELEGRAM_ENABLED": "true",
+            "TELEGRAM_BOT_TOKEN": "bench-token",
+            "TELEGRAM_CHAT_ID": "1000",
+            "SLACK_ENABLED": "true",
+            "SLACK_WEBHOOK_URL": f"{slack_url}/services/bench",
+            "AWS_CONNECT_ENABLED": "true",
+            "AWS_CONNECT_INSTANCE_ID": "bench-instance",
+            "AWS_CONNECT_CONTACT_FLOW_ID": "bench-flow",
+            "AWS_CONNECT_SOURCE_PHONE": "+15550000000",
+            "AWS_CONNECT_DESTINATION_PHONE": "+15550000001",
+            "ESCALATION_ENABLED": "true",
+            "ESCALATION_TRIGGER_LEVELS": "error",
+            "ESCALATION_STATE_MACHINE_ARN": state_machine_arn,
+            "ALERTS_TABLE_NAME": TABLE_NAME,
+            "CIRCUIT_BREAKER_SHARED_STATE": "true",
+            "IDEMPOTENCY_SHARED_STATE": "true",
+            "RATE_LIMITS_ENABLED": "true" if args.rate_limits else "false",
+            "DELIVERY_ENGINE": args.engine,
+            "DELIVERY_MAX_WORKERS": str(args.workers),
+            "DELIVERY_BATCH_GROUPS": args.batch_groups,
+        }
+    )
+
+
+def create_aws_resources() -> str:
+    import boto3
+
+    boto3.resource("dynamodb", region_name=REGION).create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "PK", "KeyType": "HASH"}, {"AttributeName": "SK", "KeyType": "RANGE"}],
+        AttributeDefinitions=[
+            {"AttributeName": "PK", "AttributeType": "S"},
+            {"AttributeName": "SK", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    definition = (ROOT / "statemachine" / "escalation.asl.json").read_text()
+    response = boto3.client("stepfunctions", region_name=REGION).create_state_machine(
+        name="bench-escalation",
+        definition=definition,
+        roleArn="arn:aws:iam::123456789012:role/bench-escalation",
+    )
+    return response["stateMachineArn"]
+
+
+def lambda_context(timeout_ms: int = 30000) -> MagicMock:
+    context = MagicMock()
+    context.function_name = "alert-broadcaster-bench"
+    context.memory_limit_in_mb = 256
+    context.invoked_function_arn = f"arn:aws:lambda:{REGION}:123456789012:function:alert-broadcaster-bench"
+    context.aws_request_id = "bench"
+    context.get_remaining_time_in_millis.return_value = timeout_ms
+    return context
+
+
+def run(args: argparse.Namespace) -> dict:
+    from moto import mock_aws
+
+    for key in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(key, "testing")
+
+    with (
+        mock_aws(),
+        slack_stub(args.slack_latency_ms / 1000, args.error_rate) as slack,
+        telegram_stub(args.telegram_latency_ms / 1000, args.error_rate) as telegram,
+    ):
+        os.environ["AWS_DEFAULT_REGION"] = REGION
+        configure_environment(args, slack.url, create_aws_resources())
+
+        os.chdir(APP_DIR)
+        sys.path.insert(0, str(APP_DIR))
+        import handler
+        from channels import AWSConnectChannel, SlackChannel, TelegramChannel
+        from channels.base import Alert
+
+        TelegramChannel.TELEGRAM_API_BASE = f"{telegram.url}/bot"
+        connect = FakeConnectClient(args.connect_latency_ms / 1000)
+        handler.container.aws_connect_channel().channel._connect_client = connect
+        router_cls = type(handler.container.router())
+
+        targets = [
+            (handler, "parse_sns_event", "parse"),
+            (Alert, "from_grafana_group", "parse"),
+            (router_cls, "route_all", "route"),
+            (SlackChannel, "_build_payload", "render"),
+            (SlackChannel, "_build_digest_payload", "render"),
+            (TelegramChannel, "_format_message", "render"),
+            (TelegramChannel, "_format_digest", "render"),
+            (AWSConnectChannel, "_build_attributes", "render"),
+            (SlackChannel, "_post", "send"),
+            (TelegramChannel, "_post", "send"),
+            (connect, "start_outbound_voice_contact", "send"),
+            (handler, "start_escalation", "escalate"),
+        ]
+
+        context = lambda_context()
+        for _ in range(args.warmup):
+            handler.lambda_handler(build_sns_event(args.records, args.alerts, args.error_fraction), context)
+
+        events = [build_sns_event(args.records, args.alerts, args.error_fraction) for _ in range(args.iterations)]
+        timer = StageTimer()
+        status_codes: dict[str, int] = {}
+        with timer.instrument(targets):
+            started = time.perf_counter()
+            for event in events:
+                invoked = time.perf_counter()
+                response = handler.lambda_handler(event, context)
+                timer.record("invocation", time.perf_counter() - invoked)
+                status_codes[str(response["statusCode"])] = status_codes.get(str(response["statusCode"]), 0) + 1
+            elapsed = time.perf_counter() - started
+
+    alerts = args.records * args.alerts * args.iterations
+    return {
+        "parameters": {
+            key: getattr(args, key)
+            for key in (
+                "records",
+                "alerts",
+                "iterations",
+                "engine",
+                "workers",
+                "slack_latency_ms",
+                "telegram_latency_ms",
+                "connect_latency_ms",
+                "error_rate",
+                "error_fraction",
+                "batch_groups",
+                "rate_limits",
+            )
+        },
+        "environment": {"python": platform.python_version(), "machine": platform.machine()},
+        "throughput": {
+            "elapsed_s": round(elapsed, 3),
+            "invocations_per_s": round(args.iterations / elapsed, 2),
+            "alerts_per_s": round(alerts / elapsed, 2),
+        },
+        "requests": {"slack": slack.requests, "telegram": telegram.requests, "aws_connect": connect.requests},
+        "status_codes": status_codes,
+        "stages": timer.report(),
+    }
+
+
+def print_report(results: dict) -> None:
+    throughput = results["throughput"]
+    print(
+        f"{results['parameters']['iterations']} invocations in {throughput['elapsed_s']}s: "
+        f"{throughput['invocations_per_s']} invocations/s, {throughput['alerts_per_s']} alerts/s"
+    )
+    print(f"requests: {results['requests']}  status codes: {results['status_codes']}")
+    print(f"{'stage':<12}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'total ms':>14}")
+    for stage, stats in results["stages"].items():
+        print(
+            f"{stage:<12}{stats['count']:>8}{stats['p50_ms']:>12.3f}{stats['p95_ms']:>12.3f}"
+            f"{stats['p99_ms']:>12.3f}{stats['total_ms']:>14.3f}"
+        )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Stages whose p95 grew by more than ``tolerance`` relative to the baseline."""
+    if baseline.get("parameters") != results["parameters"]:
+        print("warning: baseline was recorded with different parameters", file=sys.stderr)
+
+    regressions = []
+    for stage, stats in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or not before["p95_ms"]:
+            continue
+        change = stats["p95_ms"] / before["p95_ms"] - 1
+        print(f"{stage:<12} p95 {before['p95_ms']:.3f} -> {stats['p95_ms']:.3f} ms ({change:+.1%})")
+        if change > tolerance:
+            regressions.append(stage)
+    return regressions
+
+
+def main() -> int:
+    args = parse_args()
+    results = run(args)
+    print_report(results)
+
+    if args.compare:
+        if not BASELINE_PATH.exists():
+            print(f"no baseline at {BASELINE_PATH}", file=sys.stderr)
+            return 1
+        regressions = compare(results, json.loads(BASELINE_PATH.read_text()), args.tolerance)
+        if regressions:
+            print(f"p95 regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+
+    if args.save:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"saved {BASELINE_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
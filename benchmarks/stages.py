@@ -0,0 +1,66 @@
+"""Per-stage timings collected by wrapping the functions that implement each stage."""
+
+import functools
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def record(self, stage: str, seconds: float) -> None:
+        # list.append is atomic, so worker threads can record without a lock
+        self.samples[stage].append(seconds)
+
+    @contextmanager
+    def instrument(self, targets: list[tuple[Any, str, str]]) -> Iterator["StageTimer"]:
+        """Time every call of ``owner.attr`` as ``stage`` for each (owner, attr, stage) while active."""
+        originals = []
+        for owner, attr, stage in targets:
+            original = vars(owner)[attr] if isinstance(owner, type) else getattr(owner, attr)
+            originals.append((owner, attr, original))
+            setattr(owner, attr, self._wrap(original, stage))
+        try:
+            yield self
+        finally:
+            for owner, attr, original in reversed(originals):
+                setattr(owner, attr, original)
+
+    def _wrap(self, original: Any, stage: str) -> Any:
+        if isinstance(original, (classmethod, staticmethod)):
+            return type(original)(self._wrap(original.__func__, stage))
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        return timed
+
+    def report(self) -> dict[str, dict[str, float]]:
+        report = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            report[stage] = {
+                "count": len(ordered),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+                "total_ms": round(sum(ordered) * 1000, 3),
+            }
+        return report
@@ -0,0 +1,80 @@
+"""Local stand-ins for the Slack webhook, the Telegram Bot API and Amazon Connect."""
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """Answers every POST after ``latency`` seconds, failing with 503 at ``error_rate``."""
+
+    def __init__(self, body: bytes, content_type: str, latency: float = 0.0, error_rate: float = 0.0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(stub.latency)
+                stub.requests += 1
+
+                if random.random() < stub.error_rate:
+                    status, payload = 503, b"unavailable"
+                else:
+                    status, payload = 200, stub.body
+                self.send_response(status)
+                self.send_header("Content-Type", stub.content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.body = body
+        self.content_type = content_type
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def slack_stub(latency: float = 0.0, error_rate: float = 0.0) -> StubServer:
+    return StubServer(b"ok", "text/plain", latency, error_rate)
+
+
+def telegram_stub(latency: float = 0.0, error_rate: float = 0.0) -> StubServer:
+    body = json.dumps({"ok": True, "result": {"message_id": 1}}).encode()
+    return StubServer(body, "application/json", latency, error_rate)
+
+
+class FakeConnectClient:
+    """moto does not implement StartOutboundVoiceContact, so Connect is simulated in process."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+
+    def start_outbound_voice_contact(self, **kwargs) -> dict:
+        time.sleep(self.latency)
+        self.requests += 1
+        return {"ContactId": str(uuid.uuid4())}
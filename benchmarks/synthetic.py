@@ -0,0 +1,67 @@
+"""Synthetic SNS events carrying Grafana unified-alerting groups."""
+
+import itertools
+import json
+import random
+from datetime import datetime, timezone
+
+
+ALERT_NAMES = ["HighCPU", "HighMemory", "DiskFull", "HighLatency", "ErrorRate", "PodRestarts"]
+JOBS = ["node", "api", "worker", "db"]
+
+_sequence = itertools.count()
+
+
+def build_alert(name: str, job: str, severity: str) -> dict:
+    seq = next(_sequence)
+    return {
+        "status": "firing",
+        "labels": {
+            "alertname": name,
+            "job": job,
+            "severity": severity,
+            "instance": f"{job}-{seq % 1000:03d}",
+        },
+        "annotations": {"summary": f"{name} on {job}-{seq % 1000:03d}"},
+        "startsAt": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "endsAt": "0001-01-01T00:00:00Z",
+        "dashboardURL": f"http://grafana/d/{job}",
+        "valueString": f"[ var='A' value={random.uniform(0, 100):.2f} ]",
+        # Unique per alert so the deduplicator never drops benchmark traffic
+        "fingerprint": f"bench{seq:012x}",
+    }
+
+
+def build_group(alerts: int, error_fraction: float) -> dict:
+    name = random.choice(ALERT_NAMES)
+    job = random.choice(JOBS)
+    members = [
+        build_alert(name, job, "error" if random.random() < error_fraction else "warning") for _ in range(alerts)
+    ]
+    return {
+        "receiver": "sns",
+        "status": "firing",
+        "title": f"[FIRING:{alerts}] {name}",
+        "message": f"{alerts} alerts firing for {name}",
+        "groupLabels": {"alertname": name},
+        "commonLabels": {"alertname": name, "job": job},
+        "alerts": members,
+    }
+
+
+def build_sns_event(records: int, alerts_per_group: int, error_fraction: float = 0.0) -> dict:
+    """An SNS event with ``records`` records, each a Grafana group of ``alerts_per_group`` alerts."""
+    return {
+        "Records": [
+            {
+                "EventSource": "aws:sns",
+                "EventSubscriptionArn": "arn:aws:sns:us-east-1:123456789012:grafana-alerts-bench:bench",
+                "Sns": {
+                    "Type": "Notification",
+                    "MessageId": f"bench-{next(_sequence)}",
+                    "Message": json.dumps(build_group(alerts_per_group, error_fraction)),
+                },
+            }
+            for _ in range(records)
+        ]
+    }
@@ -12,13 +12,20 @@ def seed_oncall(table_name: str):
         {"PK": "ONCALL#roster", "SK": "MEMBER#1", "name": "홍길동", "phone": "+821012345678", "order": 1},
         {"PK": "ONCALL#roster", "SK": "MEMBER#2", "name": "김철수", "phone": "+821087654321", "order": 2},
         {"PK": "ONCALL#roster", "SK": "MEMBER#3", "name": "이영희", "phone": "+821011112222", "order": 3},
-        {"PK": "ONCALL#rotation", "SK": "CURRENT", "current_index": 0},
     ]
 
+    rotation = table.get_item(Key={"PK": "ONCALL#rotation", "SK": "CURRENT"}).get("Item", {})
+    version = int(rotation.get("version", 0)) + 1
+    items.append({"PK": "ONCALL#rotation", "SK": "CURRENT", "current_index": 0, "version": version})
+
     with table.batch_writer() as batch:
         for item in items:
             batch.put_item(Item=item)
             print(f"Added: {item['PK']} / {item['SK']}")
+        # The materialized schedule was built from the old roster; until the next rotation
+        # GetOnCall resolves from the rotation pointer and roster instead
+        batch.delete_item(Key={"PK": "ONCALL#schedule", "SK": "ROTATION"})
+        print("Removed: ONCALL#schedule / ROTATION")
 
     print("Done!")
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import boto3
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from oncall.service import KST, override_item  # noqa: E402
+
+
+def parse_time(value: str) -> datetime:
+    """ISO 8601 date or datetime; without an offset it is taken as KST."""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=KST)
+
+
+def set_override(table_name: str, level: int, start: str, end: str, name: str, phone: str):
+    table = boto3.resource("dynamodb").Table(table_name)
+    item = override_item(level, parse_time(start), parse_time(end), name, phone)
+    table.put_item(Item=item)
+    print(f"Added: {item['PK']} / {item['SK']}")
+
+
+def migrate_daily_overrides(table_name: str):
+    """Convert ONCALL#override DATE#<date>#LEVEL#<level> items into one-day intervals (KST days)."""
+    table = boto3.resource("dynamodb").Table(table_name)
+    kwargs = {
+        "KeyConditionExpression": "PK = :pk AND begins_with(SK, :sk)",
+        "ExpressionAttributeValues": {":pk": "ONCALL#override", ":sk": "DATE#"},
+    }
+    with table.batch_writer() as batch:
+        while True:
+            response = table.query(**kwargs)
+            for legacy in response.get("Items", []):
+                _, date, _, level = legacy["SK"].split("#")
+                starts_at = datetime.fromisoformat(date).replace(tzinfo=KST)
+                item = override_item(
+                    int(level), starts_at, starts_at + timedelta(days=1), legacy.get("name", "Unknown"), legacy["phone"]
+                )
+                item["active"] = legacy.get("active", True)
+                batch.put_item(Item=item)
+                batch.delete_item(Key={"PK": legacy["PK"], "SK": legacy["SK"]})
+                print(f"Migrated: {legacy['SK']} -> {item['SK']}")
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    print("Done!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--migrate-daily", action="store_true", help="convert per-date override items")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--start", help="e.g. 2026-07-01 or 2026-07-01T09:00 (KST unless an offset is given)")
+    parser.add_argument("--end", help="exclusive end, same format as --start")
+    parser.add_argument("--name")
+    parser.add_argument("--phone")
+    args = parser.parse_args()
+
+    if args.migrate_daily:
+        migrate_daily_overrides(args.table)
+    elif not all([args.start, args.end, args.phone]):
+        parser.error("--start, --end and --phone are required")
+    else:
+        set_override(args.table, args.level, args.start, args.end, args.name or "Unknown", args.phone)
@@ -132,3 +132,19 @@ class TestAWSConnectChannel:
         assert "firing" in message.lower()
         assert "error" in message.lower()
         assert "Critical Alert" in message
+
+    @patch("channels.aws_connect.boto3.client")
+    def test_client_created_on_first_send(self, mock_boto_client, sample_alert):
+        channel = AWSConnectChannel(
+            enabled=True,
+            instance_id="instance-id",
+            contact_flow_id="flow-id",
+            source_phone_number="+15551234567",
+            destination_phone_number="+15559876543",
+        )
+        mock_boto_client.assert_not_called()
+
+        channel.send(sample_alert)
+        channel.send(sample_alert)
+
+        mock_boto_client.assert_called_once_with("connect")
@@ -1,3 +1,8 @@
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import ValidationError
+
 from channels.base import Alert
 
 
@@ -91,3 +96,104 @@ class TestAlert:
         assert alert.title == "Unknown Alert"
         assert alert.level == "warning"
         assert alert.status == "alerting"
+
+    def test_from_grafana_group_returns_every_alert(self):
+        payload = {
+            "status": "firing",
+            "title": "[FIRING:3] HighCPU",
+            "alerts": [
+                {
+                    "status": "firing",
+                    "labels": {"alertname": "HighCPU", "severity": "warning", "instance": f"server-0{i}"},
+                    "annotations": {"summary": f"CPU high on server-0{i}"},
+                    "fingerprint": f"fp{i}",
+                }
+                for i in range(3)
+            ],
+        }
+
+        alerts = Alert.from_grafana_group(payload)
+
+        assert len(alerts) == 3
+        assert [a.fingerprint for a in alerts] == ["fp0", "fp1", "fp2"]
+        assert alerts[1].title == "HighCPU"
+        assert alerts[1].message == "CPU high on server-01"
+        assert alerts[2].labels["instance"] == "server-02"
+
+    def test_group_validation_matches_construction(self, sample_grafana_payload):
+        payload = {**sample_grafana_payload, "alerts": sample_grafana_payload["alerts"] * 2}
+
+        alerts = Alert.from_grafana_group(payload)
+
+        assert alerts[0] == Alert(**alerts[0].model_dump())
+        assert alerts[0].starts_at == datetime(2024, 1, 15, 10, 0, tzinfo=timezone.utc)
+        assert alerts[0].ends_at is None
+        assert alerts[0].model_fields_set == set(Alert.model_fields)
+
+    def test_invalid_payload_is_rejected(self):
+        payload = {"alerts": [{"labels": {"alertname": "Disk", "severity": "error", "replicas": 3}}]}
+
+        with pytest.raises(ValidationError):
+            Alert.from_grafana_group(payload)
+
+    def test_unparseable_timestamp_is_dropped(self):
+        alerts = Alert.from_grafana_group({"alerts": [{"labels": {"alertname": "A"}, "startsAt": "yesterday"}]})
+
+        assert alerts[0].starts_at is None
+
+    def test_from_grafana_group_legacy_payload(self):
+        alerts = Alert.from_grafana_group({"title": "Legacy Alert", "state": "alerting"})
+
+        assert len(alerts) == 1
+        assert alerts[0].title == "Legacy Alert"
+
+    def test_summarize_single_alert_is_identity(self):
+        alert = Alert(title="Only Alert")
+
+        assert Alert.summarize([alert]) is alert
+
+    def test_summarize_empty_group(self):
+        summary = Alert.summarize([])
+
+        assert summary.title == "[RESOLVED:0] No alerts"
+        assert summary.status == "resolved"
+
+    def test_summarize_group(self):
+        alerts = [
+            Alert(
+                title="HighCPU",
+                level="warning",
+                status="firing",
+                labels={"alertname": "HighCPU", "instance": "server-01"},
+                value_string="91",
+            ),
+            Alert(
+                title="HighCPU",
+                level="error",
+                status="firing",
+                labels={"alertname": "HighCPU", "instance": "server-02"},
+            ),
+            Alert(
+                title="HighCPU",
+                level="warning",
+                status="resolved",
+                labels={"alertname": "HighCPU", "instance": "server-03"},
+            ),
+        ]
+
+        summary = Alert.summarize(alerts)
+
+        assert summary.title == "[FIRING:2] HighCPU"
+        assert summary.level == "error"
+        assert summary.status == "firing"
+        assert summary.labels == {"alertname": "HighCPU"}
+        assert "[FIRING] HighCPU (instance=server-01): 91" in summary.message
+        assert "[RESOLVED] HighCPU (instance=server-03)" in summary.message
+
+    def test_summarize_truncates_long_groups(self):
+        alerts = [Alert(title="Disk", labels={"instance": str(i)}) for i in range(25)]
+
+        summary = Alert.summarize(alerts, max_lines=20)
+
+        assert summary.message.count("\n") == 20
+        assert summary.message.endswith("... and 5 more")
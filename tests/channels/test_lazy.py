@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from channels.base import Alert, DeliveryError
+from channels.lazy import LazyChannel, deferred
+
+
+class TestLazyChannel:
+    def test_disabled_channel_is_never_built(self):
+        factory = MagicMock()
+        channel = LazyChannel(name="slack", enabled=False, factory=factory)
+
+        assert channel.name == "slack"
+        assert channel.is_enabled() is False
+        factory.assert_not_called()
+
+    def test_channel_built_once_on_first_use(self):
+        inner = MagicMock()
+        inner.is_enabled.return_value = True
+        inner.send.return_value = True
+        factory = MagicMock(return_value=inner)
+        channel = LazyChannel(name="slack", enabled=True, factory=factory)
+
+        assert channel.is_enabled() is True
+        assert channel.send(Alert(title="Test")) is True
+        assert channel.send_batch([Alert(title="A"), Alert(title="B")]) is inner.send_batch.return_value
+
+        factory.assert_called_once_with()
+
+    def test_is_enabled_does_not_build_the_channel(self):
+        factory = MagicMock()
+        channel = LazyChannel(name="slack", enabled=True, factory=factory)
+
+        assert channel.is_enabled() is True
+        factory.assert_not_called()
+
+    def test_unconfigured_channel_rejects_sends(self):
+        inner = MagicMock()
+        inner.is_enabled.return_value = False
+        channel = LazyChannel(name="slack", enabled=True, factory=MagicMock(return_value=inner))
+
+        with pytest.raises(DeliveryError) as exc_info:
+            channel.send(Alert(title="Test"))
+
+        assert exc_info.value.retryable is False
+        inner.send.assert_not_called()
+
+    def test_deferred_imports_on_call(self):
+        create = deferred("collections", "OrderedDict")
+        assert create(a=1) == {"a": 1}
@@ -0,0 +1,123 @@
+import pytest
+
+from channels.base import Alert
+from channels.rendering import RenderCache, Template, compile_templates, escape_markdown
+
+
+class TestTemplate:
+    def test_renders_fields_and_drops_empty_sections(self):
+        template = Template(["*{title}*", "", "Message: {message}", "Value: {value}"])
+
+        assert template.render({"title": "Disk", "message": "", "value": "91%"}) == "*Disk*\n\nValue: 91%"
+
+    def test_section_kept_when_any_field_is_filled(self):
+        template = Template("{status_emoji} {title}")
+
+        assert template.render({"status_emoji": "🔴", "title": ""}) == "🔴 "
+
+    def test_label_and_annotation_fields(self):
+        template = Template(["{label.instance}", "{annotation.runbook}", "{label.missing}"], separator=" | ")
+
+        rendered = template.render({"label": {"instance": "db-1"}, "annotation": {"runbook": "http://wiki"}})
+
+        assert rendered == "db-1 | http://wiki"
+
+    def test_format_spec_and_escaped_braces(self):
+        assert Template("{{{level:>7}}}").render({"level": "error"}) == "{  error}"
+
+    def test_conversions_are_rejected(self):
+        with pytest.raises(ValueError):
+            Template("{title!r}")
+
+
+class TestCompileTemplates:
+    def test_overrides_replace_defaults(self):
+        templates = compile_templates({"header": "{title}", "body": "{message}"}, {"header": "[{level}] {title}"})
+
+        assert templates["header"].render({"title": "Disk", "level": "error"}) == "[error] Disk"
+        assert templates["body"].render({"message": "full"}) == "full"
+
+    def test_unknown_override_raises(self):
+        with pytest.raises(ValueError, match="footer"):
+            compile_templates({"header": "{title}"}, {"footer": "{title}"})
+
+
+def test_escape_markdown_matches_per_character_replace():
+    text = "a_b*c[d]e(f)g~h`i>j#k+l-m=n|o{p}q.r!s\\t"
+
+    expected = text
+    for char in "_*[]()~`>#+-=|{}.!":
+        expected = expected.replace(char, f"\\{char}")
+
+    assert escape_markdown(text) == expected
+
+
+class TestRenderCache:
+    def test_reuses_rendering_for_the_same_alert(self):
+        cache = RenderCache()
+        alert = Alert(title="Disk", fingerprint="fp1")
+        calls = []
+
+        def render(a):
+            calls.append(a)
+            return b"body"
+
+        assert cache.get_or_render("slack", alert, render) == b"body"
+        assert cache.get_or_render("slack", alert.model_copy(), render) == b"body"
+        assert len(calls) == 1
+
+    def test_key_includes_status_and_channel(self):
+        cache = RenderCache()
+        firing = Alert(title="Disk", fingerprint="fp1")
+        resolved = Alert(title="Disk", fingerprint="fp1", status="resolved")
+
+        assert cache.get_or_render("slack", firing, lambda a: a.status) == "firing"
+        assert cache.get_or_render("slack", resolved, lambda a: a.status) == "resolved"
+        assert cache.get_or_render("telegram", firing, lambda a: "telegram") == "telegram"
+        assert len(cache) == 3
+
+    def test_changed_alert_is_rendered_again(self):
+        cache = RenderCache()
+        cache.get_or_render(
+            "slack", Alert(title="Disk", fingerprint="fp1", value_string="91"), lambda a: a.value_string
+        )
+
+        updated = Alert(title="Disk", fingerprint="fp1", value_string="97")
+
+        assert cache.get_or_render("slack", updated, lambda a: a.value_string) == "97"
+
+    def test_alerts_without_fingerprint_are_not_cached(self):
+        cache = RenderCache()
+
+        cache.get_or_render("slack", Alert(title="Legacy"), lambda a: a.title)
+
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = RenderCache(max_entries=2)
+        alerts = [Alert(title="Disk", fingerprint=f"fp{i}") for i in range(3)]
+        for alert in alerts[:2]:
+            cache.get_or_render("slack", alert, lambda a: a.fingerprint)
+
+        cache.get_or_render("slack", alerts[0], lambda a: "unused")
+        cache.get_or_render("slack", alerts[2], lambda a: a.fingerprint)
+
+        assert cache.get_or_render("slack", alerts[0], lambda a: "rendered again") == "fp0"
+        assert cache.get_or_render("slack", alerts[1], lambda a: "rendered again") == "rendered again"
+
+    def test_reuses_digest_rendering_for_the_same_group(self):
+        cache = RenderCache()
+        alerts = [Alert(title="Disk", fingerprint="fp1"), Alert(title="CPU", fingerprint="fp2")]
+        calls = []
+
+        def render(group):
+            calls.append(group)
+            return b"digest"
+
+        assert cache.get_or_render_batch("slack", alerts, render) == b"digest"
+        assert cache.get_or_render_batch("slack", [a.model_copy() for a in alerts], render) == b"digest"
+        assert len(calls) == 1
+
+        changed = [alerts[0], Alert(title="CPU", fingerprint="fp2", value_string="97")]
+        assert cache.get_or_render_batch("slack", changed, lambda group: b"changed") == b"changed"
+        assert cache.get_or_render_batch("slack", alerts[:1], lambda group: b"subset") == b"subset"
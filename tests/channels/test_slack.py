@@ -1,8 +1,11 @@
+import asyncio
+import json
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 
-from channels.base import Alert
+from channels.base import Alert, DeliveryError
 from channels.slack import SlackChannel
 
 
@@ -35,42 +38,86 @@ class TestSlackChannel:
         channel = SlackChannel(enabled=True, webhook_url="")
         assert channel.is_enabled() is False
 
-    @patch("channels.slack.requests.post")
-    def test_send_success(self, mock_post, sample_alert):
+    def test_send_success(self, sample_alert):
+        mock_session = MagicMock()
+        mock_post = mock_session.post
         mock_response = MagicMock()
         mock_response.text = "ok"
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
-        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx")
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=mock_session)
         result = channel.send(sample_alert)
 
         assert result is True
         mock_post.assert_called_once()
 
-    @patch("channels.slack.requests.post")
-    def test_send_failure(self, mock_post, sample_alert):
+    def test_send_failure(self, sample_alert):
+        mock_session = MagicMock()
+        mock_post = mock_session.post
         mock_response = MagicMock()
         mock_response.text = "invalid_payload"
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
-        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx")
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=mock_session)
         result = channel.send(sample_alert)
 
         assert result is False
 
-    @patch("channels.slack.requests.post")
-    def test_send_request_exception(self, mock_post, sample_alert):
+    def test_send_request_exception(self, sample_alert):
         import requests
 
+        mock_session = MagicMock()
+        mock_post = mock_session.post
         mock_post.side_effect = requests.RequestException("Connection error")
 
-        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx")
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=mock_session)
         result = channel.send(sample_alert)
 
         assert result is False
 
+    def test_send_timeout_raises_retryable_timeout(self, sample_alert):
+        import requests
+
+        mock_session = MagicMock()
+        mock_session.post.side_effect = requests.ReadTimeout("read timed out")
+
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=mock_session)
+
+        with pytest.raises(DeliveryError) as exc_info:
+            channel.send(sample_alert)
+
+        assert exc_info.value.timed_out is True
+        assert exc_info.value.retryable is True
+
+    def test_send_rate_limited_raises_with_retry_after(self, sample_alert):
+        mock_session = MagicMock()
+        mock_session.post.return_value.status_code = 429
+        mock_session.post.return_value.headers = {"Retry-After": "2"}
+
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=mock_session)
+
+        with pytest.raises(DeliveryError) as exc_info:
+            channel.send(sample_alert)
+
+        assert exc_info.value.retry_after == 2.0
+
+    def test_send_client_error_is_not_retryable(self, sample_alert):
+        import requests
+
+        response = requests.Response()
+        response.status_code = 404
+        mock_session = MagicMock()
+        mock_session.post.return_value = response
+
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=mock_session)
+
+        with pytest.raises(DeliveryError) as exc_info:
+            channel.send(sample_alert)
+
+        assert exc_info.value.retryable is False
+
     def test_build_payload_structure(self, sample_alert):
         channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx")
         payload = channel._build_payload(sample_alert)
@@ -107,3 +154,116 @@ class TestSlackChannel:
         payload = channel._build_payload(alert)
 
         assert payload["attachments"][0]["color"] == "#17a2b8"
+
+    def test_send_batch_posts_one_digest(self):
+        mock_session = MagicMock()
+        mock_session.post.return_value.text = "ok"
+        alerts = [
+            Alert(title="HighCPU", level="warning", labels={"alertname": "HighCPU", "instance": f"server-{i}"})
+            for i in range(25)
+        ]
+
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=mock_session)
+        assert channel.send_batch(alerts) is True
+
+        mock_session.post.assert_called_once()
+        blocks = json.loads(mock_session.post.call_args[1]["data"])["attachments"][0]["blocks"]
+        assert blocks[0]["text"]["text"].endswith("[FIRING:25] HighCPU")
+        assert "`instance=server-0`" in blocks[2]["text"]["text"]
+        assert blocks[3]["elements"][0]["text"] == "... and 5 more"
+
+    def test_send_batch_retry_reuses_the_rendered_digest(self):
+        mock_session = MagicMock()
+        mock_session.post.return_value.text = "ok"
+        alerts = [Alert(title="HighCPU", fingerprint=f"fp{i}") for i in range(3)]
+
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=mock_session)
+        with patch.object(channel, "_build_digest_payload", wraps=channel._build_digest_payload) as build:
+            channel.send_batch(alerts)
+            channel.send_batch(alerts)
+
+        build.assert_called_once_with(alerts)
+        assert mock_session.post.call_count == 2
+
+    def test_send_batch_single_alert_uses_regular_payload(self, sample_alert):
+        channel = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx", session=MagicMock())
+        channel._session.post.return_value.text = "ok"
+
+        channel.send_batch([sample_alert])
+
+        assert json.loads(channel._session.post.call_args[1]["data"]) == channel._build_payload(sample_alert)
+
+    def test_send_uses_configured_timeouts(self, sample_alert):
+        mock_session = MagicMock()
+        mock_session.post.return_value.text = "ok"
+
+        channel = SlackChannel(
+            enabled=True,
+            webhook_url="https://hooks.slack.com/xxx",
+            session=mock_session,
+            connect_timeout=1.5,
+            read_timeout=4,
+        )
+        channel.send(sample_alert)
+
+        assert mock_session.post.call_args[1]["timeout"] == (1.5, 4)
+
+    def test_channels_share_pooled_session(self):
+        from channels.telegram import TelegramChannel
+
+        slack = SlackChannel(enabled=True, webhook_url="https://hooks.slack.com/xxx")
+        telegram = TelegramChannel(enabled=True, bot_token="token", chat_id="123")
+
+        assert slack._session is telegram._session
+
+    def test_header_template_override(self, sample_alert):
+        channel = SlackChannel(
+            enabled=True,
+            webhook_url="https://hooks.slack.com/xxx",
+            templates={"header": "[{label.instance}] {title}", "labels": ""},
+        )
+
+        blocks = channel._build_payload(sample_alert)["attachments"][0]["blocks"]
+
+        assert blocks[0]["text"]["text"] == "[server-01] Test Alert"
+        assert not any("*Labels:*" in block.get("text", {}).get("text", "") for block in blocks)
+
+    def test_send_async_posts_without_the_session(self, sample_alert):
+        requests_seen = []
+
+        def webhook(request):
+            requests_seen.append(request)
+            return httpx.Response(200, text="ok")
+
+        session = MagicMock()
+        channel = SlackChannel(
+            enabled=True,
+            webhook_url="https://hooks.slack.com/xxx",
+            session=session,
+            async_client=httpx.AsyncClient(transport=httpx.MockTransport(webhook)),
+        )
+
+        assert asyncio.run(channel.send_async(sample_alert)) is True
+        assert json.loads(requests_seen[0].content)["attachments"][0]["blocks"][0]["type"] == "header"
+        session.post.assert_not_called()
+
+    @pytest.mark.parametrize(
+        ("response", "retryable", "timed_out"),
+        [
+            (lambda request: httpx.Response(404, text="no_service"), False, False),
+            (lambda request: (_ for _ in ()).throw(httpx.ReadTimeout("read timed out")), True, True),
+        ],
+    )
+    def test_send_async_errors_match_the_blocking_send(self, sample_alert, response, retryable, timed_out):
+        channel = SlackChannel(
+            enabled=True,
+            webhook_url="https://hooks.slack.com/xxx",
+            session=MagicMock(),
+            async_client=httpx.AsyncClient(transport=httpx.MockTransport(response)),
+        )
+
+        with pytest.raises(DeliveryError) as exc_info:
+            asyncio.run(channel.send_async(sample_alert))
+
+        assert exc_info.value.retryable is retryable
+        assert exc_info.value.timed_out is timed_out
@@ -1,8 +1,12 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+import json
+from unittest.mock import MagicMock
 
+import httpx
 import pytest
 
-from channels.base import Alert
+from channels.base import Alert, DeliveryError
+from channels.rendering import escape_markdown
 from channels.telegram import TelegramChannel
 
 
@@ -39,50 +43,165 @@ class TestTelegramChannel:
         channel = TelegramChannel(enabled=True, bot_token="token", chat_id="")
         assert channel.is_enabled() is False
 
-    @patch("channels.telegram.requests.post")
-    def test_send_success(self, mock_post, sample_alert):
+    def test_send_success(self, sample_alert):
+        mock_session = MagicMock()
+        mock_post = mock_session.post
         mock_response = MagicMock()
         mock_response.json.return_value = {"ok": True, "result": {"message_id": 123}}
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
-        channel = TelegramChannel(enabled=True, bot_token="test-token", chat_id="123456789")
+        channel = TelegramChannel(enabled=True, bot_token="test-token", chat_id="123456789", session=mock_session)
         result = channel.send(sample_alert)
 
         assert result is True
         mock_post.assert_called_once()
         call_args = mock_post.call_args
         assert "test-token" in call_args[0][0]
-        assert call_args[1]["json"]["chat_id"] == "123456789"
+        assert json.loads(call_args[1]["data"])["chat_id"] == "123456789"
 
-    @patch("channels.telegram.requests.post")
-    def test_send_api_error(self, mock_post, sample_alert):
+    def test_send_api_error(self, sample_alert):
+        mock_session = MagicMock()
+        mock_post = mock_session.post
         mock_response = MagicMock()
         mock_response.json.return_value = {"ok": False, "description": "Bad Request"}
         mock_response.raise_for_status = MagicMock()
         mock_post.return_value = mock_response
 
-        channel = TelegramChannel(enabled=True, bot_token="test-token", chat_id="123456789")
+        channel = TelegramChannel(enabled=True, bot_token="test-token", chat_id="123456789", session=mock_session)
         result = channel.send(sample_alert)
 
         assert result is False
 
-    @patch("channels.telegram.requests.post")
-    def test_send_request_exception(self, mock_post, sample_alert):
+    def test_send_request_exception(self, sample_alert):
         import requests
 
+        mock_session = MagicMock()
+        mock_post = mock_session.post
         mock_post.side_effect = requests.RequestException("Connection error")
 
-        channel = TelegramChannel(enabled=True, bot_token="test-token", chat_id="123456789")
+        channel = TelegramChannel(enabled=True, bot_token="test-token", chat_id="123456789", session=mock_session)
         result = channel.send(sample_alert)
 
         assert result is False
 
-    def test_escape_markdown(self):
-        channel = TelegramChannel(enabled=True, bot_token="token", chat_id="123")
+    def test_send_rate_limited_raises_with_retry_after(self, sample_alert):
+        mock_session = MagicMock()
+        mock_session.post.return_value.status_code = 429
+        mock_session.post.return_value.json.return_value = {
+            "ok": False,
+            "error_code": 429,
+            "parameters": {"retry_after": 3},
+        }
+
+        channel = TelegramChannel(enabled=True, bot_token="test-token", chat_id="123456789", session=mock_session)
+
+        with pytest.raises(DeliveryError) as exc_info:
+            channel.send(sample_alert)
+
+        assert exc_info.value.retryable is True
+        assert exc_info.value.retry_after == 3
+
+    def test_send_chat_not_found_is_not_retryable(self, sample_alert):
+        mock_session = MagicMock()
+        mock_session.post.return_value.json.return_value = {
+            "ok": False,
+            "error_code": 400,
+            "description": "Bad Request: chat not found",
+        }
+
+        channel = TelegramChannel(enabled=True, bot_token="test-token", chat_id="123456789", session=mock_session)
+
+        with pytest.raises(DeliveryError) as exc_info:
+            channel.send(sample_alert)
+
+        assert exc_info.value.retryable is False
+
+    def test_send_batch_posts_one_digest(self):
+        mock_session = MagicMock()
+        mock_session.post.return_value.json.return_value = {"ok": True}
+        alerts = [
+            Alert(title="HighCPU", level="error", labels={"alertname": "HighCPU", "instance": f"server-{i}"})
+            for i in range(3)
+        ] + [Alert(title="HighCPU", status="resolved", labels={"alertname": "HighCPU", "instance": "server-9"})]
+
+        channel = TelegramChannel(enabled=True, bot_token="token", chat_id="123", session=mock_session)
+        assert channel.send_batch(alerts) is True
+
+        mock_session.post.assert_called_once()
+        text = json.loads(mock_session.post.call_args[1]["data"])["text"]
+        assert text.startswith("🚨 *\\[FIRING:3\\] HighCPU*")
+        assert "*Firing:* `3`  *Resolved:* `1`" in text
+        assert "✅ HighCPU `instance=server-9`" in text
+        assert "`alertname`: HighCPU" in text
+
+    def test_retries_reuse_the_rendered_body(self, sample_alert):
+        mock_session = MagicMock()
+        mock_session.post.return_value.json.return_value = {"ok": False, "description": "Internal error"}
+        alert = sample_alert.model_copy(update={"fingerprint": "fp1"})
+        channel = TelegramChannel(enabled=True, bot_token="token", chat_id="123", session=mock_session)
+        channel._format_message = MagicMock(wraps=channel._format_message)
+
+        channel.send(alert)
+        channel.send(alert)
+
+        channel._format_message.assert_called_once()
+        first, second = (call[1]["data"] for call in mock_session.post.call_args_list)
+        assert first is second
+
+    def test_message_template_override(self, sample_alert):
+        channel = TelegramChannel(
+            enabled=True,
+            bot_token="token",
+            chat_id="123",
+            templates={"message": ["*{title}*", "{message}", "owner: {label.team}", "on {label.instance}"]},
+        )
+
+        assert channel._format_message(sample_alert) == "*Test Alert*\nTest message\non server\\-01"
+
+    def test_send_batch_async_posts_one_digest(self):
+        bodies = []
+
+        def api(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"ok": True})
+
+        channel = TelegramChannel(
+            enabled=True,
+            bot_token="test-token",
+            chat_id="123456789",
+            session=MagicMock(),
+            async_client=httpx.AsyncClient(transport=httpx.MockTransport(api)),
+        )
+        alerts = [
+            Alert(title="Disk full", labels={"alertname": "Disk"}),
+            Alert(title="CPU", labels={"alertname": "CPU"}),
+        ]
+
+        assert asyncio.run(channel.send_batch_async(alerts)) is True
+        assert bodies[0]["chat_id"] == "123456789"
+        assert "Disk full" in bodies[0]["text"] and "CPU" in bodies[0]["text"]
+
+    def test_send_async_chat_not_found_is_not_retryable(self, sample_alert):
+        def api(request):
+            return httpx.Response(400, json={"ok": False, "error_code": 400, "description": "chat not found"})
+
+        channel = TelegramChannel(
+            enabled=True,
+            bot_token="test-token",
+            chat_id="123456789",
+            session=MagicMock(),
+            async_client=httpx.AsyncClient(transport=httpx.MockTransport(api)),
+        )
+
+        with pytest.raises(DeliveryError) as exc_info:
+            asyncio.run(channel.send_async(sample_alert))
+
+        assert exc_info.value.retryable is False
 
+    def test_escape_markdown(self):
         text = "Hello *world* [link](url) _italic_"
-        escaped = channel._escape_markdown(text)
+        escaped = escape_markdown(text)
 
         assert "\\*" in escaped
         assert "\\[" in escaped
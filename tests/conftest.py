@@ -63,4 +63,5 @@ def mock_lambda_context():
     context.memory_limit_in_mb = 128
     context.invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function:test-function"
     context.aws_request_id = "test-request-id"
+    context.get_remaining_time_in_millis.return_value = 30000
     return context
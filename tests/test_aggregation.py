@@ -0,0 +1,106 @@
+from unittest.mock import MagicMock, patch
+
+from aggregation import AlertAggregator, InProcessDigestBuffer, SQSDigestBuffer
+from channels.base import Alert
+
+
+def make_alert(alertname: str, job: str, instance: str, status: str = "firing") -> Alert:
+    return Alert(
+        title=alertname,
+        status=status,
+        labels={"alertname": alertname, "job": job, "instance": instance},
+        fingerprint=f"{alertname}-{instance}",
+    )
+
+
+class TestAlertAggregator:
+    def test_groups_by_label_values(self):
+        aggregator = AlertAggregator(group_by=["alertname", "job"])
+        alerts = [
+            make_alert("HighCPU", "node", "a"),
+            make_alert("HighCPU", "node", "b"),
+            make_alert("HighCPU", "db", "c"),
+            make_alert("DiskFull", "node", "a"),
+        ]
+
+        groups = aggregator.group(alerts)
+
+        assert [[a.labels["instance"] for a in g] for g in groups] == [["a", "b"], ["c"], ["a"]]
+
+    def test_missing_label_groups_together(self):
+        aggregator = AlertAggregator(group_by=["team"])
+        groups = aggregator.group([make_alert("HighCPU", "node", "a"), make_alert("DiskFull", "db", "b")])
+        assert len(groups) == 1
+
+    def test_large_groups_are_split(self):
+        aggregator = AlertAggregator(group_by=["alertname"], max_group_size=50)
+        groups = aggregator.group([make_alert("HighCPU", "node", str(i)) for i in range(120)])
+        assert [len(g) for g in groups] == [50, 50, 20]
+
+
+class TestInProcessDigestBuffer:
+    def test_storm_collapses_into_digests(self):
+        buffer = InProcessDigestBuffer(AlertAggregator(group_by=["alertname", "job"]))
+        for i in range(200):
+            buffer.add([make_alert("HighCPU" if i % 2 else "DiskFull", "node", str(i))])
+
+        groups = buffer.drain()
+
+        assert sorted(len(g) for g in groups) == [100, 100]
+        assert buffer.drain() == []
+
+
+class TestSQSDigestBuffer:
+    def test_drain_queues_alerts_in_batches(self):
+        sqs = MagicMock()
+        sqs.send_message_batch.return_value = {"Successful": [], "Failed": []}
+        buffer = SQSDigestBuffer(sqs, "https://sqs/queue")
+        buffer.add([make_alert("HighCPU", "node", str(i)) for i in range(25)])
+
+        assert buffer.drain() == []
+
+        batches = [c.kwargs["Entries"] for c in sqs.send_message_batch.call_args_list]
+        assert [len(b) for b in batches] == [10, 10, 5]
+        assert Alert.model_validate_json(batches[0][0]["MessageBody"]).labels["instance"] == "0"
+
+    def test_drain_returns_rejected_alerts(self):
+        sqs = MagicMock()
+        sqs.send_message_batch.return_value = {
+            "Successful": [{"Id": "0"}],
+            "Failed": [{"Id": "1", "Code": "InternalError", "Message": "throttled", "SenderFault": False}],
+        }
+        alerts = [make_alert("HighCPU", "node", "a"), make_alert("HighCPU", "node", "b")]
+        buffer = SQSDigestBuffer(sqs, "https://sqs/queue")
+        buffer.add(alerts)
+
+        assert buffer.drain() == [[alerts[1]]]
+
+    def test_drain_returns_the_batch_that_failed_to_send(self):
+        sqs = MagicMock()
+        sqs.send_message_batch.side_effect = [
+            {"Successful": [{"Id": str(i)} for i in range(10)]},
+            Exception("throttled"),
+        ]
+        alerts = [make_alert("HighCPU", "node", f"n{i}") for i in range(12)]
+        buffer = SQSDigestBuffer(sqs, "https://sqs/queue")
+        buffer.add(alerts)
+
+        assert buffer.drain() == [[alerts[10]], [alerts[11]]]
+
+
+class TestDigestHandler:
+    @patch("digest_handler.container")
+    def test_failed_digest_is_redelivered(self, mock_container, mock_lambda_context):
+        from digest_handler import lambda_handler
+
+        alerts = [make_alert("HighCPU", "node", "a"), make_alert("HighCPU", "node", "b"), make_alert("Disk", "db", "c")]
+        event = {"Records": [{"messageId": f"m{i}", "body": a.model_dump_json()} for i, a in enumerate(alerts)]}
+        mock_container.aggregator.return_value = AlertAggregator(group_by=["alertname", "job"])
+        mock_router = MagicMock()
+        mock_router.route_all.return_value = [{"slack": True}, {"slack": False}]
+        mock_container.router.return_value = mock_router
+
+        response = lambda_handler(event, mock_lambda_context)
+
+        assert [len(g) for g in mock_router.route_all.call_args[0][0]] == [2, 1]
+        assert response == {"batchItemFailures": [{"itemIdentifier": "m2"}]}
@@ -0,0 +1,100 @@
+from unittest.mock import MagicMock, patch
+
+from circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitState, DynamoDBBreakerStore
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("telegram", failure_threshold=3, recovery_timeout=30)
+
+        for _ in range(3):
+            assert breaker.allow_request() is True
+            breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.allow_request() is False
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker("telegram", failure_threshold=2)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.CLOSED
+
+    @patch("circuit_breaker.time.time")
+    def test_half_open_allows_single_probe(self, mock_time):
+        mock_time.return_value = 1000.0
+        breaker = CircuitBreaker("slack", failure_threshold=1, recovery_timeout=30)
+        breaker.record_failure()
+
+        mock_time.return_value = 1031.0
+
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False
+
+        breaker.record_success()
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.allow_request() is True
+
+    @patch("circuit_breaker.time.time")
+    def test_failed_probe_reopens(self, mock_time):
+        mock_time.return_value = 1000.0
+        breaker = CircuitBreaker("slack", failure_threshold=1, recovery_timeout=30)
+        breaker.record_failure()
+
+        mock_time.return_value = 1031.0
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+
+    @patch("circuit_breaker.time.time")
+    def test_released_probe_lets_the_next_request_probe(self, mock_time):
+        mock_time.return_value = 1000.0
+        breaker = CircuitBreaker("slack", failure_threshold=1, recovery_timeout=30)
+        breaker.record_failure()
+
+        mock_time.return_value = 1031.0
+        assert breaker.allow_request() is True
+        breaker.release_probe()
+
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request() is True
+
+    @patch("circuit_breaker.emit_event_metric")
+    def test_transitions_emit_metrics(self, mock_emit):
+        breaker = CircuitBreaker("telegram", failure_threshold=1)
+
+        breaker.record_failure()
+
+        mock_emit.assert_called_once_with("CircuitBreakerTransition", {"channel": "telegram", "state": "open"})
+
+    def test_adopts_open_state_from_shared_store(self):
+        table = MagicMock()
+        table.get_item.return_value = {"Item": {"state": "open", "opened_at": "9999999999"}}
+        breaker = CircuitBreaker("telegram", store=DynamoDBBreakerStore(table))
+
+        assert breaker.allow_request() is False
+
+    def test_writes_transitions_to_shared_store(self):
+        table = MagicMock()
+        table.get_item.return_value = {}
+        breaker = CircuitBreaker("telegram", failure_threshold=1, store=DynamoDBBreakerStore(table))
+
+        breaker.record_failure()
+
+        item = table.put_item.call_args[1]["Item"]
+        assert item["PK"] == "BREAKER#telegram"
+        assert item["state"] == "open"
+
+
+class TestCircuitBreakerRegistry:
+    def test_one_breaker_per_channel(self):
+        registry = CircuitBreakerRegistry()
+
+        assert registry.get("slack") is registry.get("slack")
+        assert registry.get("slack") is not registry.get("telegram")
@@ -0,0 +1,208 @@
+import importlib
+import json
+import os
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+TABLE_NAME = "alerts-test"
+
+
+@pytest.fixture
+def table():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "PK", "KeyType": "HASH"}, {"AttributeName": "SK", "KeyType": "RANGE"}],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        table.put_item(Item={"PK": "ALERT#fp1", "SK": "METADATA", "alert_title": "Disk full", "status": "pending"})
+        yield table
+
+
+@pytest.fixture
+def call(table, monkeypatch):
+    monkeypatch.setenv("AWS_CONNECT_INSTANCE_ID", "instance")
+    monkeypatch.setenv("AWS_CONNECT_CONTACT_FLOW_ID", "flow")
+    monkeypatch.setenv("AWS_CONNECT_SOURCE_PHONE", "+15550000000")
+    module = importlib.import_module("escalation.call")
+    monkeypatch.setattr(module, "table", table)
+    monkeypatch.setattr(module, "connect", MagicMock())
+    monkeypatch.setattr(module, "stepfunctions", MagicMock())
+    module.connect.start_outbound_voice_contact.return_value = {"ContactId": "contact-1"}
+    return module
+
+
+@pytest.fixture
+def ack(table, monkeypatch):
+    module = importlib.import_module("ack_handler.handler")
+    monkeypatch.setattr(module, "table", table)
+    monkeypatch.setattr(module, "stepfunctions", MagicMock())
+    monkeypatch.setattr(module, "_connect_client", MagicMock())
+    monkeypatch.setenv("AWS_CONNECT_INSTANCE_ID", "instance")
+    return module
+
+
+def call_event(**extra):
+    return {"alert_id": "fp1", "alert_title": "Disk full", "phone_number": "+15550000001", "current_level": 1, **extra}
+
+
+def ack_event(alert_id="fp1", contact_id=None):
+    contact_data = {"Attributes": {"alert_id": alert_id, "acked_by": "+15550000001"}}
+    if contact_id:
+        contact_data["ContactId"] = contact_id
+    return {"Details": {"ContactData": contact_data}}
+
+
+class TestMakeCall:
+    def test_stores_task_token_before_calling(self, call, table, mock_lambda_context):
+        result = call.lambda_handler(call_event(task_token="token-1"), mock_lambda_context)
+
+        assert result["call_status"] == "initiated"
+        item = table.get_item(Key={"PK": "ALERT#fp1", "SK": "METADATA"})["Item"]
+        assert item["task_tokens"] == {"token-1"}
+        assert item["task_token_level"] == 1
+        assert item["contact_ids"] == {"contact-1"}
+        call.stepfunctions.send_task_success.assert_not_called()
+
+    def test_without_token_only_calls(self, call, table, mock_lambda_context):
+        call.lambda_handler(call_event(), mock_lambda_context)
+
+        call.connect.start_outbound_voice_contact.assert_called_once()
+        item = table.get_item(Key={"PK": "ALERT#fp1", "SK": "METADATA"})["Item"]
+        assert "task_tokens" not in item
+        assert "contact_ids" not in item
+
+    def test_already_acked_completes_the_wait_without_calling(self, call, table, mock_lambda_context):
+        table.update_item(
+            Key={"PK": "ALERT#fp1", "SK": "METADATA"},
+            UpdateExpression="SET #status = :acked",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={":acked": "acked"},
+        )
+
+        result = call.lambda_handler(call_event(task_token="token-1"), mock_lambda_context)
+
+        assert result["call_status"] == "skipped"
+        call.connect.start_outbound_voice_contact.assert_not_called()
+        call.stepfunctions.send_task_success.assert_called_once()
+        assert call.stepfunctions.send_task_success.call_args.kwargs["taskToken"] == "token-1"
+
+    def test_call_placed_after_ack_is_stopped(self, call, table, mock_lambda_context):
+        def ack_while_dialing(**kwargs):
+            table.update_item(
+                Key={"PK": "ALERT#fp1", "SK": "METADATA"},
+                UpdateExpression="SET #status = :acked",
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={":acked": "acked"},
+            )
+            return {"ContactId": "contact-2"}
+
+        call.connect.start_outbound_voice_contact.side_effect = ack_while_dialing
+
+        call.lambda_handler(call_event(task_token="token-2"), mock_lambda_context)
+
+        call.connect.stop_contact.assert_called_once_with(ContactId="contact-2", InstanceId="instance")
+
+    def test_failed_call_fails_the_task(self, call, mock_lambda_context):
+        call.connect.start_outbound_voice_contact.side_effect = RuntimeError("no capacity")
+
+        result = call.lambda_handler(call_event(task_token="token-1"), mock_lambda_context)
+
+        assert result["call_status"] == "failed"
+        call.stepfunctions.send_task_failure.assert_called_once_with(
+            taskToken="token-1", error="CallFailed", cause="no capacity"
+        )
+
+
+class TestAckHandler:
+    def test_ack_returns_the_task_token(self, ack, table, mock_lambda_context):
+        table.update_item(
+            Key={"PK": "ALERT#fp1", "SK": "METADATA"},
+            UpdateExpression="ADD task_tokens :tokens",
+            ExpressionAttributeValues={":tokens": {"token-1"}},
+        )
+
+        result = ack.lambda_handler(ack_event(), mock_lambda_context)
+
+        assert result["status"] == "success"
+        kwargs = ack.stepfunctions.send_task_success.call_args.kwargs
+        assert kwargs["taskToken"] == "token-1"
+        assert json.loads(kwargs["output"])["is_acked"] is True
+        item = table.get_item(Key={"PK": "ALERT#fp1", "SK": "METADATA"})["Item"]
+        assert item["status"] == "acked"
+        assert "task_tokens" not in item
+
+    def test_ack_ends_every_parallel_call(self, ack, table, mock_lambda_context):
+        table.update_item(
+            Key={"PK": "ALERT#fp1", "SK": "METADATA"},
+            UpdateExpression="ADD task_tokens :tokens, contact_ids :contacts",
+            ExpressionAttributeValues={":tokens": {"token-1", "token-2"}, ":contacts": {"contact-1", "contact-2"}},
+        )
+
+        ack.lambda_handler(ack_event(contact_id="contact-2"), mock_lambda_context)
+
+        resumed = {c.kwargs["taskToken"] for c in ack.stepfunctions.send_task_success.call_args_list}
+        assert resumed == {"token-1", "token-2"}
+        ack._connect_client.stop_contact.assert_called_once_with(ContactId="contact-1", InstanceId="instance")
+        item = table.get_item(Key={"PK": "ALERT#fp1", "SK": "METADATA"})["Item"]
+        assert "task_tokens" not in item
+        assert "contact_ids" not in item
+
+    def test_ack_without_token_does_not_call_step_functions(self, ack, mock_lambda_context):
+        assert ack.lambda_handler(ack_event(), mock_lambda_context)["status"] == "success"
+
+        ack.stepfunctions.send_task_success.assert_not_called()
+
+    def test_connect_client_is_created_only_to_stop_calls(self, ack, monkeypatch, mock_lambda_context):
+        monkeypatch.setattr(ack, "_connect_client", None)
+
+        ack.lambda_handler(ack_event(), mock_lambda_context)
+
+        assert ack._connect_client is None
+
+    def test_expired_token_still_acknowledges(self, ack, table, mock_lambda_context):
+        table.update_item(
+            Key={"PK": "ALERT#fp1", "SK": "METADATA"},
+            UpdateExpression="ADD task_tokens :tokens",
+            ExpressionAttributeValues={":tokens": {"token-1"}},
+        )
+        ack.stepfunctions.send_task_success.side_effect = ClientError(
+            {"Error": {"Code": "TaskTimedOut", "Message": "Task Timed Out"}}, "SendTaskSuccess"
+        )
+
+        assert ack.lambda_handler(ack_event(), mock_lambda_context)["status"] == "success"
+
+
+class TestEscalate:
+    @pytest.fixture
+    def escalate(self, table, monkeypatch):
+        module = importlib.import_module("escalation.escalate")
+        monkeypatch.setattr(module, "table", table)
+        return module
+
+    def test_exhaustion_drops_the_last_step_tokens_and_contacts(self, escalate, table, mock_lambda_context):
+        table.update_item(
+            Key={"PK": "ALERT#fp1", "SK": "METADATA"},
+            UpdateExpression="ADD task_tokens :tokens, contact_ids :contacts",
+            ExpressionAttributeValues={":tokens": {"token-3"}, ":contacts": {"contact-3"}},
+        )
+
+        result = escalate.lambda_handler({"alert_id": "fp1", "current_level": 3, "max_level": 3}, mock_lambda_context)
+
+        assert result["should_continue"] is False
+        item = table.get_item(Key={"PK": "ALERT#fp1", "SK": "METADATA"})["Item"]
+        assert item["status"] == "exhausted"
+        assert "task_tokens" not in item
+        assert "contact_ids" not in item
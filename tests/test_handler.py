@@ -1,7 +1,13 @@
 import json
 from unittest.mock import MagicMock, patch
 
-from handler import lambda_handler, parse_sns_event
+import pytest
+
+from aggregation import AlertAggregator, InProcessDigestBuffer, SQSDigestBuffer
+from channels.base import Alert
+from handler import lambda_handler, parse_sns_event, sqs_handler, start_escalation
+from idempotency import DeliveryDeduplicator, EscalationClaim
+from router import Router
 
 
 class TestParseSNSEvent:
@@ -61,8 +67,10 @@ class TestLambdaHandler:
     @patch("handler.container")
     def test_successful_processing(self, mock_container, sample_sns_event, mock_lambda_context):
         mock_router = MagicMock()
-        mock_router.route.return_value = {"telegram": True, "slack": True}
+        mock_router.route_all.return_value = [{"telegram": True, "slack": True}]
         mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        mock_container.digest_buffer.return_value = None
 
         response = lambda_handler(sample_sns_event, mock_lambda_context)
 
@@ -70,13 +78,32 @@ class TestLambdaHandler:
         body = json.loads(response["body"])
         assert body["message"] == "Processed"
         assert len(body["results"]) == 1
-        mock_router.route.assert_called_once()
+        mock_router.route_all.assert_called_once()
+
+    @patch("handler.container")
+    def test_history_is_flushed_after_routing(self, mock_container, sample_sns_event, mock_lambda_context):
+        calls = []
+        mock_router = MagicMock()
+        mock_router.route_all.side_effect = lambda *args: calls.append("route_all") or [{"slack": True}]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        mock_container.digest_buffer.return_value = None
+        history = mock_container.alert_history.return_value
+        history.flush.side_effect = lambda *args: calls.append("flush")
+
+        lambda_handler(sample_sns_event, mock_lambda_context)
+
+        tracked = history.track.call_args.args[0]
+        assert [alert.fingerprint for alert in tracked] == ["abc123"]
+        assert calls == ["route_all", "flush"]
 
     @patch("handler.container")
     def test_partial_failure(self, mock_container, sample_sns_event, mock_lambda_context):
         mock_router = MagicMock()
-        mock_router.route.return_value = {"telegram": True, "slack": False}
+        mock_router.route_all.return_value = [{"telegram": True, "slack": False}]
         mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        mock_container.digest_buffer.return_value = None
 
         response = lambda_handler(sample_sns_event, mock_lambda_context)
 
@@ -103,3 +130,251 @@ class TestLambdaHandler:
         assert response["statusCode"] == 500
         body = json.loads(response["body"])
         assert "error" in body
+
+    @patch("handler.container")
+    def test_grouped_payload_routes_every_alert(self, mock_container, sample_grafana_payload, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.return_value = [{"slack": True}]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        mock_container.digest_buffer.return_value = None
+
+        first_alert = sample_grafana_payload["alerts"][0]
+        sample_grafana_payload["alerts"] = [
+            {**first_alert, "fingerprint": f"fp{i}", "labels": {**first_alert["labels"], "instance": f"server-{i}"}}
+            for i in range(40)
+        ]
+        event = {"Records": [{"EventSource": "aws:sns", "Sns": {"Message": json.dumps(sample_grafana_payload)}}]}
+
+        response = lambda_handler(event, mock_lambda_context)
+
+        assert response["statusCode"] == 200
+        routed_groups = mock_router.route_all.call_args[0][0]
+        assert len(routed_groups[0]) == 40
+        body = json.loads(response["body"])
+        assert body["results"][0]["alert_count"] == 40
+        assert body["results"][0]["alert_title"] == "[FIRING:40] HighCPU"
+
+    @patch("handler.start_escalation")
+    @patch("handler.container")
+    def test_escalation_submitted_to_router_pool(
+        self, mock_container, mock_start_escalation, sample_sns_event, mock_lambda_context, monkeypatch
+    ):
+        monkeypatch.setenv("ESCALATION_ENABLED", "true")
+        monkeypatch.setenv("ESCALATION_TRIGGER_LEVELS", "warning")
+        mock_start_escalation.return_value = {"execution_arn": "arn:execution"}
+
+        router = Router(channels=[], routing_config={})
+        mock_container.router.return_value = router
+        mock_container.deduplicator.return_value = None
+        mock_container.digest_buffer.return_value = None
+
+        response = lambda_handler(sample_sns_event, mock_lambda_context)
+
+        body = json.loads(response["body"])
+        assert body["results"][0]["escalations"] == [{"execution_arn": "arn:execution"}]
+        assert body["results"][0]["escalation"] == {"execution_arn": "arn:execution"}
+        mock_start_escalation.assert_called_once()
+
+    @patch("handler.container")
+    def test_duplicate_notification_is_dropped(self, mock_container, sample_sns_event, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.side_effect = lambda groups, deadline: [{"slack": True} for _ in groups]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = DeliveryDeduplicator()
+        mock_container.digest_buffer.return_value = None
+
+        lambda_handler(sample_sns_event, mock_lambda_context)
+        response = lambda_handler(sample_sns_event, mock_lambda_context)
+
+        body = json.loads(response["body"])
+        assert body["results"] == []
+        assert body["duplicates_dropped"] == 1
+        assert mock_router.route_all.call_args[0][0] == []
+
+    @patch("handler.container")
+    def test_failed_invocation_releases_its_claims(self, mock_container, sample_sns_event, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.side_effect = [Exception("router unavailable"), [{"slack": True}]]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = DeliveryDeduplicator()
+        mock_container.digest_buffer.return_value = None
+
+        assert lambda_handler(sample_sns_event, mock_lambda_context)["statusCode"] == 500
+
+        response = lambda_handler(sample_sns_event, mock_lambda_context)
+
+        assert json.loads(response["body"])["duplicates_dropped"] == 0
+        assert [len(group) for group in mock_router.route_all.call_args[0][0]] == [1]
+
+    @patch("handler.container")
+    def test_batch_aggregation_routes_digests(self, mock_container, sample_grafana_payload, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.side_effect = lambda groups, deadline: [{"slack": True} for _ in groups]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        mock_container.digest_buffer.return_value = InProcessDigestBuffer(AlertAggregator(group_by=["alertname"]))
+
+        records = []
+        for i in range(5):
+            alert = {**sample_grafana_payload["alerts"][0], "fingerprint": f"fp{i}"}
+            message = json.dumps({**sample_grafana_payload, "alerts": [alert]})
+            records.append({"EventSource": "aws:sns", "Sns": {"Message": message}})
+
+        response = lambda_handler({"Records": records}, mock_lambda_context)
+
+        assert [len(g) for g in mock_router.route_all.call_args[0][0]] == [5]
+        body = json.loads(response["body"])
+        assert body["results"][0]["alert_count"] == 5
+
+    @patch("handler.container")
+    def test_queued_aggregation_defers_delivery(self, mock_container, sample_sns_event, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.return_value = []
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        sqs = MagicMock()
+        sqs.send_message_batch.return_value = {"Successful": [], "Failed": []}
+        mock_container.digest_buffer.return_value = SQSDigestBuffer(sqs, "https://sqs/queue")
+
+        response = lambda_handler(sample_sns_event, mock_lambda_context)
+
+        assert response["statusCode"] == 200
+        assert mock_router.route_all.call_args[0][0] == []
+        sqs.send_message_batch.assert_called_once()
+        body = json.loads(response["body"])
+        assert body["results"][0]["queued"] is True
+
+    @patch("handler.container")
+    def test_alerts_the_digest_queue_rejects_are_delivered(self, mock_container, sample_sns_event, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.return_value = [{"slack": True}]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        sqs = MagicMock()
+        sqs.send_message_batch.return_value = {"Successful": [], "Failed": [{"Id": "0", "Message": "throttled"}]}
+        mock_container.digest_buffer.return_value = SQSDigestBuffer(sqs, "https://sqs/queue")
+
+        response = lambda_handler(sample_sns_event, mock_lambda_context)
+
+        assert [len(g) for g in mock_router.route_all.call_args[0][0]] == [1]
+        body = json.loads(response["body"])
+        assert len(body["results"]) == 1
+        assert body["results"][0]["channel_results"] == {"slack": True}
+        assert "queued" not in body["results"][0]
+
+
+class TestSQSHandler:
+    @pytest.fixture
+    def records(self, sample_grafana_payload):
+        records = []
+        for i in range(3):
+            alert = {**sample_grafana_payload["alerts"][0], "fingerprint": f"fp{i}"}
+            body = json.dumps({**sample_grafana_payload, "alerts": [alert]})
+            records.append({"messageId": f"msg-{i}", "eventSource": "aws:sqs", "body": body})
+        return records
+
+    @patch("handler.container")
+    def test_batch_is_routed_in_one_pass(self, mock_container, records, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.side_effect = lambda groups, deadline: [{"slack": True} for _ in groups]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        mock_container.digest_buffer.return_value = None
+
+        response = sqs_handler({"Records": records}, mock_lambda_context)
+
+        assert response == {"batchItemFailures": []}
+        mock_router.route_all.assert_called_once()
+        assert len(mock_router.route_all.call_args[0][0]) == 3
+
+    @patch("handler.container")
+    def test_only_failed_records_are_redelivered(self, mock_container, records, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.side_effect = lambda groups, deadline: [
+            {"slack": group[0].fingerprint != "fp1"} for group in groups
+        ]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = DeliveryDeduplicator()
+        mock_container.digest_buffer.return_value = None
+
+        response = sqs_handler({"Records": records}, mock_lambda_context)
+        assert response == {"batchItemFailures": [{"itemIdentifier": "msg-1"}]}
+
+        # The redelivered record is sent again; delivered alerts stay deduplicated
+        sqs_handler({"Records": records}, mock_lambda_context)
+        assert [group[0].fingerprint for group in mock_router.route_all.call_args[0][0]] == ["fp1"]
+
+    @patch("handler.container")
+    def test_redelivered_alerts_are_recorded_as_retrying(self, mock_container, records, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.side_effect = lambda groups, deadline: [
+            {"slack": group[0].fingerprint != "fp1"} for group in groups
+        ]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = None
+        mock_container.digest_buffer.return_value = None
+        history = mock_container.alert_history.return_value
+
+        sqs_handler({"Records": records}, mock_lambda_context)
+
+        (retrying,), _ = history.mark_retrying.call_args
+        assert [alert.fingerprint for alert in retrying] == ["fp1"]
+        history.flush.assert_called_once()
+
+    @patch("handler.container")
+    def test_redelivery_after_an_error_sends_again(self, mock_container, records, mock_lambda_context):
+        mock_router = MagicMock()
+        mock_router.route_all.side_effect = [Exception("throttled"), [{"slack": True}] * 3]
+        mock_container.router.return_value = mock_router
+        mock_container.deduplicator.return_value = DeliveryDeduplicator()
+        mock_container.digest_buffer.return_value = None
+
+        response = sqs_handler({"Records": records}, mock_lambda_context)
+        assert len(response["batchItemFailures"]) == 3
+
+        assert sqs_handler({"Records": records}, mock_lambda_context) == {"batchItemFailures": []}
+        assert [group[0].fingerprint for group in mock_router.route_all.call_args[0][0]] == ["fp0", "fp1", "fp2"]
+
+    @patch("handler.container")
+    def test_error_fails_the_whole_batch(self, mock_container, records, mock_lambda_context):
+        mock_container.router.side_effect = Exception("Config error")
+
+        response = sqs_handler({"Records": records}, mock_lambda_context)
+
+        assert [failure["itemIdentifier"] for failure in response["batchItemFailures"]] == ["msg-0", "msg-1", "msg-2"]
+
+
+class TestStartEscalation:
+    @pytest.fixture(autouse=True)
+    def state_machine(self, monkeypatch):
+        monkeypatch.setenv("ESCALATION_STATE_MACHINE_ARN", "arn:state-machine")
+
+    @pytest.fixture
+    def alert(self, sample_grafana_payload):
+        return Alert.from_grafana_group(sample_grafana_payload)[0]
+
+    @patch("handler.container")
+    def test_active_escalation_is_reused(self, mock_container, alert):
+        mock_container.escalation_claims.return_value.claim.return_value = EscalationClaim(False, "arn:execution:1")
+
+        assert start_escalation(alert) == {"execution_arn": "arn:execution:1", "reused": True}
+        mock_container.stepfunctions.return_value.start_execution.assert_not_called()
+
+    @patch("handler.container")
+    def test_started_execution_is_recorded(self, mock_container, alert):
+        claims = mock_container.escalation_claims.return_value
+        claims.claim.return_value = EscalationClaim(True)
+        mock_container.stepfunctions.return_value.start_execution.return_value = {"executionArn": "arn:execution:2"}
+
+        assert start_escalation(alert) == {"execution_arn": "arn:execution:2"}
+        claims.record_execution.assert_called_once_with(alert, "arn:execution:2")
+
+    @patch("handler.container")
+    def test_failed_start_releases_the_claim(self, mock_container, alert):
+        claims = mock_container.escalation_claims.return_value
+        claims.claim.return_value = EscalationClaim(True)
+        mock_container.stepfunctions.return_value.start_execution.side_effect = RuntimeError("throttled")
+
+        assert start_escalation(alert) == {"error": "throttled"}
+        claims.release.assert_called_once_with(alert)
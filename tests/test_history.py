@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from channels.base import Alert
+from history import DAY_BUCKET_SHARDS, AlertHistory
+from router import SendOutcome
+
+
+@pytest.fixture
+def table():
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        yield dynamodb.create_table(
+            TableName="alerts-test",
+            KeySchema=[{"AttributeName": "PK", "KeyType": "HASH"}, {"AttributeName": "SK", "KeyType": "RANGE"}],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+                {"AttributeName": "day_bucket", "AttributeType": "S"},
+                {"AttributeName": "received_at", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "DayBucketIndex",
+                    "KeySchema": [
+                        {"AttributeName": "day_bucket", "KeyType": "HASH"},
+                        {"AttributeName": "received_at", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+
+def test_flush_writes_one_record_per_alert_with_channel_outcomes(table):
+    history = AlertHistory(table)
+    delivered, failed = Alert(title="Disk full", fingerprint="fp1"), Alert(title="CPU", fingerprint="fp2")
+    history.track([delivered, failed])
+    history.on_send(SendOutcome("slack", [delivered, failed], True, 1, 0.12))
+    history.on_send(SendOutcome("telegram", failed, False, 3, 1.5, "HTTP 500"))
+
+    assert history.flush("req-1") == 2
+
+    items = {item["fingerprint"]: item for item in table.scan()["Items"]}
+    assert items["fp1"]["disposition"] == "delivered"
+    assert items["fp1"]["channels"] == {"slack": {"success": True, "attempts": 1, "latency_ms": 120}}
+    assert items["fp2"]["disposition"] == "partial"
+    assert items["fp2"]["channels"]["telegram"] == {
+        "success": False,
+        "attempts": 3,
+        "latency_ms": 1500,
+        "error": "HTTP 500",
+    }
+    assert items["fp1"]["PK"] == "HISTORY#fp1"
+    day, _, shard = items["fp1"]["day_bucket"].partition("#")
+    assert day == items["fp1"]["received_at"][:10]
+    assert int(shard) in range(DAY_BUCKET_SHARDS)
+
+
+def test_flush_batches_writes_and_clears_the_buffer(table):
+    history = AlertHistory(table)
+    history.track([Alert(title=f"Alert {i}", fingerprint=f"fp{i}") for i in range(30)], "queued")
+
+    with patch.object(table.meta.client, "batch_write_item", wraps=table.meta.client.batch_write_item) as batch:
+        assert history.flush("req-1") == 30
+    assert batch.call_count == 2
+    assert history.flush("req-2") == 0
+
+
+def test_failed_write_is_not_raised():
+    table = MagicMock()
+    table.batch_writer.return_value.__enter__.return_value.put_item.side_effect = RuntimeError("throttled")
+    history = AlertHistory(table)
+    history.track([Alert(title="Disk full")])
+
+    assert history.flush() == 0
+
+
+def test_query_range_reads_the_day_buckets(table):
+    history = AlertHistory(table)
+    now = datetime.now(timezone.utc)
+    history.track([Alert(title="Disk full", fingerprint="fp1")])
+    history.flush("req-1")
+    table.put_item(
+        Item={
+            "PK": "HISTORY#old",
+            "SK": "old",
+            "day_bucket": (now - timedelta(days=3)).strftime("%Y-%m-%d"),
+            "received_at": (now - timedelta(days=3)).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        }
+    )
+
+    records = list(history.query_range(now - timedelta(days=1), now + timedelta(minutes=1)))
+
+    assert [record["fingerprint"] for record in records] == ["fp1"]
+    assert len(list(history.query_range(now - timedelta(days=4), now + timedelta(minutes=1)))) == 2
+
+
+def test_query_range_merges_the_day_shards_in_order(table):
+    history = AlertHistory(table)
+    for request in range(20):
+        history.track([Alert(title="Disk full", fingerprint=f"fp{request}")])
+        history.flush(f"req-{request}")
+
+    assert len({item["day_bucket"] for item in table.scan()["Items"]}) > 1
+    now = datetime.now(timezone.utc)
+    records = list(history.query_range(now - timedelta(hours=1), now + timedelta(minutes=1)))
+    assert [record["fingerprint"] for record in records] == [f"fp{request}" for request in range(20)]
+
+
+def test_mark_retrying_overrides_the_disposition(table):
+    history = AlertHistory(table)
+    retried, delivered = Alert(title="CPU", fingerprint="fp1"), Alert(title="Disk full", fingerprint="fp2")
+    history.track([retried, delivered])
+    history.on_send(SendOutcome("slack", retried, False, 3, 1.5, "HTTP 500"))
+    history.on_send(SendOutcome("slack", delivered, True, 1, 0.1))
+
+    history.mark_retrying([retried])
+    history.flush("req-1")
+
+    items = {item["fingerprint"]: item for item in table.scan()["Items"]}
+    assert items["fp1"]["disposition"] == "retrying"
+    assert items["fp1"]["channels"]["slack"]["success"] is False
+    assert items["fp2"]["disposition"] == "delivered"
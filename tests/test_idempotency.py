@@ -0,0 +1,199 @@
+import os
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from channels.base import Alert
+from idempotency import DeliveryDeduplicator, EscalationClaims
+
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+
+def _alert(fingerprint="abc123", status="firing", starts_at=datetime(2024, 1, 15, 10, tzinfo=timezone.utc)):
+    return Alert(title="High CPU", fingerprint=fingerprint, status=status, starts_at=starts_at)
+
+
+def _conditional_check_failed():
+    return ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": ""}}, "PutItem")
+
+
+class TestDeliveryDeduplicator:
+    def test_repeat_is_duplicate_in_process(self):
+        dedup = DeliveryDeduplicator()
+
+        assert dedup.is_duplicate(_alert()) is False
+        assert dedup.is_duplicate(_alert()) is True
+
+    def test_status_and_start_time_are_part_of_the_key(self):
+        dedup = DeliveryDeduplicator()
+        dedup.is_duplicate(_alert())
+
+        assert dedup.is_duplicate(_alert(status="resolved")) is False
+        assert dedup.is_duplicate(_alert(starts_at=datetime(2024, 1, 16, tzinfo=timezone.utc))) is False
+
+    def test_alerts_without_fingerprint_always_pass(self):
+        dedup = DeliveryDeduplicator()
+
+        assert dedup.is_duplicate(_alert(fingerprint="")) is False
+        assert dedup.is_duplicate(_alert(fingerprint="")) is False
+
+    def test_window_expiry(self):
+        dedup = DeliveryDeduplicator(window_seconds=0)
+
+        assert dedup.is_duplicate(_alert()) is False
+        assert dedup.is_duplicate(_alert()) is False
+
+    def test_lru_is_bounded(self):
+        dedup = DeliveryDeduplicator(max_entries=2)
+        for fingerprint in ("a", "b", "c"):
+            dedup.is_duplicate(_alert(fingerprint=fingerprint))
+
+        assert dedup.is_duplicate(_alert(fingerprint="a")) is False
+        assert dedup.is_duplicate(_alert(fingerprint="c")) is True
+
+    def test_claim_in_table(self):
+        table = MagicMock()
+        dedup = DeliveryDeduplicator(table=table, window_seconds=300)
+
+        assert dedup.is_duplicate(_alert()) is False
+
+        kwargs = table.put_item.call_args[1]
+        assert kwargs["Item"]["PK"].startswith("DEDUP#abc123#firing#")
+        assert "attribute_not_exists(PK)" in kwargs["ConditionExpression"]
+
+    def test_claimed_by_other_instance(self):
+        table = MagicMock()
+        table.put_item.side_effect = _conditional_check_failed()
+        dedup = DeliveryDeduplicator(table=table)
+
+        assert dedup.is_duplicate(_alert()) is True
+
+    def test_table_error_fails_open(self):
+        table = MagicMock()
+        table.put_item.side_effect = ClientError({"Error": {"Code": "InternalServerError"}}, "PutItem")
+        dedup = DeliveryDeduplicator(table=table)
+
+        assert dedup.is_duplicate(_alert()) is False
+
+    def test_release_forgets_the_claim(self):
+        table = MagicMock()
+        dedup = DeliveryDeduplicator(table=table)
+        dedup.is_duplicate(_alert())
+
+        dedup.release([_alert()])
+
+        assert table.delete_item.call_args[1]["Key"]["PK"].startswith("DEDUP#abc123#firing#")
+        assert dedup.is_duplicate(_alert()) is False
+
+    def test_filter_keeps_fresh_alerts(self):
+        dedup = DeliveryDeduplicator()
+        dedup.is_duplicate(_alert(fingerprint="a"))
+
+        fresh = dedup.filter([_alert(fingerprint="a"), _alert(fingerprint="b")])
+
+        assert [a.fingerprint for a in fresh] == ["b"]
+
+
+@pytest.fixture
+def alerts_table():
+    with mock_aws():
+        yield boto3.resource("dynamodb", region_name="us-east-1").create_table(
+            TableName="alerts-test",
+            KeySchema=[{"AttributeName": "PK", "KeyType": "HASH"}, {"AttributeName": "SK", "KeyType": "RANGE"}],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+
+def _set_status(table, status, fingerprint="abc123"):
+    table.update_item(
+        Key={"PK": f"ALERT#{fingerprint}", "SK": "METADATA"},
+        UpdateExpression="SET #status = :status",
+        ExpressionAttributeNames={"#status": "status"},
+        ExpressionAttributeValues={":status": status},
+    )
+
+
+class TestEscalationClaims:
+    def test_first_claim_creates_the_record(self, alerts_table):
+        claims = EscalationClaims(alerts_table)
+
+        assert claims.claim(_alert()).acquired is True
+
+        item = alerts_table.get_item(Key={"PK": "ALERT#abc123", "SK": "METADATA"})["Item"]
+        assert item["status"] == "pending"
+        assert item["alert_starts_at"] == "2024-01-15T10:00:00+00:00"
+
+    def test_active_escalation_is_reused(self, alerts_table):
+        claims = EscalationClaims(alerts_table)
+        claims.claim(_alert())
+        claims.record_execution(_alert(), "arn:execution:1")
+
+        claim = claims.claim(_alert())
+
+        assert claim.acquired is False
+        assert claim.execution_arn == "arn:execution:1"
+
+    def test_new_firing_waits_for_the_active_escalation(self, alerts_table):
+        claims = EscalationClaims(alerts_table)
+        claims.claim(_alert())
+
+        assert claims.claim(_alert(starts_at=datetime(2024, 1, 16, tzinfo=timezone.utc))).acquired is False
+
+    @pytest.mark.parametrize("status", ["acked", "exhausted"])
+    def test_new_firing_escalates_once_the_previous_one_ended(self, alerts_table, status):
+        claims = EscalationClaims(alerts_table)
+        claims.claim(_alert())
+        claims.record_execution(_alert(), "arn:execution:1")
+        _set_status(alerts_table, status)
+        alerts_table.update_item(
+            Key={"PK": "ALERT#abc123", "SK": "METADATA"},
+            UpdateExpression="ADD task_tokens :tokens, contact_ids :contacts",
+            ExpressionAttributeValues={":tokens": {"token-1"}, ":contacts": {"contact-1"}},
+        )
+
+        assert claims.claim(_alert()).acquired is False
+        assert claims.claim(_alert(starts_at=datetime(2024, 1, 16, tzinfo=timezone.utc))).acquired is True
+        item = alerts_table.get_item(Key={"PK": "ALERT#abc123", "SK": "METADATA"})["Item"]
+        assert item["status"] == "pending"
+        assert "execution_arn" not in item
+        # The previous escalation's waits and calls must not be resumed or stopped by the next ACK
+        assert "task_tokens" not in item
+        assert "contact_ids" not in item
+
+    def test_expired_lease_allows_a_new_firing(self, alerts_table):
+        claims = EscalationClaims(alerts_table, lease_seconds=-1)
+        claims.claim(_alert())
+
+        assert claims.claim(_alert(starts_at=datetime(2024, 1, 16, tzinfo=timezone.utc))).acquired is True
+
+    def test_release_lets_the_next_notification_retry(self, alerts_table):
+        claims = EscalationClaims(alerts_table)
+        claims.claim(_alert())
+
+        claims.release(_alert())
+
+        assert claims.claim(_alert()).acquired is True
+
+    def test_release_keeps_a_started_escalation(self, alerts_table):
+        claims = EscalationClaims(alerts_table)
+        claims.claim(_alert())
+        claims.record_execution(_alert(), "arn:execution:1")
+
+        claims.release(_alert())
+
+        assert claims.claim(_alert()).execution_arn == "arn:execution:1"
+
+    def test_table_error_fails_open(self):
+        table = MagicMock()
+        table.update_item.side_effect = ClientError({"Error": {"Code": "InternalServerError"}}, "UpdateItem")
+
+        assert EscalationClaims(table).claim(_alert()).acquired is True
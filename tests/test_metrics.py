@@ -0,0 +1,52 @@
+import json
+from unittest.mock import MagicMock
+
+from channels.base import Alert, DeliveryError
+from metrics import DeliveryMetrics
+from retry import RetryPolicy
+from router import Router, SendOutcome
+
+
+def emf_documents(output: str) -> list[dict]:
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_sends_are_flushed_as_one_document_per_channel_and_level(capsys):
+    delivery_metrics = DeliveryMetrics(namespace="Test")
+    error, warning = Alert(title="Disk full", level="error"), Alert(title="CPU", level="warning")
+    delivery_metrics.on_send(SendOutcome("slack", error, True, 1, 0.1))
+    delivery_metrics.on_send(SendOutcome("slack", [warning, error], False, 3, 2.5, "HTTP 500", timeouts=2))
+    delivery_metrics.on_send(SendOutcome("slack", warning, True, 2, 0.3))
+    capsys.readouterr()
+
+    delivery_metrics.flush()
+
+    documents = {(doc["channel"], doc["level"]): doc for doc in emf_documents(capsys.readouterr().out)}
+    assert set(documents) == {("slack", "error"), ("slack", "warning")}
+    errors = documents["slack", "error"]
+    assert errors["DeliveryLatency"] == [100.0, 2500.0]
+    assert errors["DeliveryAttempts"] == [4.0]
+    assert [errors[name] for name in ("DeliverySuccess", "DeliveryFailure", "DeliveryTimeout")] == [[1.0], [1.0], [2.0]]
+    assert documents["slack", "warning"]["DeliveryLatency"] == [300.0]
+
+    delivery_metrics.flush()
+    assert emf_documents(capsys.readouterr().out) == []
+
+
+def test_router_counts_timed_out_attempts():
+    channel = MagicMock()
+    channel.name = "telegram"
+    channel.is_enabled.return_value = True
+    channel.send.side_effect = [DeliveryError("timed out", timed_out=True), TimeoutError(), True]
+    delivery_metrics = MagicMock()
+    router = Router(
+        channels=[channel],
+        routing_config={"warning": ["telegram"]},
+        retry_policy=RetryPolicy(base_delay=0),
+        listeners=[delivery_metrics],
+    )
+
+    router.route(Alert(title="Disk full"))
+
+    outcome = delivery_metrics.on_send.call_args.args[0]
+    assert (outcome.success, outcome.attempts, outcome.timeouts) == (True, 3, 2)
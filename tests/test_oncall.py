@@ -0,0 +1,153 @@
+import importlib
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+TABLE_NAME = "alerts-test"
+
+
+@pytest.fixture
+def service(monkeypatch):
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "PK", "KeyType": "HASH"}, {"AttributeName": "SK", "KeyType": "RANGE"}],
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": "SK", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        for order, name in enumerate(["Alice", "Bob", "Carol"], start=1):
+            table.put_item(
+                Item={
+                    "PK": "ONCALL#roster",
+                    "SK": f"MEMBER#{order}",
+                    "name": name,
+                    "phone": f"+1555000000{order}",
+                    "order": order,
+                }
+            )
+        table.put_item(Item={"PK": "ONCALL#rotation", "SK": "CURRENT", "current_index": 1})
+
+        module = importlib.import_module("oncall.service")
+        monkeypatch.setattr(module, "table", table)
+        monkeypatch.setattr(module, "dynamodb", dynamodb)
+        module.invalidate_cache()
+        yield module
+        module.invalidate_cache()
+
+
+def count_requests(service, monkeypatch):
+    table = MagicMock(wraps=service.table)
+    monkeypatch.setattr(service, "table", table)
+    return lambda: table.get_item.call_count + table.query.call_count
+
+
+def test_rotation_pointer_applies_until_schedule_is_materialized(service):
+    assert service.get_current_oncall(1)["name"] == "Bob"
+    assert service.get_current_oncall(2)["name"] == "Carol"
+    assert service.get_current_oncall(3)["name"] == "Alice"
+
+
+def test_rotate_materializes_the_following_weeks(service):
+    result = service.rotate_oncall()
+
+    assert result == {"old_index": 1, "new_index": 2, "version": 1}
+    schedule = service.table.get_item(Key={"PK": "ONCALL#schedule", "SK": "ROTATION"})["Item"]
+    assert len(schedule["weeks"]) == service.SCHEDULE_WEEKS
+    assert [week["index"] for week in schedule["weeks"][:4]] == [2, 0, 1, 2]
+    assert schedule["weeks"][1]["starts_at"] == schedule["weeks"][0]["ends_at"]
+
+    next_week = datetime.now(timezone.utc) + timedelta(days=7)
+    assert service.get_current_oncall(1)["name"] == "Carol"
+    assert service.get_current_oncall(1, at=next_week)["name"] == "Alice"
+    assert service.get_current_oncall(2, at=next_week)["name"] == "Bob"
+
+
+def test_schedule_weeks_end_on_monday_midnight_utc(service):
+    service.materialize_schedule(0, version=1, now=datetime(2026, 10, 15, 13, 30, tzinfo=timezone.utc))
+
+    weeks = service.table.get_item(Key={"PK": "ONCALL#schedule", "SK": "ROTATION"})["Item"]["weeks"]
+    assert weeks[0] == {"starts_at": "2026-10-15T13:30:00Z", "ends_at": "2026-10-19T00:00:00Z", "index": 0}
+    assert weeks[1]["ends_at"] == "2026-10-26T00:00:00Z"
+
+
+def test_override_interval_wins_over_rotation(service):
+    now = datetime.now(timezone.utc)
+    service.table.put_item(
+        Item=service.override_item(2, now - timedelta(days=1), now + timedelta(days=13), "Dave", "+15550000009")
+    )
+
+    assert service.get_current_oncall(2) == {"phone": "+15550000009", "name": "Dave"}
+    assert service.get_current_oncall(2, at=now + timedelta(days=10))["name"] == "Dave"
+    assert service.get_current_oncall(2, at=now + timedelta(days=14))["name"] == "Carol"
+    assert service.get_current_oncall(1)["name"] == "Bob"
+
+
+def test_ended_and_inactive_overrides_are_ignored(service):
+    now = datetime.now(timezone.utc)
+    ended = service.override_item(1, now - timedelta(days=3), now - timedelta(days=1), "Erin", "+15550000008")
+    inactive = service.override_item(1, now - timedelta(days=1), now + timedelta(days=1), "Frank", "+15550000007")
+    inactive["active"] = False
+    service.table.put_item(Item=ended)
+    service.table.put_item(Item=inactive)
+
+    assert service.get_current_oncall(1)["name"] == "Bob"
+
+
+def test_materialized_lookups_cost_one_query_per_ttl(service, monkeypatch):
+    service.rotate_oncall()
+    requests = count_requests(service, monkeypatch)
+
+    for level in (1, 2, 3, 1, 2, 3):
+        service.get_current_oncall(level)
+    assert requests() == 1
+
+    monkeypatch.setattr(service, "CACHE_TTL_SECONDS", 0)
+    service.get_current_oncall(1)
+    assert requests() == 2
+
+
+def test_failed_refresh_serves_previous_schedule(service, monkeypatch):
+    monkeypatch.setattr(service, "CACHE_TTL_SECONDS", 0)
+    service.get_current_oncall(1)
+    monkeypatch.setattr(service, "table", MagicMock(query=MagicMock(side_effect=RuntimeError("throttled"))))
+
+    assert service.get_current_oncall(1)["name"] == "Bob"
+
+
+def test_refresh_queries_outside_the_cache_lock(service, monkeypatch):
+    load_schedule = service._load_schedule
+
+    def load_while_invalidated(now):
+        # Would deadlock if the Query ran under the lock
+        assert service._cache_lock.acquire(blocking=False)
+        service._cache_lock.release()
+        schedule = load_schedule(now)
+        service.invalidate_cache()
+        return schedule
+
+    monkeypatch.setattr(service, "_load_schedule", load_while_invalidated)
+
+    assert service.get_current_oncall(1)["name"] == "Bob"
+    # Invalidated mid-refresh, so the result is served once but not cached
+    assert service._cache is None
+
+
+def test_ring_group_pages_each_phone_once(service):
+    now = datetime.now(timezone.utc)
+    service.table.put_item(
+        Item=service.override_item(2, now - timedelta(days=1), now + timedelta(days=1), "Bob", "+15550000002")
+    )
+
+    assert service.get_ring_group([1, 2]) == [{"phone": "+15550000002", "name": "Bob", "level": 1}]
+    assert [c["name"] for c in service.get_ring_group([3, "all"])] == ["Alice", "Bob", "Carol"]
@@ -0,0 +1,110 @@
+import marshal
+import threading
+import time
+from types import SimpleNamespace
+
+import boto3
+import pytest
+from moto import mock_aws
+
+import profiling
+
+
+@pytest.fixture
+def enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(profiling, "PROFILING_OUTPUT", str(tmp_path))
+    return tmp_path
+
+
+def context():
+    return SimpleNamespace(function_name="alert-broadcaster", aws_request_id="req-1")
+
+
+def busy_handler(event, context):
+    total = 0
+    for i in range(20000):
+        total += i
+    time.sleep(0.02)
+    return {"total": total, **event}
+
+
+def test_writes_a_pstats_artifact_and_returns_the_result(enabled):
+    assert profiling.profiled(busy_handler)({"a": 1}, context()) == {"total": 199990000, "a": 1}
+
+    [artifact] = (enabled / "alert-broadcaster").iterdir()
+    assert artifact.name.endswith("-req-1.pstats")
+    functions = {name for _, _, name in marshal.loads(artifact.read_bytes())}
+    assert "busy_handler" in functions
+
+
+def test_not_profiled_when_disabled_or_not_sampled(enabled, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_SAMPLE_RATE", 0.0)
+    assert profiling.profiled(busy_handler)({}, context())["total"] == 199990000
+
+    monkeypatch.setattr(profiling, "PROFILING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", False)
+    profiling.profiled(busy_handler)({}, context())
+
+    assert not list(enabled.iterdir())
+
+
+def test_sampling_mode_collects_stacks_of_worker_threads(enabled, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_MODE", "sampling")
+    monkeypatch.setattr(profiling, "PROFILING_INTERVAL", 0.001)
+
+    def handler(event, context):
+        worker = threading.Thread(target=time.sleep, args=(0.05,))
+        worker.start()
+        worker.join()
+
+    profiling.profiled(handler)({}, context())
+
+    [artifact] = (enabled / "alert-broadcaster").iterdir()
+    assert artifact.suffix == ".collapsed"
+    stacks = [line.rsplit(" ", 1) for line in artifact.read_text().splitlines()]
+    assert all(count.isdigit() for _, count in stacks)
+    assert any("test_profiling:handler" in stack for stack, _ in stacks)
+    assert any(stack.startswith("threading:_bootstrap") for stack, _ in stacks)
+
+
+def test_handler_error_propagates_and_is_still_profiled(enabled):
+    def handler(event, context):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        profiling.profiled(handler)({}, context())
+
+    assert len(list((enabled / "alert-broadcaster").iterdir())) == 1
+
+
+def test_handler_runs_unprofiled_when_the_profiler_cannot_start(enabled, monkeypatch):
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profiling.cProfile.Profile, "enable", enable)
+
+    assert profiling.profiled(busy_handler)({"a": 1}, context()) == {"total": 199990000, "a": 1}
+    assert not list(enabled.iterdir())
+    assert not profiling.tracemalloc.is_tracing()
+
+
+def test_profile_write_failure_does_not_fail_the_invocation(enabled, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_OUTPUT", str(enabled / "file"))
+    (enabled / "file").write_text("not a directory")
+
+    assert profiling.profiled(busy_handler)({}, context())["total"] == 199990000
+
+
+def test_uploads_to_s3(enabled, monkeypatch):
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="profiles")
+        monkeypatch.setattr(profiling, "PROFILING_OUTPUT", "s3://profiles/dev")
+        monkeypatch.setattr(profiling, "_s3_client", s3)
+
+        profiling.profiled(busy_handler)({}, context())
+
+        [key] = [obj["Key"] for obj in s3.list_objects_v2(Bucket="profiles")["Contents"]]
+    assert key.startswith("dev/alert-broadcaster/") and key.endswith("-req-1.pstats")
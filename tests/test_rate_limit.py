@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock, patch
+
+from rate_limit import DynamoDBRateCounter, RateLimit, RateLimiter
+
+
+class TestRateLimiter:
+    def test_burst_then_queue(self):
+        limiter = RateLimiter({"telegram": {"per_destination": RateLimit(rate=1, burst=2)}})
+
+        assert limiter.reserve("telegram", "chat-1") == 0
+        assert limiter.reserve("telegram", "chat-1") == 0
+        assert 0.9 < limiter.reserve("telegram", "chat-1") <= 1.0
+        assert 1.9 < limiter.reserve("telegram", "chat-1") <= 2.0
+
+    def test_destinations_have_separate_budgets(self):
+        limiter = RateLimiter({"telegram": {"per_destination": RateLimit(rate=1, burst=1)}})
+
+        assert limiter.reserve("telegram", "chat-1") == 0
+        assert limiter.reserve("telegram", "chat-2") == 0
+
+    def test_channel_budget_is_shared_by_destinations(self):
+        limiter = RateLimiter(
+            {
+                "telegram": {
+                    "per_channel": RateLimit(rate=1, burst=1),
+                    "per_destination": RateLimit(rate=10, burst=10),
+                }
+            }
+        )
+
+        assert limiter.reserve("telegram", "chat-1") == 0
+        assert limiter.reserve("telegram", "chat-2") > 0.9
+
+    def test_unlimited_channel(self):
+        limiter = RateLimiter({})
+
+        assert limiter.reserve("aws_connect", "") == 0
+
+    def test_wait_beyond_max_wait_is_not_booked(self):
+        limiter = RateLimiter({"slack": {"per_destination": RateLimit(rate=1, burst=1)}})
+        limiter.reserve("slack", "hook")
+
+        assert limiter.reserve("slack", "hook", max_wait=0.5) is None
+        assert 0.9 < limiter.reserve("slack", "hook") <= 1.0
+
+    def test_from_config(self):
+        limiter = RateLimiter.from_config({"slack": {"per_destination": {"rate": 1, "burst": 3}}})
+
+        for _ in range(3):
+            assert limiter.reserve("slack", "hook") == 0
+
+    @patch("rate_limit.time.sleep")
+    def test_shared_budget_waits_for_next_window(self, mock_sleep):
+        counter = MagicMock()
+        counter.try_acquire.side_effect = [False, True]
+        limiter = RateLimiter({"slack": {"per_destination": RateLimit(rate=1)}}, counter=counter)
+
+        assert limiter.acquire_shared("slack", "hook", max_wait=5) is True
+        mock_sleep.assert_called_once()
+        counter.try_acquire.assert_called_with("slack:hook", 1)
+
+
+class TestDynamoDBRateCounter:
+    def test_counts_per_second(self):
+        table = MagicMock()
+        table.update_item.return_value = {"Attributes": {"hits": 2}}
+        counter = DynamoDBRateCounter(table)
+
+        assert counter.try_acquire("telegram", 30) is True
+        assert counter.try_acquire("telegram:chat-1", 1) is False
+        assert table.update_item.call_args[1]["Key"]["PK"] == "RATE#telegram:chat-1"
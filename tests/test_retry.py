@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock
+
+from retry import Deadline, RetryPolicy
+
+
+class TestDeadline:
+    def test_from_context_keeps_reserve(self):
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 10000
+
+        deadline = Deadline.from_context(context, reserve_ms=1000)
+
+        assert 8.5 < deadline.remaining() <= 9.0
+
+    def test_from_context_without_remaining_time(self):
+        deadline = Deadline.from_context(object())
+
+        assert deadline.remaining() == float("inf")
+        assert deadline.expired() is False
+
+    def test_expired(self):
+        assert Deadline(0).expired() is True
+
+
+class TestRetryPolicy:
+    def test_backoff_is_bounded(self):
+        policy = RetryPolicy(base_delay=1, max_delay=3)
+
+        for attempt in range(1, 10):
+            assert 0 <= policy.backoff(attempt) <= min(3, 2 ** (attempt - 1))
+
+    def test_gives_up_after_max_attempts(self):
+        policy = RetryPolicy(max_attempts=3)
+
+        assert policy.next_delay(2) is not None
+        assert policy.next_delay(3) is None
+
+    def test_honors_retry_after(self):
+        policy = RetryPolicy(max_retry_after=10)
+
+        assert policy.next_delay(1, retry_after=4) == 4
+        assert policy.next_delay(1, retry_after=30) is None
+
+    def test_respects_deadline(self):
+        policy = RetryPolicy(attempt_budget=5)
+
+        assert policy.next_delay(1, retry_after=1, deadline=Deadline(10)) == 1
+        assert policy.next_delay(1, retry_after=1, deadline=Deadline(5)) is None
+        assert policy.next_delay(1, retry_after=1, deadline=Deadline(10), attempt_budget=13.05) is None
@@ -1,9 +1,17 @@
-from unittest.mock import MagicMock
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from channels.base import Alert
-from router import Router
+from channels.base import Alert, DeliveryError
+from channels.lazy import LazyChannel
+from circuit_breaker import CircuitBreakerRegistry, CircuitState
+from rate_limit import RateLimit, RateLimiter
+from retry import Deadline, RetryPolicy
+from router import AsyncRouter, Router
 
 
 @pytest.fixture
@@ -126,6 +134,72 @@ class TestRouter:
 
         assert results == {}
 
+    def test_routing_table_compiled_once(self, sample_alert, mock_routing_config):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send.return_value = True
+
+        router = Router(channels=[mock_slack], routing_config=mock_routing_config, default_level="warning")
+        router.route(sample_alert)
+        calls = mock_routing_config.warning.call_count
+        for _ in range(10):
+            router.route(sample_alert)
+
+        assert mock_routing_config.warning.call_count == calls
+        assert mock_slack.is_enabled.call_count == 3  # once per compiled level
+        assert router.get_target_channels("warning") == (mock_slack,)
+
+    def test_recompile_routing_picks_up_changes(self):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+
+        router = Router(channels=[mock_telegram, mock_slack], routing_config={"warning": ["slack"]})
+        assert router.get_target_channels("warning") == (mock_slack,)
+
+        router.recompile_routing({"warning": ["telegram"]})
+        assert router.get_target_channels("warning") == (mock_telegram,)
+
+        mock_telegram.is_enabled.return_value = False
+        router.invalidate_routing()
+        assert router.get_target_channels("warning") == ()
+
+    def test_routing_lookup_builds_no_channel(self):
+        factory = MagicMock()
+        channel = LazyChannel(name="slack", enabled=True, factory=factory)
+
+        router = Router(channels=[channel], routing_config={"warning": ["slack"]})
+        factory.assert_not_called()
+
+        assert router.get_target_channels("warning") == (channel,)
+        factory.assert_not_called()
+
+    def test_lookup_survives_invalidation_after_compile(self):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        router = Router(channels=[mock_slack], routing_config={"warning": ["slack"]})
+
+        compile_routing = router._compile_routing
+
+        def compile_then_invalidate(*args):
+            table = compile_routing(*args)
+            router.invalidate_routing()
+            return table
+
+        with patch.object(router, "_compile_routing", side_effect=compile_then_invalidate):
+            assert router.get_target_channels("warning") == (mock_slack,)
+
+    def test_unknown_level_compiled_from_default(self):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+
+        router = Router(channels=[mock_slack], routing_config={"warning": ["slack"]}, default_level="warning")
+
+        assert router.get_target_channels("critical") == (mock_slack,)
+        assert "critical" in router._routing_table
+
     def test_retry_on_failure(self, sample_alert, mock_routing_config):
         mock_telegram = MagicMock()
         mock_telegram.name = "telegram"
@@ -142,3 +216,415 @@ class TestRouter:
 
         assert results["telegram"] is True
         assert mock_telegram.send.call_count == 3
+
+    def test_listeners_receive_send_outcomes(self, sample_alert, mock_routing_config):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send.side_effect = [False, RuntimeError("boom"), True]
+        listener = MagicMock()
+
+        router = Router(
+            channels=[mock_telegram],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            listeners=[listener, None],
+        )
+
+        router.route(sample_alert)
+
+        outcome = listener.on_send.call_args.args[0]
+        assert outcome.channel == "telegram"
+        assert outcome.payload is sample_alert
+        assert outcome.success is True
+        assert outcome.attempts == 3
+        assert outcome.error is None
+
+    def test_route_group_batches_per_channel(self, mock_routing_config):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send_batch.return_value = True
+
+        alerts = [Alert(title=f"Alert {i}", level="warning") for i in range(40)]
+
+        router = Router(
+            channels=[mock_telegram],
+            routing_config=mock_routing_config,
+            default_level="warning",
+        )
+
+        results = router.route(alerts)
+
+        assert results == {"telegram": True}
+        mock_telegram.send_batch.assert_called_once_with(alerts)
+        mock_telegram.send.assert_not_called()
+
+    def test_route_group_splits_by_level(self, mock_routing_config):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send_batch.return_value = True
+
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send_batch.return_value = True
+
+        info_alert = Alert(title="Info", level="info")
+        warning_alert = Alert(title="Warning", level="warning")
+
+        router = Router(
+            channels=[mock_telegram, mock_slack],
+            routing_config=mock_routing_config,
+            default_level="warning",
+        )
+
+        results = router.route([info_alert, warning_alert])
+
+        assert results == {"telegram": True, "slack": True}
+        mock_telegram.send.assert_called_once_with(warning_alert)
+        mock_slack.send_batch.assert_called_once_with([info_alert, warning_alert])
+
+    def test_route_group_unbatched_sends_each_alert(self, mock_routing_config):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send.side_effect = [True, False, False, False]
+
+        alerts = [Alert(title="Alert 1", level="warning"), Alert(title="Alert 2", level="warning")]
+
+        router = Router(
+            channels=[mock_telegram],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            max_workers=1,
+            batch_groups=False,
+        )
+
+        results = router.route(alerts)
+
+        assert results == {"telegram": False}
+        assert mock_telegram.send.call_count == 4
+        mock_telegram.send_batch.assert_not_called()
+
+    def test_route_all_with_shared_pool_sends_payloads_concurrently(self, mock_routing_config):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def send(alert):
+            barrier.wait()
+            return True
+
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send.side_effect = send
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            router = Router(
+                channels=[mock_slack],
+                routing_config=mock_routing_config,
+                default_level="warning",
+                executor=executor,
+            )
+
+            results = router.route_all([[Alert(title="First")], [Alert(title="Second")]])
+
+        assert results == [{"slack": True}, {"slack": True}]
+
+    def test_submit_without_pool_runs_inline(self, mock_routing_config):
+        router = Router(channels=[], routing_config=mock_routing_config)
+
+        future = router.submit(lambda x: x * 2, 21)
+
+        assert future.done()
+        assert future.result() == 42
+
+    def test_non_retryable_error_is_not_retried(self, sample_alert, mock_routing_config):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send.side_effect = DeliveryError("chat not found", retryable=False)
+
+        router = Router(
+            channels=[mock_telegram],
+            routing_config=mock_routing_config,
+            default_level="warning",
+        )
+
+        results = router.route(sample_alert)
+
+        assert results["telegram"] is False
+        assert mock_telegram.send.call_count == 1
+
+    def test_retry_after_is_honored(self, sample_alert, mock_routing_config):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send.side_effect = [DeliveryError("rate limited", retry_after=0.05), True]
+
+        router = Router(
+            channels=[mock_slack],
+            routing_config=mock_routing_config,
+            default_level="warning",
+        )
+
+        started = time.monotonic()
+        results = router.route(sample_alert)
+
+        assert results["slack"] is True
+        assert time.monotonic() - started >= 0.05
+
+    def test_no_retry_past_deadline(self, sample_alert, mock_routing_config):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send.return_value = False
+
+        router = Router(
+            channels=[mock_slack],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            retry_policy=RetryPolicy(attempt_budget=5),
+        )
+
+        results = router.route(sample_alert, deadline=Deadline(2))
+
+        assert results["slack"] is False
+        assert mock_slack.send.call_count == 1
+
+    def test_retry_budget_follows_the_channel_request_timeouts(self, sample_alert, mock_routing_config):
+        from channels.slack import SlackChannel
+
+        session = MagicMock()
+        session.post.return_value.text = "invalid_payload"
+        slack = SlackChannel(
+            enabled=True, webhook_url="https://hooks.slack.com/xxx", session=session, connect_timeout=3.05
+        )
+
+        router = Router(
+            channels=[slack],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            retry_policy=RetryPolicy(base_delay=0, attempt_budget=1),
+        )
+
+        # 12 seconds left fit the policy's budget, but not one more 13 second attempt
+        assert router.route(sample_alert, deadline=Deadline(12))["slack"] is False
+        assert session.post.call_count == 1
+
+    def test_open_circuit_fails_fast(self, sample_alert, mock_routing_config):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send.return_value = False
+
+        router = Router(
+            channels=[mock_telegram],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            retry_policy=RetryPolicy(base_delay=0),
+            breakers=CircuitBreakerRegistry(failure_threshold=3),
+        )
+
+        assert router.route(sample_alert) == {"telegram": False}
+        assert router.route(sample_alert) == {"telegram": False}
+        assert mock_telegram.send.call_count == 3
+
+    def test_open_circuit_diverts_to_fallback(self, mock_routing_config):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send.return_value = False
+
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send.return_value = True
+
+        breakers = CircuitBreakerRegistry(failure_threshold=1)
+        breakers.get("slack").record_failure()
+
+        router = Router(
+            channels=[mock_telegram, mock_slack],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            breakers=breakers,
+            fallbacks={"slack": "telegram"},
+        )
+
+        info_alert = Alert(title="Info", level="info")
+        results = router.route(info_alert)
+
+        assert results == {"slack": False, "telegram": True}
+        mock_slack.send.assert_not_called()
+        mock_telegram.send.assert_called_once_with(info_alert)
+
+    @patch("circuit_breaker.time.time")
+    def test_rejected_probe_does_not_wedge_the_breaker(self, mock_time, sample_alert, mock_routing_config):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send.side_effect = [DeliveryError("Slack webhook returned 400", retryable=False), True]
+
+        mock_time.return_value = 1000.0
+        breakers = CircuitBreakerRegistry(failure_threshold=1, recovery_timeout=30)
+        breakers.get("slack").record_failure()
+        mock_time.return_value = 1031.0
+
+        router = Router(
+            channels=[mock_slack], routing_config=mock_routing_config, default_level="warning", breakers=breakers
+        )
+
+        assert router.route(sample_alert) == {"slack": False}
+        assert breakers.get("slack").state == CircuitState.HALF_OPEN
+        # The next send probes again and closes the recovered circuit
+        assert router.route(sample_alert) == {"slack": True}
+        assert breakers.get("slack").state == CircuitState.CLOSED
+
+    def test_rate_limited_sends_are_queued(self, mock_routing_config):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.destination = "hook"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send.return_value = True
+
+        router = Router(
+            channels=[mock_slack],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            rate_limiter=RateLimiter({"slack": {"per_destination": RateLimit(rate=20, burst=1)}}),
+        )
+
+        started = time.monotonic()
+        results = router.route_all([[Alert(title="First")], [Alert(title="Second")], [Alert(title="Third")]])
+
+        assert results == [{"slack": True}] * 3
+        assert time.monotonic() - started >= 0.09
+
+    def test_rate_limit_waits_do_not_hold_pool_workers(self, mock_routing_config):
+        sent_at = {}
+
+        def channel(name):
+            mock = MagicMock()
+            mock.name = name
+            mock.destination = name
+            mock.is_enabled.return_value = True
+            mock.send.side_effect = lambda alert: sent_at.setdefault((name, alert.title), time.monotonic()) or True
+            return mock
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        router = Router(
+            channels=[channel("slack"), channel("telegram")],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            executor=executor,
+            rate_limiter=RateLimiter({"slack": {"per_destination": RateLimit(rate=5, burst=1)}}),
+        )
+
+        started = time.monotonic()
+        results = router.route_all([[Alert(title=str(i))] for i in range(3)])
+        executor.shutdown()
+
+        assert results == [{"telegram": True, "slack": True}] * 3
+        # Slack's queued sends wait 0.2 s apiece without keeping Telegram off the single worker
+        assert max(at for (name, _), at in sent_at.items() if name == "telegram") - started < 0.1
+        assert max(at for (name, _), at in sent_at.items() if name == "slack") - started >= 0.35
+
+
+class TestAsyncRouter:
+    def test_route_all_sends_every_group(self, mock_routing_config):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send_async = AsyncMock(return_value=True)
+
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send_async = AsyncMock(side_effect=[False, True, True])
+
+        router = AsyncRouter(
+            channels=[mock_telegram, mock_slack],
+            routing_config=mock_routing_config,
+            default_level="warning",
+        )
+
+        results = router.route_all([[Alert(title="First")], [Alert(title="Second")]])
+
+        assert results == [{"telegram": True, "slack": True}, {"telegram": True, "slack": True}]
+        assert mock_telegram.send_async.await_count == 2
+        assert mock_slack.send_async.await_count == 3
+
+    def test_route_handles_exceptions(self, sample_alert, mock_routing_config):
+        mock_telegram = MagicMock()
+        mock_telegram.name = "telegram"
+        mock_telegram.is_enabled.return_value = True
+        mock_telegram.send_async = AsyncMock(side_effect=RuntimeError("boom"))
+
+        router = AsyncRouter(
+            channels=[mock_telegram],
+            routing_config=mock_routing_config,
+            default_level="warning",
+        )
+
+        assert router.route(sample_alert) == {"telegram": False}
+        assert mock_telegram.send_async.await_count == 3
+
+    def test_http_sends_are_not_capped_by_the_worker_pool(self, mock_routing_config):
+        import httpx
+
+        from channels.slack import SlackChannel
+
+        in_flight = peak = 0
+
+        async def webhook(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            return httpx.Response(200, text="ok")
+
+        slack = SlackChannel(
+            enabled=True,
+            webhook_url="https://hooks.slack.com/xxx",
+            session=MagicMock(),
+            async_client=httpx.AsyncClient(transport=httpx.MockTransport(webhook)),
+        )
+        router = AsyncRouter(
+            channels=[slack],
+            routing_config=mock_routing_config,
+            default_level="warning",
+            max_workers=1,
+            batch_groups=False,
+        )
+
+        groups = [[Alert(title=f"Alert {i}")] for i in range(10)]
+        assert router.route_all(groups + [[]]) == [{"slack": True}] * 10 + [{}]
+        assert peak == 10
+
+    def test_breaker_calls_run_off_the_event_loop(self, sample_alert, mock_routing_config):
+        mock_slack = MagicMock()
+        mock_slack.name = "slack"
+        mock_slack.is_enabled.return_value = True
+        mock_slack.send_async = AsyncMock(side_effect=[RuntimeError("boom"), True])
+
+        breakers = CircuitBreakerRegistry(failure_threshold=3)
+        breaker_threads = []
+        for method in ("allow_request", "record_failure", "record_success"):
+            original = getattr(breakers.get("slack"), method)
+
+            def tracked(*args, _original=original, **kwargs):
+                breaker_threads.append(threading.current_thread())
+                return _original(*args, **kwargs)
+
+            setattr(breakers.get("slack"), method, tracked)
+
+        router = AsyncRouter(
+            channels=[mock_slack], routing_config=mock_routing_config, default_level="warning", breakers=breakers
+        )
+
+        assert router.route(sample_alert) == {"slack": True}
+        assert len(breaker_threads) == 4
+        assert threading.current_thread() not in breaker_threads
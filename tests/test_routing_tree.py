@@ -0,0 +1,138 @@
+import random
+from unittest.mock import MagicMock
+
+import pytest
+
+from channels.base import Alert
+from router import Router
+from routing_tree import Matcher, MatchType, Route, RoutingTree
+
+
+def tree_from(route: dict, receivers: dict | None = None) -> RoutingTree:
+    return RoutingTree.from_config({"route": route, "receivers": receivers or {}})
+
+
+class TestMatcher:
+    def test_parse(self):
+        assert Matcher.parse('service=~"db-.*"') == Matcher("service", MatchType.REGEX, "db-.*")
+        assert Matcher.parse("severity!=info") == Matcher("severity", MatchType.NOT_EQUAL, "info")
+
+    def test_parse_invalid(self):
+        with pytest.raises(ValueError):
+            Matcher.parse("not a matcher")
+
+    def test_regex_is_anchored(self):
+        matcher = Matcher.parse('service=~"db"')
+        assert matcher.matches({"service": "db"})
+        assert not matcher.matches({"service": "db-primary"})
+
+    def test_missing_label_is_empty(self):
+        assert Matcher.parse('team=""').matches({})
+        assert Matcher.parse('team!~".+"').matches({})
+        assert not Matcher.parse('team!=""').matches({})
+
+
+class TestRoutingTree:
+    def test_first_match_wins(self):
+        tree = tree_from(
+            {
+                "receiver": "default",
+                "routes": [
+                    {"matchers": ['severity="error"'], "receiver": "pager"},
+                    {"matchers": ['team="db"'], "receiver": "db"},
+                ],
+            }
+        )
+
+        assert tree.match({"severity": "error", "team": "db"}) == ("pager",)
+        assert tree.match({"severity": "warning", "team": "db"}) == ("db",)
+        assert tree.match({"severity": "warning"}) == ("default",)
+
+    def test_continue_keeps_matching_siblings(self):
+        tree = tree_from(
+            {
+                "receiver": "default",
+                "routes": [
+                    {"matchers": ['severity="error"'], "receiver": "audit", "continue": True},
+                    {"matchers": ['team=~"db|storage"'], "receiver": "db"},
+                    {"matchers": ['severity="error"'], "receiver": "never"},
+                ],
+            }
+        )
+
+        assert tree.match({"severity": "error", "team": "storage"}) == ("audit", "db")
+
+    def test_nested_routes_inherit_receiver(self):
+        tree = tree_from(
+            {
+                "receiver": "default",
+                "routes": [
+                    {
+                        "matchers": ['team="db"'],
+                        "receiver": "db",
+                        "routes": [
+                            {"matchers": ['severity="error"'], "receiver": "db-pager"},
+                            {"matchers": ['env!="prod"']},
+                        ],
+                    }
+                ],
+            }
+        )
+
+        assert tree.match({"team": "db", "severity": "error", "env": "prod"}) == ("db-pager",)
+        assert tree.match({"team": "db", "env": "staging"}) == ("db",)
+        assert tree.match({"team": "db", "env": "prod"}) == ("db",)
+
+    def test_root_requires_receiver(self):
+        with pytest.raises(ValueError):
+            tree_from({"routes": []})
+
+    def test_index_agrees_with_linear_evaluation(self):
+        rng = random.Random(7)
+        routes = []
+        for i in range(300):
+            matchers = [f'service="svc-{rng.randrange(50)}"'] if rng.random() < 0.8 else []
+            if rng.random() < 0.3:
+                matchers.append(f'env{rng.choice(["=", "!="])}"{rng.choice(["prod", "staging"])}"')
+            if rng.random() < 0.2:
+                matchers.append(f'team=~"{rng.choice(["db", "web|api", ".*ops"])}"')
+            routes.append({"matchers": matchers, "receiver": f"r{i}", "continue": rng.random() < 0.3})
+        root = Route.from_config({"receiver": "default", "routes": routes})
+
+        def linear(labels):
+            matched = []
+            for route in root.routes:
+                if route.matches(labels):
+                    matched.append(route.receiver)
+                    if not route.continue_matching:
+                        break
+            return matched or ["default"]
+
+        for _ in range(500):
+            labels = {
+                "service": f"svc-{rng.randrange(60)}",
+                "env": rng.choice(["prod", "staging", ""]),
+                "team": rng.choice(["db", "web", "api", "sre-ops", ""]),
+            }
+            assert [r.receiver for r in root.match(labels)] == linear(labels)
+
+
+class TestRouterWithRoutingTree:
+    def test_routes_by_labels(self):
+        slack = MagicMock()
+        slack.name = "slack"
+        slack.send.return_value = True
+        telegram = MagicMock()
+        telegram.name = "telegram"
+        telegram.send.return_value = True
+
+        tree = tree_from(
+            {"receiver": "default", "routes": [{"matchers": ['team="db"'], "receiver": "db"}]},
+            {"default": ["slack"], "db": ["telegram", "slack"]},
+        )
+        router = Router(channels=[slack, telegram], routing_config={}, routing_tree=tree)
+
+        results = router.route(Alert(title="Replication lag", level="info", labels={"team": "db"}))
+
+        assert results == {"telegram": True, "slack": True}
+        assert router.get_channels_for_alert(Alert(title="Other", labels={"team": "web"})) == (slack,)
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import serialization
+from serialization import BoundedJSON, JSONDecodeError, loads
+
+
+class TestLoads:
+    def test_decodes_with_either_backend(self, monkeypatch):
+        data = '{"title": "Alert", "alerts": [{"labels": {"alertname": "A"}}]}'
+
+        assert loads(data) == json.loads(data)
+        monkeypatch.setattr(serialization, "orjson", None)
+        assert loads(data) == json.loads(data)
+
+    def test_invalid_json_raises_json_decode_error(self):
+        with pytest.raises(JSONDecodeError):
+            loads("not json")
+
+
+class TestBoundedJSON:
+    def test_short_values_match_json_dumps(self):
+        value = {"a": [1, 2.5, None, True], "b": {"c": "ü"}}
+
+        assert str(BoundedJSON(value, 1000)) == json.dumps(value, ensure_ascii=False)
+
+    def test_output_is_bounded(self):
+        event = {"Records": [{"Sns": {"Message": "x" * 100_000}}] * 50}
+
+        rendered = str(BoundedJSON(event, 1000))
+
+        assert len(rendered) == 1000
+        assert rendered == json.dumps(event)[:1000]
+
+    def test_unserializable_values_fall_back_to_str(self):
+        assert str(BoundedJSON({"when": object}, 100)) == json.dumps({"when": str(object)})
+
+    def test_serializes_only_when_rendered(self):
+        class Exploding:
+            def __iter__(self):
+                raise AssertionError("serialized eagerly")
+
+        BoundedJSON(Exploding(), 10)
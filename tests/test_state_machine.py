@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from asl import StateMachine, VirtualClock  # noqa: E402
+from escalation_sim import DEFINITIONS, ROSTER, EscalationSimulator  # noqa: E402
+
+
+def simulate(mode, **kwargs):
+    return EscalationSimulator(DEFINITIONS[mode].read_text(), **kwargs)
+
+
+@pytest.mark.parametrize("mode", ["polling", "callback", "parallel"])
+def test_acknowledged_at_first_level(mode):
+    with simulate(mode, answer_rate=1.0, ack_delay=(30, 30), task_latency=0) as simulator:
+        outcome = simulator.run("fp1")
+
+    assert outcome.acked
+    assert outcome.calls == 1
+    assert outcome.time_to_ack == 30
+    assert simulator.table.get_item(Key={"PK": "ALERT#fp1", "SK": "METADATA"})["Item"]["status"] == "acked"
+
+
+def test_callback_ends_at_the_ack_and_polling_at_the_next_check():
+    outcomes = {}
+    for mode in DEFINITIONS:
+        with simulate(mode, answer_rate=1.0, ack_delay=(30, 30), task_latency=0) as simulator:
+            outcomes[mode] = simulator.run("fp1")
+
+    assert outcomes["callback"].lag == 0
+    assert outcomes["parallel"].lag == 0
+    assert outcomes["polling"].lag == 30
+
+
+@pytest.mark.parametrize("mode", ["polling", "callback", "parallel"])
+def test_unanswered_calls_escalate_through_every_level(mode):
+    with simulate(mode, answer_rate=0.0, task_latency=0) as simulator:
+        outcome = simulator.run("fp1")
+
+    assert not outcome.acked
+    assert outcome.time_to_ack is None
+    assert [call["DestinationPhoneNumber"] for call in simulator.connect.calls] == [m["phone"] for m in ROSTER]
+    assert outcome.duration == 180
+
+
+def test_late_ack_stops_the_next_level():
+    # Level 1 answers after its 60s wait, during the level 2 call
+    with simulate("callback", answer_rate=1.0, ack_delay=(75, 75), task_latency=0) as simulator:
+        outcome = simulator.run("fp1")
+
+    assert outcome.acked
+    assert outcome.calls == 2
+    assert outcome.duration == 75
+
+
+def test_ring_group_ends_on_the_first_ack():
+    with simulate("parallel", answer_rate=1.0, ack_delay=(30, 30), task_latency=0, policy="1,2;3") as simulator:
+        outcome = simulator.run("fp1")
+
+    assert outcome.acked
+    assert outcome.duration == 30
+    assert [call["DestinationPhoneNumber"] for call in simulator.connect.calls] == [m["phone"] for m in ROSTER[:2]]
+    # The second call was hung up before it could be acknowledged as well
+    assert len(simulator.connect.stopped) == 1
+    item = simulator.table.get_item(Key={"PK": "ALERT#fp1", "SK": "METADATA"})["Item"]
+    assert item["acked_by"] == ROSTER[0]["phone"]
+
+
+def test_ring_groups_escalate_step_by_step():
+    with simulate("parallel", answer_rate=0.0, task_latency=0, policy="1,2;all") as simulator:
+        outcome = simulator.run("fp1")
+
+    assert not outcome.acked
+    assert outcome.calls == 5
+    assert outcome.duration == 120
+
+
+def test_escalation_policy_parsing():
+    from escalation.start import parse_policy
+
+    assert parse_policy("1;2;3") == [[1], [2], [3]]
+    assert parse_policy("1, 2;ALL") == [[1, 2], ["all"]]
+    with pytest.raises(ValueError):
+        parse_policy("1;;2")
+
+
+def test_wait_choice_and_pass_states():
+    definition = """{
+      "StartAt": "Init",
+      "States": {
+        "Init": {"Type": "Pass", "Result": {"n": 0}, "ResultPath": "$.counter", "Next": "Wait"},
+        "Wait": {"Type": "Wait", "SecondsPath": "$.delay", "Next": "Increment"},
+        "Increment": {"Type": "Task", "Resource": "${IncrementArn}", "ResultPath": "$.counter", "Next": "Done?"},
+        "Done?": {
+          "Type": "Choice",
+          "Choices": [{"Variable": "$.counter.n", "NumericGreaterThanEquals": 3, "Next": "Finished"}],
+          "Default": "Wait"
+        },
+        "Finished": {"Type": "Succeed", "OutputPath": "$.counter"}
+      }
+    }"""
+    clock = VirtualClock()
+    machine = StateMachine(definition, {"IncrementArn": lambda event, context: {"n": event["counter"]["n"] + 1}}, clock)
+
+    execution = machine.run({"delay": 10})
+
+    assert execution.status == "SUCCEEDED"
+    assert execution.output == {"n": 3}
+    assert execution.duration == 30
+    assert execution.invocations["IncrementArn"] == 3